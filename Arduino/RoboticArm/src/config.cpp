@@ -3,6 +3,7 @@
 // ===========================
 // HARDWARE CONFIGURATION
 // ===========================
+// Mirrored in Debugger/firmware_emulator.py (FirmwareConfig)
 uint8_t CLK[N] = {6, 4, 2};
 uint8_t DIR[N] = {7, 5, 3};
 int RESOLUTION[N] = {8*200, 8*200, 8*200};
@@ -10,6 +11,7 @@ float max_speed[N] = {50., 15., 15.};
 float acceleration[N] = {20., 10., 10.};
 bool inv_dir[N] = {true, false, false};
 
+// Keep in sync with GUI/geometry.json
 float L1 = 250.0;
 float L2 = 200.0;
 float L3 = 150.0;
@@ -0,0 +1,520 @@
+import math
+import os
+import re
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'Trajectory'))
+from firmware_config import FirmwareConfig  # type: ignore
+
+f32 = np.float32
+PI = f32(3.14159265358979)
+RAD_TO_DEG = f32(57.295779513)
+
+
+# =========================
+# ARDUINO HELPERS
+# =========================
+def arduino_float(value, digits=2):
+    """Serial.print(float, digits): sign first, then round half up and truncate."""
+    value = float(value)
+    if math.isnan(value):
+        return "nan"
+    if math.isinf(value):
+        return "inf"
+    if value > 4294967040.0 or value < -4294967040.0:
+        return "ovf"
+    text = ""
+    if value < 0.0:
+        text, value = "-", -value
+    value += 0.5 / 10**digits
+    integer = int(value)
+    remainder = value - integer
+    text += str(integer)
+    if digits > 0:
+        text += "."
+        for _ in range(digits):
+            remainder *= 10.0
+            digit = int(remainder)
+            text += str(digit)
+            remainder -= digit
+    return text
+
+_FLOAT_PREFIX = re.compile(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?')
+
+def to_float(text):
+    """String.toFloat: leading number of text, 0 when there is none."""
+    match = _FLOAT_PREFIX.match(text)
+    return f32(float(match.group(0))) if match else f32(0.0)
+
+
+# =========================
+# FIRMWARE KINEMATICS (float32, gripper ignored)
+# =========================
+def firmware_inverse_kinematics(x, y, z, l1, l2):
+    """inverse_kinematics() of kinematics.cpp on arrays, returns (..., 3) angles in degrees."""
+    x, y, z = (np.asarray(v, dtype=f32) for v in (x, y, z))
+    l1, l2 = f32(l1), f32(l2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        theta = np.where(x != 0, np.arctan2(y, x), np.where(y > 0, f32(1), f32(-1)) * PI / f32(2))
+        x = np.sqrt(x * x + y * y)
+        r = np.sqrt(x * x + z * z)
+        a = np.arccos((-l2 * l2 + l1 * l1 + r * r) / (f32(2) * l1 * r))
+        b = np.arccos((l1 * l1 + l2 * l2 - r * r) / (f32(2) * l1 * l2))
+        atn = np.arctan2(z, x)
+    return np.stack([theta * RAD_TO_DEG, (PI - a - b - atn) * RAD_TO_DEG,
+                     (PI / f32(2) - a - atn) * RAD_TO_DEG], axis=-1).astype(f32)
+
+def firmware_direct_kinematics(theta, alpha, beta, l1, l2):
+    """
+    direct_kinematics() of kinematics.cpp. Its callers pass angles in degrees
+    where radians are expected; this reproduces the firmware as is.
+    """
+    theta, alpha, beta = (np.asarray(v, dtype=f32) for v in (theta, alpha, beta))
+    q1 = PI / f32(2) - beta
+    q2 = -alpha
+    x_plane = f32(l1) * np.cos(q1) + f32(l2) * np.cos(q2)
+    z_plane = f32(l1) * np.sin(q1) + f32(l2) * np.sin(q2)
+    return np.stack([x_plane * np.cos(theta), x_plane * np.sin(theta), z_plane], axis=-1).astype(f32)
+
+
+# =========================
+# EMULATOR
+# =========================
+class FirmwareEmulator:
+    """
+    Host-side emulation of the RoboticArm firmware main loop.
+
+    The loop (readSerial, follow_trajectory, feedback) runs on a virtual
+    clock in loop_us increments. follow_trajectory ticks every
+    trajectory_check_interval and takes at most one step per joint per tick,
+    when the float32 target is more than one step away, like movestep. As in
+    main.cpp, the currently_* flags are independent: a command sent during a
+    motion sets its own flag next to the running one, and the first set flag
+    in loop() order (interpolation, circle, line) supplies the targets until
+    completion clears them all. The
+    4 µs step pulses and the real loop duration are not modelled: loop_us
+    stands for them.
+
+    Targets are evaluated for many ticks at once, only the step decisions run
+    tick by tick, so the emulation is much faster than real time. Serial
+    output is produced with the same text as the firmware.
+    """
+
+    def __init__(self, config=None, loop_us=50, chunk_ticks=65536):
+        self.config = config or FirmwareConfig()
+        self.loop_us = loop_us
+        self.chunk_ticks = chunk_ticks
+        c = self.config
+        self.resolution = np.array(c.resolution)
+        self.max_speed = np.array(c.max_speed, dtype=f32)
+        self.acceleration = np.array(c.acceleration, dtype=f32)
+        self.tick_period = self._grid_ceil(c.trajectory_check_interval)
+        self.feedback_period = self._grid_ceil(c.feedback_interval)
+
+        self.now = 0
+        self.current_step = [0, 0, 0]
+        self.trajectory_start_us = 0
+        self.trajectory_time = f32(10.0)
+        self.last_trajectory_check = 0
+        self.last_feedback_time = 0
+        self.serial_last_check = 0
+        self.following_trajectory = False    # currently_* flags of config.cpp
+        self.interpolating = False
+        self.drawing_circle = False
+        self.drawing_line = False
+        self.following_profile = False       # follow(), checked after the firmware flags
+        self._profile = None
+
+        self._input = ""
+        self._output = ""
+        self._history = []       # (tick times, steps, targets) chunks
+
+        # setup()
+        self._println("Available commands:")
+        self._println("Interpolation: it<theta>a<alpha>b<beta> or ix<x>y<y>z<z>")
+        self._println("Line: lx<line_goal_x>y<line_goal_y>z<line_goal_z>")
+        self._println("Circle: cr<radius>x<center_x>y<center_y>z<center_z>")
+
+    # ---------- Serial port ----------
+    def send(self, command):
+        """Write a command to the emulated serial port, a newline is added if missing."""
+        self._input += command if command.endswith("\n") else command + "\n"
+
+    def read_lines(self):
+        """Complete output lines written since the last call, without line endings."""
+        *lines, self._output = self._output.split("\n")
+        return [line.rstrip("\r") for line in lines]
+
+    def _print(self, text):
+        self._output += text
+
+    def _println(self, text=""):
+        self._output += text + "\r\n"
+
+    # ---------- State ----------
+    @property
+    def current_angle(self):
+        """current_angle[] in degrees, as computed by movestep."""
+        return np.array([self._angle(j, s) for j, s in enumerate(self.current_step)], dtype=f32)
+
+    @property
+    def idle(self):
+        return not self.following_trajectory and not self._input
+
+    def _angle(self, joint, step):
+        return f32(f32(step * 360.0) / f32(self.resolution[joint]))
+
+    def _grid_ceil(self, time_us):
+        return -(-int(time_us) // self.loop_us) * self.loop_us
+
+    # ---------- Running ----------
+    def run(self, duration):
+        """Advance the virtual clock by duration seconds."""
+        self.run_until(self.now + int(round(duration * 1e6)))
+
+    def run_until(self, time_us):
+        """Advance the virtual clock to time_us."""
+        while self.now < time_us:
+            serial_time = np.inf
+            if self._input:
+                serial_time = self._grid_ceil(max(self.now, self.serial_last_check + self.config.serial_check_interval))
+            end = int(min(serial_time, time_us))
+            self._simulate(end)
+            self.now = end
+            if end == serial_time:
+                self._read_serial()
+
+    def run_until_idle(self, timeout=3600.0):
+        """Run until every command is processed and the arm has stopped (s of virtual time)."""
+        deadline = self.now + int(timeout * 1e6)
+        while not self.idle and self.now < deadline:
+            self.run_until(min(self.now + 1_000_000, deadline))
+
+    def follow(self, profile):
+        """
+        Follow a planned trajectory (PiecewisePolynomial in degrees) with
+        follow_trajectory, as if the firmware had it as trajectory function.
+        """
+        self._profile = profile
+        self.trajectory_time = f32(profile.duration)
+        self.following_profile = True
+        self._begin_trajectory()
+
+    def _begin_trajectory(self):
+        self.trajectory_start_us = self.now
+        self.following_trajectory = True
+
+    # ---------- Main loop, between two serial reads ----------
+    def _simulate(self, end):
+        """Loop iterations in [now, end) without serial input."""
+        start = self.now
+        while self.following_trajectory and start < end:
+            first = self._grid_ceil(max(start, self.last_trajectory_check + self.config.trajectory_check_interval))
+            window_end = min(end, first + self.chunk_ticks * self.tick_period)
+            ticks = np.arange(first, window_end, self.tick_period, dtype=np.int64)
+
+            t = (ticks - self.trajectory_start_us).astype(f32) / f32(1e6)
+            over = np.flatnonzero(t > self.trajectory_time)
+            n = over[0] if over.size else len(ticks)
+            steps_before = list(self.current_step)
+            if n:
+                targets = self._targets(t[:n])
+                steps = self._step(targets)
+                self._history.append((ticks[:n], steps, targets))
+            else:
+                steps = np.empty((0, 3), dtype=np.int32)
+            if len(ticks):
+                self.last_trajectory_check = int(ticks[min(n, len(ticks) - 1)])
+
+            stop = int(ticks[n]) if over.size else window_end
+            self._feedback(start, stop, ticks[:n], steps, steps_before)
+            if over.size:
+                self._complete()
+            start = window_end
+
+    def _step(self, targets):
+        """follow_trajectory step decisions for consecutive ticks, returns steps after each tick."""
+        out = np.empty(targets.shape, dtype=np.int32)
+        for j in range(targets.shape[1]):
+            step = self.current_step[j]
+            angle = self._angle(j, step)
+            threshold = f32(360.0) / f32(self.resolution[j])
+            column = []
+            for target in targets[:, j]:
+                difference = target - angle       # float32, difference_angle_trajectory
+                if difference > threshold:
+                    step += 1
+                    angle = self._angle(j, step)
+                elif difference < -threshold:
+                    step -= 1
+                    angle = self._angle(j, step)
+                column.append(step)
+            out[:, j] = column
+            self.current_step[j] = step
+        return out
+
+    def _feedback(self, start, stop, ticks, steps, steps_before):
+        """feedback() for the loop iterations in [start, stop)."""
+        c = self.config
+        if not c.feedback_enabled:
+            return
+        time_us = self._grid_ceil(max(start, self.last_feedback_time + c.feedback_interval))
+        while time_us < stop:
+            k = np.searchsorted(ticks, time_us, side='right') - 1
+            current = steps[k] if k >= 0 else steps_before
+            angles = [self._angle(j, s) for j, s in enumerate(current)]
+            line = ""
+            if c.time_feedback_enabled:
+                line += "d" + arduino_float(f32(time_us - self.trajectory_start_us) / f32(1e6), 3)
+            line += "t" + arduino_float(angles[0]) + "a" + arduino_float(angles[1]) + "b" + arduino_float(angles[2])
+            self._println(line)
+            self.last_feedback_time = time_us
+            time_us += self.feedback_period
+
+    def _complete(self):
+        self.following_trajectory = False
+        self.interpolating = self.drawing_circle = self.drawing_line = self.following_profile = False
+        self._println("Completed at [" + ", ".join(arduino_float(a) for a in self.current_angle) + "]")
+
+    # ---------- Trajectory functions ----------
+    def _targets(self, t):
+        """
+        target_angle_snap for an array of trajectory times (float32 s).
+
+        loop() calls follow_trajectory once per set flag, but the first call
+        of a tick resets last_trajectory_check_interval and the later ones
+        return early, so only the first set flag moves the arm.
+        """
+        if self.interpolating:
+            return self._interpolation_trajectory(t)
+        if self.drawing_circle:
+            return self._circle_cartesian(t)
+        if self.drawing_line:
+            return self._line_cartesian(t)
+        return np.asarray(self._profile.position(t.astype(float)), dtype=f32)
+
+    def _interpolation_trajectory(self, t):
+        t = t[:, None]
+        sign = np.where(self.sign_interpolation, f32(1), f32(-1))
+        a = self.acceleration
+        accelerating = self.initial_angle + sign * a * (t * t) / f32(2)
+        cruising = self.last_acceleration_angle + sign * self.speed * (t - self.t_cru_s)
+        dt = t - self.t_dec_s
+        decelerating = self.last_cruising_angle + sign * (self.speed * dt - (a * dt * dt) / f32(2))
+        return np.where(t < self.t_cru_s, accelerating,
+                        np.where(t < self.t_dec_s, cruising, decelerating)).astype(f32)
+
+    @staticmethod
+    def _smooth(t, duration):
+        t = t / duration
+        return duration * t * t * (f32(3) - f32(2) * t)
+
+    def _line_cartesian(self, t):
+        t = self._smooth(t, self.trajectory_time)[:, None]
+        coordinates = self.line_initial + t / self.trajectory_time * (self.line_goal - self.line_initial)
+        c = self.config
+        return firmware_inverse_kinematics(coordinates[:, 0], coordinates[:, 1], coordinates[:, 2], c.l1, c.l2)
+
+    def _circle_cartesian(self, t):
+        targets = np.empty((len(t), 3), dtype=f32)
+        approach = t < self.circle_line_time
+        targets[approach] = self._line_cartesian(t[approach] * self.trajectory_time / self.circle_line_time)
+
+        duration = self.trajectory_time - self.circle_line_time
+        s = self._smooth(t[~approach] - self.circle_line_time, duration)
+        x = self.center_x + self.radius * np.cos(f32(2) * PI * s / duration)
+        z = self.center_z + self.radius * np.sin(f32(2) * PI * s / duration)
+        c = self.config
+        targets[~approach] = firmware_inverse_kinematics(x, np.zeros_like(x), z, c.l1, c.l2)
+        return targets
+
+    # ---------- calculate_interpolation ----------
+    def _begin_interpolate(self, target):
+        current = self.current_angle
+        self.initial_angle = current
+        distances = np.abs(target - current)
+        self.sign_interpolation = (target - current) >= f32(0)
+        a, v = self.acceleration, self.max_speed
+
+        min_times = np.where(distances < (v * v) / a, f32(2) * np.sqrt(distances / a), distances / v + v / a)
+        T = f32(max(f32(0), min_times.max()))
+        delta = np.maximum((a * T) * (a * T) - f32(4) * a * distances, f32(0))
+        speed = (a * T - np.sqrt(delta)) / f32(2)
+        speed = np.where((-1e-9 < speed) & (speed < 0), f32(0), speed).astype(f32)
+        t_a = speed / a
+        t_c = T - f32(2) * t_a
+        t_c = np.where((-1e-9 < t_c) & (t_c < 0), f32(0), t_c).astype(f32)
+
+        sign = np.where(self.sign_interpolation, f32(1), f32(-1))
+        self.speed = speed
+        self.t_cru_s = t_a
+        self.t_dec_s = (t_a + t_c).astype(f32)
+        self.last_acceleration_angle = (current + sign * (speed * speed) / (f32(2) * a)).astype(f32)
+        self.last_cruising_angle = (self.last_acceleration_angle + sign * speed * t_c).astype(f32)
+
+        self._print("\n")
+        self._println(f"Moving from [{arduino_float(current[0])}, {arduino_float(current[1])}] to "
+                      f"[{arduino_float(target[0])}, {arduino_float(target[1])}] in {arduino_float(T, 4)} seconds.")
+        self.trajectory_time = T
+        self.interpolating = True
+        self._begin_trajectory()
+
+    # ---------- readSerial ----------
+    def _read_serial(self):
+        self.serial_last_check = self.now
+        c, self._input = self._input[0], self._input[1:]
+        if c not in "ilcd":
+            return
+        if c == "d":
+            self._debug()
+            return
+
+        line, _, self._input = self._input.partition("\n")
+        line = line.strip()
+        if c == "i":
+            self._command_interpolation(line)
+        elif c == "l":
+            self._command_line(line)
+        else:
+            self._command_circle(line)
+
+    def _command_interpolation(self, line):
+        t_idx, a_idx, b_idx = line.find('t'), line.find('a'), line.find('b')
+        if t_idx != -1 and a_idx != -1 and b_idx != -1 and a_idx > t_idx and b_idx > a_idx:
+            target = np.array([to_float(line[t_idx + 1:a_idx]), to_float(line[a_idx + 1:b_idx]),
+                               to_float(line[b_idx + 1:])], dtype=f32)
+            # shortest theta path
+            current_theta = self.current_angle[0]
+            while current_theta - target[0] > f32(180.0):
+                target[0] += f32(360.0)
+            while current_theta - target[0] < f32(-180.0):
+                target[0] -= f32(360.0)
+            self._begin_interpolate(target)
+            return
+
+        point = self._parse_xyz(line)
+        if point is None:
+            self._println("Invalid interpolation format. Use: it<theta>a<alpha>b<beta> or ix<x>y<y>z<z>")
+            return
+        c = self.config
+        self._begin_interpolate(firmware_inverse_kinematics(*point, c.l1, c.l2))
+
+    @staticmethod
+    def _parse_xyz(line):
+        x_idx, y_idx, z_idx = line.find('x'), line.find('y'), line.find('z')
+        if x_idx != -1 and y_idx != -1 and z_idx != -1 and y_idx > x_idx and z_idx > y_idx:
+            return (to_float(line[x_idx + 1:y_idx]), to_float(line[y_idx + 1:z_idx]), to_float(line[z_idx + 1:]))
+        return None
+
+    def _line_setup(self, goal):
+        """Common part of the line and circle commands, returns length_line_JS."""
+        c = self.config
+        self.line_goal = np.array(goal, dtype=f32)
+        current = self.current_angle
+        goal_angles = firmware_inverse_kinematics(*self.line_goal, c.l1, c.l2)
+        length = f32(np.sqrt(np.sum((goal_angles - current) * (goal_angles - current), dtype=f32)))
+        self.line_initial = firmware_direct_kinematics(*current, c.l1, c.l2)
+        return length
+
+    def _command_line(self, line):
+        point = self._parse_xyz(line)
+        if point is None:
+            self._println("Invalid format. Use: a<angle1>b<angle2>")
+            return
+        length = self._line_setup(point)
+        self.trajectory_time = f32(length / f32(50.0))
+        self.drawing_line = True
+        self._begin_trajectory()
+
+    def _command_circle(self, line):
+        r_idx, x_idx, z_idx = line.find('r'), line.find('x'), line.find('z')
+        if not (r_idx != -1 and x_idx != -1 and z_idx != -1 and x_idx > r_idx and z_idx > x_idx):
+            self._println("Invalid format. Use: r<radius>x<center_x>z<center_z>")
+            return
+        self.radius = to_float(line[r_idx + 1:x_idx])
+        self.center_x = to_float(line[x_idx + 1:z_idx])
+        self.center_z = to_float(line[z_idx + 1:])
+
+        perimeter = f32(2) * PI * self.radius
+        length = self._line_setup((self.center_x + self.radius, 0.0, self.center_z))
+        self.circle_line_time = f32(length / f32(50.0))
+        self.trajectory_time = f32(perimeter / f32(150.0) + self.circle_line_time)
+        self.drawing_circle = True
+        self._begin_trajectory()
+
+    def _debug(self):
+        angles = self.current_angle
+        self._println("JS: [" + ", ".join(arduino_float(a) for a in angles) + "]")
+        position = firmware_direct_kinematics(*angles, self.config.l1, self.config.l2)
+        self._println("CS: [" + ", ".join(arduino_float(p) for p in position) + "]")
+
+    # ---------- Results ----------
+    def history(self):
+        """
+        Every follow_trajectory tick so far.
+
+        Returns:
+            dict with t_us (n,), steps (n, 3) step counters after the tick,
+            angles (n, 3) the matching current_angle and targets (n, 3)
+            target_angle_snap in degrees
+        """
+        if not self._history:
+            empty = np.empty((0, 3))
+            return {"t_us": np.empty(0, dtype=np.int64), "steps": empty.astype(np.int32),
+                    "angles": empty, "targets": empty}
+        t_us, steps, targets = (np.concatenate(parts) for parts in zip(*self._history))
+        return {"t_us": t_us, "steps": steps, "angles": steps * 360.0 / self.resolution, "targets": targets}
+
+    def tracking_error(self):
+        """
+        Largest |target - current angle| over all ticks, in steps per joint.
+
+        The loop takes at most one step per joint per tick, so it keeps up with
+        a trajectory while this stays under 2 steps; larger values mean the
+        trajectory is too fast for the firmware's loop rate.
+        """
+        h = self.history()
+        if not len(h["t_us"]):
+            return np.zeros(3)
+        error = np.abs(h["targets"] - h["angles"]) * self.resolution / 360.0
+        return np.nanmax(error, axis=0)
+
+
+#test
+if __name__ == "__main__":
+    import time
+
+    # Commands sent one by one, waiting for the arm like the GUI does
+    emulator = FirmwareEmulator()
+    t0 = time.perf_counter()
+    for command in ("it90a30b-20", "d", "lx300y0z150", "cr40x300z150", "ix250y0z250"):
+        emulator.send(command)
+        emulator.run_until_idle()
+    elapsed = time.perf_counter() - t0
+    for line in emulator.read_lines():
+        if not line.startswith("d"):   # skip the feedback stream
+            print(line)
+    print(f"{emulator.now / 1e6:.2f} s emulated in {elapsed:.2f} s, tracking error (steps): {emulator.tracking_error().round(2)}")
+
+    # A command sent mid-motion sets its flag next to the running one
+    emulator = FirmwareEmulator()
+    emulator.send("lx300y0z150")
+    emulator.run(0.01)
+    emulator.run(float(emulator.trajectory_time) / 2)
+    emulator.send("it0a0b0")
+    emulator.run(0.01)
+    print("flags after it during a line:", {name: getattr(emulator, name) for name in ("interpolating", "drawing_line")})
+    emulator.run_until_idle()
+    print([line for line in emulator.read_lines() if line.startswith("Completed")])
+
+    # Is a planned trajectory feasible at the firmware loop rate?
+    from trap_profile import trapezoid_profile  # type: ignore
+    for scale in (1, 1000):
+        emulator = FirmwareEmulator()
+        profile = trapezoid_profile([0, 0, 0], [90, 30, -20], np.array([50.0, 15.0, 15.0]) * scale,
+                                    np.array([20.0, 10.0, 10.0]) * scale)
+        emulator.follow(profile)
+        emulator.run_until_idle()
+        print(f"limits x{scale}: tracking error {emulator.tracking_error().round(2)} steps")
@@ -12,6 +12,7 @@ from PySide6.QtCore import Qt
 # Add GUI folder to path to import kinematics
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
 from kinematics import inverse_kinematics, direct_kinematics  # type: ignore
+from arm_model import ArmModel  # type: ignore
 
 
 # =========================
@@ -22,10 +23,8 @@ class KinematicsConverter(QMainWindow):
         super().__init__()
         self.setWindowTitle("Kinematics Converter")
         
-        # Default link lengths
-        self.l1 = 250
-        self.l2 = 200
-        self.l3 = 150
+        # Default link lengths from GUI/geometry.json
+        self.l1, self.l2, self.l3 = ArmModel.load().links
         
         # Create main layout
         main_layout = QHBoxLayout()
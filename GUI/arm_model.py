@@ -0,0 +1,169 @@
+import hashlib
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+
+import numpy as np
+
+import kinematics
+
+GUI_DIR = Path(__file__).parent
+
+
+@dataclass(frozen=True, eq=False)
+class ArmModel:
+    """
+    Immutable description of one arm: link lengths, joint limits and the
+    constants derived from them.
+
+    Build it once with ArmModel.load() and use its bound kinematics instead of
+    passing l1/l2/l3 around. The triangle constants (l1², l2², 2·l1·l2, ...)
+    and the reach bounds are computed once here, not on every IK call. The
+    Trajectory planners take the model as their arm argument.
+
+    Defaults match the kinematics functions (l3 = 0, the firmware's IK).
+    """
+    l1: float = 250.0
+    l2: float = 200.0
+    l3: float = 0.0
+    limits: np.ndarray = field(default_factory=lambda: kinematics.joint_limits({}))
+    params: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+    def __post_init__(self):
+        limits = np.array(self.limits, dtype=float)
+        limits.setflags(write=False)
+        object.__setattr__(self, 'limits', limits)
+        object.__setattr__(self, 'params', MappingProxyType(dict(self.params)))
+        object.__setattr__(self, '_consts', kinematics.link_constants(self.l1, self.l2))
+
+    @classmethod
+    def load(cls, params_path=None, geometry_path=None):
+        """Load the model from params.json and geometry.json (defaults next to this file)."""
+        params_path = Path(params_path) if params_path else GUI_DIR / "params.json"
+        geometry_path = Path(geometry_path) if geometry_path else GUI_DIR / "geometry.json"
+        with open(params_path, 'r') as f:
+            params = json.load(f)
+        with open(geometry_path, 'r') as f:
+            geometry = json.load(f)
+        return cls(
+            l1=float(geometry["l1"]),
+            l2=float(geometry["l2"]),
+            l3=float(geometry["l3"]),
+            limits=kinematics.joint_limits(params),
+            params=params,
+        )
+
+    # ---------- Derived constants ----------
+    @property
+    def constants(self):
+        """Read-only view of the precomputed triangle constants, see kinematics.link_constants."""
+        return MappingProxyType(self._consts)
+
+    @property
+    def l1_sq(self):
+        return self._consts['l1_sq']
+
+    @property
+    def l2_sq(self):
+        return self._consts['l2_sq']
+
+    @property
+    def two_l1_l2(self):
+        return self._consts['two_l1_l2']
+
+    @property
+    def wrist_reach(self):
+        """(min, max) distance from the shoulder to the wrist."""
+        return self._consts['r_min'], self._consts['r_max']
+
+    @property
+    def reach(self):
+        """(min, max) distance from the shoulder to the tool tip, any orientation."""
+        return max(0.0, self._consts['r_min'] - self.l3), self._consts['r_max'] + self.l3
+
+    @property
+    def links(self):
+        return self.l1, self.l2, self.l3
+
+    @property
+    def mu_range(self):
+        """(min, max) end effector orientation from params.json, radians."""
+        return (np.radians(self.params.get("mumin", -180)), np.radians(self.params.get("mumax", 180)))
+
+    def fingerprint(self):
+        """Short hash of the geometry and limits, used to key cached workspace data."""
+        key = json.dumps({
+            "links": [float(v) for v in self.links],
+            "limits": self.limits.tolist(),
+            "mu_range": [float(v) for v in self.mu_range],
+        }, sort_keys=True)
+        return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+    # ---------- Kinematics bound to this arm ----------
+    def inverse_kinematics(self, x_abs, y_abs=None, z_abs=None, mu=0):
+        """Batched inverse kinematics, see kinematics.inverse_kinematics_batch."""
+        x_abs, y_abs, z_abs = kinematics._split_points(x_abs, y_abs, z_abs)
+        x_abs, y_abs, z_abs, mu = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (x_abs, y_abs, z_abs, mu)))
+        return kinematics._solve(x_abs, y_abs, z_abs, self.l3, mu, self._consts)
+
+    def inverse_kinematics_branches(self, x_abs, y_abs=None, z_abs=None, mu=0, limits=True):
+        """
+        Both elbow branches, see kinematics.inverse_kinematics_branches.
+        limits=True checks the model's joint limits, False skips the check,
+        an explicit (4, 2) array overrides them.
+        """
+        x_abs, y_abs, z_abs = kinematics._split_points(x_abs, y_abs, z_abs)
+        x_abs, y_abs, z_abs, mu = np.broadcast_arrays(
+            *(np.asarray(v, dtype=float) for v in (x_abs, y_abs, z_abs, mu)))
+        angles, valid = kinematics._solve_branches(x_abs, y_abs, z_abs, self.l3, mu, self._consts)
+        limits = self.limits if limits is True else limits
+        if limits is not None and limits is not False:
+            valid = valid & kinematics.within_limits(angles, limits)
+        return angles, valid
+
+    def inverse_kinematics_nearest(self, x_abs, y_abs=None, z_abs=None, current=None, mu=0,
+                                   limits=True, weights=None):
+        """Branch closest to current, see kinematics.inverse_kinematics_nearest."""
+        angles, valid = self.inverse_kinematics_branches(x_abs, y_abs, z_abs, mu, limits)
+        return kinematics.select_nearest_branch(angles, valid, current, weights)
+
+    def direct_kinematics(self, angles):
+        """(N, 4) joint angles to (N, 3) positions."""
+        return kinematics.direct_kinematics_batch(angles, self.l1, self.l2, self.l3)
+
+    def jacobian(self, angles):
+        return kinematics.jacobian(angles, self.l1, self.l2, self.l3)
+
+    def inverse_jacobian(self, angles, tol=1e-6):
+        return kinematics.inverse_jacobian(angles, self.l1, self.l2, self.l3, tol)
+
+    def cartesian_velocity(self, angles, joint_velocities):
+        return kinematics.cartesian_velocity(angles, joint_velocities, self.l1, self.l2, self.l3)
+
+    def joint_velocity(self, angles, cartesian_velocities, tol=1e-6):
+        return kinematics.joint_velocity(angles, cartesian_velocities, self.l1, self.l2, self.l3, tol)
+
+    def joint_speed_limits(self, angles, cartesian_speed, tol=1e-6):
+        return kinematics.joint_speed_limits(angles, cartesian_speed, self.l1, self.l2, self.l3, tol)
+
+    # ---------- Workspace ----------
+    def reachable(self, x_abs, y_abs=None, z_abs=None, mu=0, limits=True):
+        """Boolean mask of targets reachable by at least one branch within the joint limits."""
+        _, valid = self.inverse_kinematics_branches(x_abs, y_abs, z_abs, mu, limits)
+        return valid.any(axis=-1)
+
+    def in_radial_band(self, x_abs, y_abs):
+        """Mask of targets inside the Rmin/Rmax band of params.json used by the GUI."""
+        r = np.hypot(x_abs, y_abs)
+        return (r > self.params.get("Rmin", 0)) & (r < self.params.get("Rmax", np.inf))
+
+
+#test
+if __name__ == "__main__":
+    arm = ArmModel.load()
+    print("Links:", arm.links, "reach:", arm.reach)
+    angles, reachable = arm.inverse_kinematics([[300, 0, 100], [0, 250, 0]], mu=0)
+    print("Angles:\n", angles, reachable)
+    print("Round trip:\n", arm.direct_kinematics(angles))
@@ -1,7 +1,8 @@
 from PySide6.QtWidgets import QWidget
-from PySide6.QtCore import Qt, QPointF, Signal
-from PySide6.QtGui import QPainter, QPen, QColor, QFont, QWheelEvent, QMouseEvent
+from PySide6.QtCore import Qt, QPointF, QRectF, Signal
+from PySide6.QtGui import QPainter, QPen, QColor, QFont, QWheelEvent, QMouseEvent, QImage
 import math
+import numpy as np
 
 
 class CoordinateSystemWidget(QWidget):
@@ -65,6 +66,12 @@ class CoordinateSystemWidget(QWidget):
         self.show_excluded_regions = True
         self.show_boundary_circles = True
         
+        # Heatmap overlay (e.g. manipulability), set with set_overlay
+        self.show_overlay = False
+        self.overlay_image = None
+        self.overlay_extent = None  # (xmin, xmax, ymin, ymax) in coordinates
+        self.overlay_opacity = 0.6
+        
         # Waypoint storage
         self.waypoints = []  # List of (x, y) tuples for committed waypoint coordinates
         self.temporary_waypoint = None  # Temporary waypoint (x, y) before it's committed
@@ -105,6 +112,10 @@ class CoordinateSystemWidget(QWidget):
         if self.show_labels:
             self._draw_labels(painter)
         
+        # Draw heatmap overlay
+        if self.show_overlay and self.overlay_image is not None:
+            self._draw_overlay(painter)
+        
         # Draw ellipse
         if self.show_ellipse:
             self._draw_ellipse(painter)
@@ -315,6 +326,17 @@ class CoordinateSystemWidget(QWidget):
             int(rmax_radius_y * 2)
         )
     
+    def _draw_overlay(self, painter):
+        """Draw the heatmap overlay stretched over its coordinate extent"""
+        xmin, xmax, ymin, ymax = self.overlay_extent
+        target = QRectF(
+            QPointF(self._to_pixel_x(xmin), self._to_pixel_y(ymax)),
+            QPointF(self._to_pixel_x(xmax), self._to_pixel_y(ymin))
+        )
+        painter.setOpacity(self.overlay_opacity)
+        painter.drawImage(target, self.overlay_image)
+        painter.setOpacity(1.0)
+    
     def _draw_waypoints(self, painter):
         """Draw waypoint dots and lines on the graph"""
         # Draw lines between committed waypoints
@@ -742,6 +764,53 @@ class CoordinateSystemWidget(QWidget):
             self.show_boundary_circles = show
         self.update()
     
+    def toggle_overlay(self, show=None):
+        """Toggle heatmap overlay visibility"""
+        if show is None:
+            self.show_overlay = not self.show_overlay
+        else:
+            self.show_overlay = show
+        self.update()
+    
+    def set_overlay(self, values, xmin, xmax, ymin, ymax, vmin=None, vmax=None):
+        """
+        Set a heatmap overlay from a 2D array sampled over [xmin, xmax] x [ymin, ymax].
+        Row 0 is at ymin. NaN cells are transparent. Values are mapped to a
+        viridis-like colormap between vmin and vmax (data range by default).
+        """
+        values = np.asarray(values, dtype=float)
+        finite = np.isfinite(values)
+        vmin = np.min(values[finite]) if vmin is None and finite.any() else (vmin or 0.0)
+        vmax = np.max(values[finite]) if vmax is None and finite.any() else (vmax or 1.0)
+        t = np.clip((values - vmin) / max(vmax - vmin, 1e-12), 0.0, 1.0)
+        t = np.nan_to_num(t)
+        
+        # Viridis-like color stops
+        stops = np.array([[68, 1, 84], [59, 82, 139], [33, 145, 140], [94, 201, 98], [253, 231, 37]], dtype=float)
+        position = t * (len(stops) - 1)
+        index = np.minimum(position.astype(int), len(stops) - 2)
+        frac = (position - index)[..., None]
+        rgb = stops[index] * (1 - frac) + stops[index + 1] * frac
+        
+        rgba = np.empty(values.shape + (4,), dtype=np.uint8)
+        rgba[..., :3] = rgb.astype(np.uint8)
+        rgba[..., 3] = np.where(finite, 255, 0)
+        rgba = np.ascontiguousarray(rgba[::-1])  # Image rows go down, y goes up
+        
+        height, width = values.shape
+        self._overlay_buffer = rgba  # QImage does not own the buffer
+        self.overlay_image = QImage(rgba.data, width, height, 4 * width, QImage.Format_RGBA8888)
+        self.overlay_extent = (xmin, xmax, ymin, ymax)
+        self.show_overlay = True
+        self.update()
+    
+    def clear_overlay(self):
+        """Remove the heatmap overlay"""
+        self.overlay_image = None
+        self.overlay_extent = None
+        self.show_overlay = False
+        self.update()
+    
     def set_radius_bounds(self, Rmin, Rmax):
         """Set new radius bounds for the stripe region"""
         self.Rmin = Rmin
@@ -1,6 +1,16 @@
+import json
+from pathlib import Path
 import numpy as np
 
+JOINT_NAMES = ('theta', 'alpha', 'beta', 'gamma')
+
 def inverse_kinematics(x_abs, y_abs, z_abs, l1=250, l2=200, l3=0, mu=0):
+    if np.ndim(x_abs) or np.ndim(y_abs) or np.ndim(z_abs) or np.ndim(mu):
+        # Array inputs go through the vectorized solver (NaN where unreachable)
+        angles, reachable = inverse_kinematics_batch(x_abs, y_abs, z_abs, l1=l1, l2=l2, l3=l3, mu=mu)
+        angles[~reachable] = np.nan
+        return list(np.moveaxis(angles, -1, 0))
+
     theta = np.arctan2(y_abs, x_abs) if x_abs !=0 else (1 if y_abs>0 else -1) * np.pi/2
     x_abs = np.sqrt(x_abs**2+y_abs**2)
     x = x_abs - l3*np.cos(mu)
@@ -17,6 +27,195 @@ def inverse_kinematics(x_abs, y_abs, z_abs, l1=250, l2=200, l3=0, mu=0):
         mu + np.pi - a - b - atn #gamma
     ]
 
+def link_constants(l1, l2):
+    """
+    Derived constants of the l1/l2 triangle used by the inverse kinematics.
+    Precomputing them once (see ArmModel) keeps them out of hot loops.
+    """
+    return {
+        'l1_sq': l1**2,
+        'l2_sq': l2**2,
+        'l1_sq_minus_l2_sq': l1**2 - l2**2,
+        'l1_sq_plus_l2_sq': l1**2 + l2**2,
+        'two_l1': 2*l1,
+        'two_l1_l2': 2*l1*l2,
+        'r_min': np.abs(l1 - l2),
+        'r_max': l1 + l2,
+    }
+
+def _split_points(x_abs, y_abs, z_abs):
+    """Accept either an (N, 3) array of targets or three (N,) coordinate arrays."""
+    if y_abs is None:
+        points = np.asarray(x_abs, dtype=float)
+        return points[..., 0], points[..., 1], points[..., 2]
+    return x_abs, y_abs, z_abs
+
+def _planar_terms(x_abs, y_abs, z_abs, l3, mu, consts):
+    """
+    Shared vectorized core of the inverse kinematics.
+
+    Returns theta, the triangle angles a and b, atan2(z, x) of the wrist
+    point and the reachability mask. The arccos arguments are clipped so that
+    a and b are always finite; unreachable targets must be filtered with the mask.
+    """
+    theta = np.where(x_abs != 0, np.arctan2(y_abs, x_abs), np.where(y_abs > 0, 1, -1) * np.pi/2)
+    x = np.sqrt(x_abs**2 + y_abs**2) - l3*np.cos(mu)
+    z = z_abs - l3*np.sin(mu)
+    r_sq = x**2 + z**2
+    r = np.sqrt(r_sq)
+
+    reachable = (r > 0) & (r <= consts['r_max']) & (r >= consts['r_min'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        arg_a = (consts['l1_sq_minus_l2_sq'] + r_sq) / (consts['two_l1']*r)
+    arg_b = (consts['l1_sq_plus_l2_sq'] - r_sq) / consts['two_l1_l2']
+    a = np.arccos(np.clip(np.nan_to_num(arg_a), -1.0, 1.0))
+    b = np.arccos(np.clip(arg_b, -1.0, 1.0))
+    atn = np.arctan2(z, x)
+    return theta, a, b, atn, reachable
+
+def _solve(x_abs, y_abs, z_abs, l3, mu, consts):
+    theta, a, b, atn, reachable = _planar_terms(x_abs, y_abs, z_abs, l3, mu, consts)
+    alpha = np.pi - a - b - atn
+    angles = np.stack(np.broadcast_arrays(
+        theta, #theta
+        alpha, #alpha
+        np.pi/2 - a - atn, #beta
+        mu + alpha #gamma
+    ), axis=-1)
+    return angles, reachable
+
+def _solve_branches(x_abs, y_abs, z_abs, l3, mu, consts):
+    theta, a, b, atn, reachable = _planar_terms(x_abs, y_abs, z_abs, l3, mu, consts)
+    sign = np.array([1.0, -1.0])
+    a = a[..., None] * sign
+    b = b[..., None] * sign
+    atn = atn[..., None]
+    alpha = sign * np.pi - a - b - atn
+    angles = np.stack(np.broadcast_arrays(
+        theta[..., None], #theta
+        alpha, #alpha
+        np.pi/2 - a - atn, #beta
+        np.asarray(mu)[..., None] + alpha #gamma
+    ), axis=-1)
+    return angles, np.broadcast_to(reachable[..., None], alpha.shape)
+
+def inverse_kinematics_batch(x_abs, y_abs=None, z_abs=None, l1=250, l2=200, l3=0, mu=0):
+    """
+    Vectorized inverse kinematics.
+
+    Args:
+        x_abs: (N,) x coordinates, or an (N, 3) array of (x, y, z) targets
+        y_abs, z_abs: (N,) coordinates, omitted when x_abs is (N, 3)
+        l1, l2, l3, mu: scalars or arrays broadcast against the targets
+
+    Returns:
+        angles: (N, 4) array of (theta, alpha, beta, gamma) in radians
+        reachable: (N,) boolean mask, angles of unreachable targets are
+            those of the closest stretched/folded pose and must not be used
+    """
+    x_abs, y_abs, z_abs = _split_points(x_abs, y_abs, z_abs)
+    x_abs, y_abs, z_abs, l1, l2, l3, mu = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (x_abs, y_abs, z_abs, l1, l2, l3, mu)))
+    return _solve(x_abs, y_abs, z_abs, l3, mu, link_constants(l1, l2))
+
+def inverse_kinematics_branches(x_abs, y_abs=None, z_abs=None, l1=250, l2=200, l3=0, mu=0, limits=None):
+    """
+    Vectorized inverse kinematics returning both elbow configurations.
+
+    Branch 0 is the configuration returned by inverse_kinematics, branch 1 is
+    the mirrored elbow (the first link is rotated by -a instead of +a around
+    the wrist direction).
+
+    Args:
+        x_abs, y_abs, z_abs, l1, l2, l3, mu: as in inverse_kinematics_batch
+        limits: optional (4, 2) array of (min, max) joint limits in radians,
+            see joint_limits
+
+    Returns:
+        angles: (N, 2, 4) array of (theta, alpha, beta, gamma) per branch
+        valid: (N, 2) boolean mask, reachable and within limits
+    """
+    x_abs, y_abs, z_abs = _split_points(x_abs, y_abs, z_abs)
+    x_abs, y_abs, z_abs, l1, l2, l3, mu = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (x_abs, y_abs, z_abs, l1, l2, l3, mu)))
+
+    angles, valid = _solve_branches(x_abs, y_abs, z_abs, l3, mu, link_constants(l1, l2))
+    if limits is not None:
+        valid = valid & within_limits(angles, limits)
+    return angles, valid
+
+def inverse_kinematics_nearest(x_abs, y_abs=None, z_abs=None, current=None, l1=250, l2=200, l3=0, mu=0,
+                               limits=None, weights=None):
+    """
+    Vectorized inverse kinematics picking, for each target, the valid elbow
+    branch closest to the current joint state.
+
+    The distance is max_j(weights[j] * |target[j] - current[j]|), with theta
+    compared along the shortest path as the firmware does. Passing
+    weights = 1 / max_speed makes it the synchronized move time.
+
+    Args:
+        x_abs, y_abs, z_abs, l1, l2, l3, mu: as in inverse_kinematics_batch
+        current: (4,) or (N, 4) current joint angles in radians
+        limits: optional (4, 2) joint limits in radians, see joint_limits
+        weights: optional (4,) per-joint weights
+
+    Returns:
+        angles: (N, 4) chosen joint angles
+        valid: (N,) boolean mask, False when neither branch is valid
+        branch: (N,) index of the chosen branch (0 or 1)
+    """
+    angles, valid = inverse_kinematics_branches(x_abs, y_abs, z_abs, l1, l2, l3, mu, limits)
+    return select_nearest_branch(angles, valid, current, weights)
+
+def select_nearest_branch(angles, valid, current=None, weights=None):
+    """
+    Pick the valid branch closest to current from the output of
+    inverse_kinematics_branches, see inverse_kinematics_nearest.
+    """
+    if current is None:
+        current = np.zeros(4)
+    weights = np.ones(4) if weights is None else np.asarray(weights, dtype=float)
+
+    delta = angles - np.asarray(current, dtype=float)[..., None, :]
+    delta[..., 0] = (delta[..., 0] + np.pi) % (2*np.pi) - np.pi
+    cost = np.max(weights * np.abs(delta), axis=-1)
+    cost = np.where(valid, cost, np.inf)
+
+    branch = np.argmin(cost, axis=-1)
+    chosen = np.take_along_axis(angles, branch[..., None, None], axis=-2)[..., 0, :]
+    return chosen, valid.any(axis=-1), branch
+
+def joint_limits(params=None):
+    """
+    Joint limits from params.json as a (4, 2) array of (min, max) in radians.
+
+    Joints without <name>min/<name>max entries get (-inf, inf). gamma always
+    does: gammamin/gammamax is the servo range, not gamma in the IK
+    convention (mu + alpha), and checking it would reject most poses.
+    """
+    if params is None:
+        with open(Path(__file__).parent / "params.json", 'r') as f:
+            params = json.load(f)
+    limits = np.array([[-np.inf, np.inf]] * len(JOINT_NAMES))
+    for j, name in enumerate(JOINT_NAMES):
+        if name != "gamma" and f"{name}min" in params and f"{name}max" in params:
+            limits[j] = np.radians([params[f"{name}min"], params[f"{name}max"]])
+    return limits
+
+def within_limits(angles, limits):
+    """
+    Boolean mask of joint configurations inside the limits, checked on all
+    four joints. Angles are compared modulo 2*pi, so a 0-360 range accepts
+    any angle and -17..90 rejects 340.
+    """
+    limits = np.asarray(limits, dtype=float)
+    lower, upper = limits[:, 0], limits[:, 1]
+    bounded = np.isfinite(lower) & np.isfinite(upper)
+    span = np.where(bounded, upper - lower, np.inf)
+    offset = np.where(bounded, (angles - np.where(bounded, lower, 0)) % (2*np.pi), 0)
+    return np.all(offset <= span, axis=-1)
+
 def direct_kinematics(theta, alpha, beta, gamma, l1=250, l2=200, l3=0):
     q1 = np.pi/2 - beta
     q2 = -alpha
@@ -38,6 +237,122 @@ def direct_kinematics(theta, alpha, beta, gamma, l1=250, l2=200, l3=0):
     z = z_plane
     return np.array([x, y, z])
 
+def direct_kinematics_batch(angles, l1=250, l2=200, l3=0):
+    """
+    Vectorized direct kinematics.
+
+    Args:
+        angles: (N, 4) array of (theta, alpha, beta, gamma) in radians
+        l1, l2, l3: scalars or (N,) arrays
+
+    Returns:
+        (N, 3) array of (x, y, z) positions
+    """
+    angles = np.asarray(angles, dtype=float)
+    position = direct_kinematics(angles[..., 0], angles[..., 1], angles[..., 2], angles[..., 3], l1, l2, l3)
+    return np.moveaxis(position, 0, -1)
+
+def jacobian(angles, l1=250, l2=200, l3=0):
+    """
+    Analytic Jacobian of (x, y, z, mu) with respect to (theta, alpha, beta, gamma).
+
+    Args:
+        angles: (N, 4) array of (theta, alpha, beta, gamma) in radians
+        l1, l2, l3: scalars or (N,) arrays
+
+    Returns:
+        (N, 4, 4) array, J[k] @ q_dot gives (x_dot, y_dot, z_dot, mu_dot)
+    """
+    angles = np.asarray(angles, dtype=float)
+    theta, alpha, beta, gamma = (angles[..., k] for k in range(4))
+    q1 = np.pi/2 - beta
+    q2 = -alpha
+    q3 = gamma - alpha
+    s1, c1 = l1*np.sin(q1), l1*np.cos(q1)
+    s2, c2 = l2*np.sin(q2), l2*np.cos(q2)
+    s3, c3 = l3*np.sin(q3), l3*np.cos(q3)
+    x_plane = c1 + c2 + c3
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    zero = np.zeros_like(x_plane)
+
+    # Partial derivatives of the planar chain (x_plane, z_plane)
+    dx_da, dx_db, dx_dg = s2 + s3, s1, -s3 + zero
+    dz_da, dz_db, dz_dg = -c2 - c3, -c1, c3 + zero
+
+    J = np.stack([
+        np.stack([-x_plane*sin_t, dx_da*cos_t, dx_db*cos_t, dx_dg*cos_t], axis=-1), #x
+        np.stack([x_plane*cos_t, dx_da*sin_t, dx_db*sin_t, dx_dg*sin_t], axis=-1), #y
+        np.stack([zero, dz_da, dz_db, dz_dg], axis=-1), #z
+        np.stack([zero, zero - 1, zero, zero + 1], axis=-1) #mu = gamma - alpha
+    ], axis=-2)
+    return J
+
+def jacobian_determinant(angles, l1=250, l2=200, l3=0):
+    """
+    Closed-form determinant of the Jacobian: x_plane * l1 * l2 * sin(q1 - q2).
+    It vanishes when the wrist is on the base axis or the arm is fully stretched or folded.
+    """
+    angles = np.asarray(angles, dtype=float)
+    alpha, beta, gamma = angles[..., 1], angles[..., 2], angles[..., 3]
+    q1 = np.pi/2 - beta
+    q2 = -alpha
+    x_plane = l1*np.cos(q1) + l2*np.cos(q2) + l3*np.cos(gamma - alpha)
+    return -x_plane * l1 * l2 * np.sin(q1 - q2)
+
+def inverse_jacobian(angles, l1=250, l2=200, l3=0, tol=1e-6):
+    """
+    Batched inverse of the Jacobian.
+
+    Args:
+        angles: (N, 4) array of (theta, alpha, beta, gamma) in radians
+        l1, l2, l3: scalars or (N,) arrays
+        tol: relative determinant below which a pose is treated as singular
+
+    Returns:
+        J_inv: (N, 4, 4) array, zero for singular poses
+        regular: (N,) boolean mask of non-singular poses
+    """
+    J = jacobian(angles, l1, l2, l3)
+    det = jacobian_determinant(angles, l1, l2, l3)
+    scale = np.abs(l1 * l2 * (np.abs(l1) + np.abs(l2) + np.abs(l3)))
+    regular = np.abs(det) > tol * scale
+    J_inv = np.zeros_like(J)
+    J_inv[regular] = np.linalg.inv(J[regular])
+    return J_inv, regular
+
+def cartesian_velocity(angles, joint_velocities, l1=250, l2=200, l3=0):
+    """
+    Map joint velocities (theta_dot, alpha_dot, beta_dot, gamma_dot) to
+    Cartesian velocities (x_dot, y_dot, z_dot, mu_dot), both (N, 4).
+    """
+    J = jacobian(angles, l1, l2, l3)
+    return np.einsum('...ij,...j->...i', J, np.asarray(joint_velocities, dtype=float))
+
+def joint_velocity(angles, cartesian_velocities, l1=250, l2=200, l3=0, tol=1e-6):
+    """
+    Map Cartesian velocities (x_dot, y_dot, z_dot, mu_dot) to joint velocities.
+
+    Returns:
+        joint_velocities: (N, 4) array, zero for singular poses
+        regular: (N,) boolean mask of non-singular poses
+    """
+    J_inv, regular = inverse_jacobian(angles, l1, l2, l3, tol)
+    return np.einsum('...ij,...j->...i', J_inv, np.asarray(cartesian_velocities, dtype=float)), regular
+
+def joint_speed_limits(angles, cartesian_speed, l1=250, l2=200, l3=0, tol=1e-6):
+    """
+    Worst-case joint speeds needed to move the tool at cartesian_speed (mm/s)
+    in any direction with a fixed orientation: |q_dot_j| <= speed * ||J_inv[j, :3]||.
+
+    Returns:
+        limits: (N, 4) array of joint speeds (rad/s), inf for singular poses
+        regular: (N,) boolean mask of non-singular poses
+    """
+    J_inv, regular = inverse_jacobian(angles, l1, l2, l3, tol)
+    limits = np.asarray(cartesian_speed, dtype=float)[..., None] * np.linalg.norm(J_inv[..., :3], axis=-1)
+    limits[~regular] = np.inf
+    return limits, regular
+
 #test
 if __name__ == "__main__":
     x_target = 200
@@ -49,4 +364,12 @@ if __name__ == "__main__":
     print("Inverse Kinematics Angles (radians):\n", *angles)
 
     position = direct_kinematics(*angles)
-    print("Direct Kinematics Position:\n", position)
\ No newline at end of file
+    print("Direct Kinematics Position:\n", position)
+
+    targets = np.array([[200, 100, 100], [0, 300, 50], [500, 0, 0]])
+    angles, reachable = inverse_kinematics_batch(targets, mu=mu)
+    print("Batch reachable:", reachable)
+    print("Batch round trip:\n", direct_kinematics_batch(angles[reachable]))
+
+    q_dot = np.array([0.1, 0.0, 0.2, 0.0])
+    print("Cartesian velocity:\n", cartesian_velocity(angles[reachable], q_dot))
@@ -0,0 +1,216 @@
+import os
+import sys
+import numpy as np
+
+from topp import parameterize_path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+
+def read_waypoints(file_path):
+    """
+    Read a program saved by the GUI (lines x<x>y<y>z<z>m<mu>g<gripper>).
+
+    Returns:
+        (N, 5) array of (x, y, z, mu, gripper), mu and gripper in degrees
+    """
+    waypoints = []
+    with open(file_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            y, z, m, g = (line.find(c) for c in "yzmg")
+            waypoints.append((float(line[1:y]), float(line[y + 1:z]), float(line[z + 1:m]),
+                              float(line[m + 1:g]), float(line[g + 1:])))
+    return np.array(waypoints).reshape(-1, 5)
+
+def stop_indices(gripper, hard_stops=()):
+    """
+    Waypoints where the arm has to come to rest: both ends, waypoints reached
+    with a new gripper value (it actuates on arrival) and user hard stops.
+    """
+    gripper = np.asarray(gripper)
+    stops = np.zeros(len(gripper), dtype=bool)
+    stops[[0, -1]] = True
+    stops[1:] |= gripper[1:] != gripper[:-1]
+    stops[list(hard_stops)] = True
+    return np.flatnonzero(stops)
+
+def blend_lengths(positions, tolerance, stops=()):
+    """
+    Distance d_k from each corner at which the rounding starts and ends.
+
+    A quadratic Bézier through P_k - d·u_in, P_k, P_k + d·u_out passes at
+    d·|u_out - u_in| / 4 from the corner, so d = 4·tolerance / |u_out - u_in|,
+    capped at half of the shorter adjacent segment so blends never overlap.
+    Ends and stops are not blended (d = 0).
+
+    Returns:
+        d: (N,) blend lengths, directions: (N - 1, 3) unit segment directions,
+        lengths: (N - 1,) segment lengths
+    """
+    delta = np.diff(positions, axis=0)
+    lengths = np.linalg.norm(delta, axis=1)
+    directions = delta / lengths[:, None]
+
+    d = np.zeros(len(positions))
+    turn = np.linalg.norm(directions[1:] - directions[:-1], axis=1)
+    with np.errstate(divide='ignore'):
+        d[1:-1] = np.where(turn > 1e-9, 4.0 * tolerance / turn, np.inf)
+    d[1:-1] = np.minimum(d[1:-1], 0.5 * np.minimum(lengths[:-1], lengths[1:]))
+    d[list(stops)] = 0.0
+    return d, directions, lengths
+
+def blended_points(waypoints, tolerance=1.0, stops=(), spacing=1.0):
+    """
+    Dense Cartesian points of the corner-rounded path through waypoints.
+
+    Args:
+        waypoints: (N, 4+) array of (x, y, z, mu, ...), consecutive positions distinct
+        tolerance: largest distance between a corner and the rounded path (mm)
+        stops: indices of waypoints the path must pass through exactly
+        spacing: approximate distance between output points (mm)
+
+    Returns:
+        points: (M, 3) positions, mu: (M,) tool angle in degrees, no two
+        consecutive points equal
+    """
+    positions = np.asarray(waypoints, dtype=float)[:, :3]
+    mus = np.asarray(waypoints, dtype=float)[:, 3]
+    d, directions, lengths = blend_lengths(positions, tolerance, stops)
+
+    points, mu = [], []
+    for i in range(len(positions) - 1):
+        # Straight part of segment i, mu going from mu_i to mu_(i+1); none
+        # left when the two blends take half of the segment each
+        start = positions[i] + d[i] * directions[i]
+        end = positions[i + 1] - d[i + 1] * directions[i]
+        straight = lengths[i] - d[i] - d[i + 1]
+        if straight > 1e-9:
+            n = max(int(np.ceil(straight / spacing)), 1)
+            s = np.linspace(0.0, 1.0, n, endpoint=False)[:, None]
+            points.append(start + s * (end - start))
+            mu.append(mus[i] + s[:, 0] * (mus[i + 1] - mus[i]))
+
+        # Rounded corner at waypoint i+1, mu held
+        if i + 2 < len(positions) and d[i + 1] > 0:
+            n = max(int(np.ceil(2.0 * d[i + 1] / spacing)), 2)
+            t = np.linspace(0.0, 1.0, n, endpoint=False)[:, None]
+            b = positions[i + 1] + d[i + 1] * directions[i + 1]
+            points.append((1 - t) ** 2 * end + 2 * t * (1 - t) * positions[i + 1] + t**2 * b)
+            mu.append(np.full(n, mus[i + 1]))
+    points.append(positions[-1:])
+    mu.append(mus[-1:])
+    points, mu = np.concatenate(points), np.concatenate(mu)
+
+    # The parameterization needs a strictly increasing path length
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = np.linalg.norm(np.diff(points, axis=0), axis=1) > 1e-9
+    return points[keep], mu[keep]
+
+def rotation_points(waypoint, mu_start, spacing=1.0):
+    """
+    Path of a tool reorientation in place: the waypoint position repeated,
+    mu going from mu_start to the waypoint's mu, one point per spacing degrees.
+
+    Returns:
+        points: (M, 3) positions, mu: (M,) tool angle in degrees
+    """
+    n = max(int(np.ceil(abs(waypoint[3] - mu_start) / spacing)) + 1, 5)
+    return np.repeat(np.asarray(waypoint[None, :3], dtype=float), n, axis=0), np.linspace(mu_start, waypoint[3], n)
+
+def plan_program(waypoints, max_speeds, max_accels, tolerance=1.0, hard_stops=(), arm=None, spacing=1.0):
+    """
+    Time a recorded program as blended sections between stops.
+
+    Corners are rounded within tolerance and crossed without stopping; the arm
+    only comes to rest at the ends, where the gripper changes, where the tool
+    turns in place and at hard stops. Each section is timed with
+    parameterize_path.
+
+    Args:
+        waypoints: sequence of (x, y, z, mu, gripper) as recorded by the GUI
+        max_speeds, max_accels: (3,) joint limits in deg/s and deg/s²
+        tolerance: corner rounding tolerance (mm)
+        hard_stops: indices of waypoints where the arm must stop
+        arm: ArmModel, loaded from the GUI files by default
+        spacing: distance between path points handed to the parameterization
+            (mm, degrees for rotations in place)
+
+    Returns:
+        list of sections, dicts with "plan" (parameterize_path output),
+        "start"/"end" waypoint indices and the "gripper" value to apply at the end
+    """
+    arm = ArmModel.load() if arm is None else arm
+    waypoints = np.asarray(waypoints, dtype=float)
+
+    # Waypoints that only change the gripper share the previous position and
+    # mu; those that only change mu are rotations in place and end a section
+    moves = np.ones(len(waypoints), dtype=bool)
+    moves[1:] = np.linalg.norm(np.diff(waypoints[:, :3], axis=0), axis=1) > 1e-9
+    turns = np.zeros(len(waypoints), dtype=bool)
+    turns[1:] = ~moves[1:] & (np.diff(waypoints[:, 3]) != 0)
+    stops = np.union1d(stop_indices(waypoints[:, 4], hard_stops), np.flatnonzero(turns))
+
+    sections = []
+    for start, end in zip(stops[:-1], stops[1:]):
+        index = np.arange(start, end + 1)
+        index = index[moves[index] | (index == start)]
+        if len(index) >= 2:
+            points, mu = blended_points(waypoints[index], tolerance, spacing=spacing)
+        elif turns[end]:
+            points, mu = rotation_points(waypoints[end], waypoints[end - 1, 3], spacing)
+        else:
+            # Gripper change right after a stop: applied at the end of the previous section
+            if sections and waypoints[end, 4] != sections[-1]["gripper"]:
+                sections[-1].update(end=int(end), gripper=waypoints[end, 4])
+            continue
+        sections.append({
+            "plan": parameterize_path(points, max_speeds, max_accels, arm, np.radians(mu)),
+            "start": int(start),
+            "end": int(end),
+            "gripper": waypoints[end, 4],
+        })
+    return sections
+
+if __name__ == "__main__":
+    # Initialisation (firmware limits, config.cpp)
+
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+    tolerance = 5.0                                    # mm
+
+    # Pick and place cycle: approach, pick, lift, via points, place, retreat
+    waypoints = [
+        (250.0, 0.0, 150.0, 0, 90),
+        (300.0, 50.0, 120.0, 0, 90),
+        (300.0, 100.0, 50.0, 0, 90),
+        (300.0, 100.0, 20.0, 0, 0),     # close gripper
+        (300.0, 100.0, 80.0, 0, 0),
+        (250.0, 0.0, 150.0, 0, 0),
+        (200.0, -100.0, 120.0, 0, 0),
+        (150.0, -200.0, 60.0, 0, 0),
+        (150.0, -200.0, 30.0, 0, 90),   # open gripper
+        (150.0, -200.0, 30.0, -30, 90), # turn the tool in place
+        (200.0, -150.0, 100.0, 0, 90),
+        (250.0, 0.0, 150.0, 0, 90),
+    ]
+
+    blended = plan_program(waypoints, joints_max_speeds, joints_max_accel, tolerance)
+    stop_and_go = plan_program(waypoints, joints_max_speeds, joints_max_accel, tolerance,
+                               hard_stops=range(len(waypoints)))
+    for name, sections in (("stop and go", stop_and_go), ("blended", blended)):
+        total = sum(section["plan"]["total_time"] for section in sections)
+        print(f"{name}: {len(sections)} sections, cycle time {total:.2f} s")
+
+    # Short segment whose two corner blends meet in the middle
+    waypoints = [
+        (250.0, 0.0, 150.0, 0, 90),
+        (300.0, 0.0, 150.0, 0, 90),
+        (300.0, 0.0, 170.0, 0, 90),
+        (300.0, 100.0, 170.0, 0, 90),
+        (300.0, 100.0, 50.0, 0, 0),
+    ]
+    sections = plan_program(waypoints, joints_max_speeds, joints_max_accel, tolerance)
+    print(f"meeting blends: {len(sections)} section, {sections[0]['plan']['total_time']:.2f} s")
@@ -0,0 +1,177 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+
+# Cartesian paths are functions of u in [0, 1] returning (N, 3) points
+
+def line_path(start, goal):
+    """Straight line from start to goal."""
+    start = np.asarray(start, dtype=float)
+    goal = np.asarray(goal, dtype=float)
+    return lambda u: start + np.asarray(u, dtype=float)[..., None] * (goal - start)
+
+def arc_path(center, radius, phi0, phi1, u_axis=(1.0, 0.0, 0.0), v_axis=(0.0, 0.0, 1.0)):
+    """
+    Arc center + radius·(cos φ·u_axis + sin φ·v_axis) for φ from phi0 to phi1 (rad).
+    The default axes give the x-z plane used by circle_cartesian in the firmware.
+    """
+    center = np.asarray(center, dtype=float)
+    u_axis = np.asarray(u_axis, dtype=float)
+    v_axis = np.asarray(v_axis, dtype=float)
+
+    def path(u):
+        phi = phi0 + np.asarray(u, dtype=float)[..., None] * (phi1 - phi0)
+        return center + radius * (np.cos(phi) * u_axis + np.sin(phi) * v_axis)
+    return path
+
+def spline_path(control_points):
+    """
+    Uniform Catmull-Rom spline through control_points (K, 3),
+    with u spread evenly over the K - 1 spans.
+    """
+    P = np.asarray(control_points, dtype=float)
+    P = np.concatenate([2 * P[:1] - P[1:2], P, 2 * P[-1:] - P[-2:-1]])  # mirrored end tangents
+    n_spans = len(P) - 3
+
+    def path(u):
+        u = np.asarray(u, dtype=float)
+        k = np.clip(np.floor(u * n_spans).astype(int), 0, n_spans - 1)
+        t = (u * n_spans - k)[..., None]
+        p0, p1, p2, p3 = P[k], P[k + 1], P[k + 2], P[k + 3]
+        return 0.5 * (2 * p1 + (p2 - p0) * t + (2 * p0 - 5 * p1 + 4 * p2 - p3) * t**2
+                      + (3 * p1 - p0 - 3 * p2 + p3) * t**3)
+    return path
+
+def interpolate_joints(q0, q1, tau):
+    """Linear joint interpolation, theta along the shortest way round like the firmware."""
+    delta = q1 - q0
+    delta[..., 0] = (delta[..., 0] + np.pi) % (2 * np.pi) - np.pi
+    return q0 + tau * delta
+
+def _group_ranges(counts):
+    """Concatenation of arange(c) for c in counts."""
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+def discretize_path(path, tolerance=0.1, arm=None, mu=0.0, n_initial=8, max_depth=16,
+                    test_fractions=(0.25, 0.5, 0.75)):
+    """
+    Place joint-space waypoints along a Cartesian path so that moving linearly
+    in joint space between them stays within tolerance of the true path.
+
+    Intervals are refined level by level, all at once: for each interval the
+    joint-interpolated pose at test_fractions is compared, through batched FK,
+    with the path point at the same parameter, and failing intervals are cut
+    in as many parts as the quadratic decay of the error calls for. The error
+    is only measured at test_fractions, so it estimates the deviation from the
+    path and can miss a larger one between the samples.
+
+    Args:
+        path: function of u in [0, 1] returning (N, 3) points (line_path, arc_path, spline_path)
+        tolerance: allowed deviation (mm)
+        arm: ArmModel, loaded from the GUI files by default
+        mu: tool angle (rad)
+        n_initial: number of intervals to start from
+        max_depth: maximum number of refinement levels
+        test_fractions: positions inside each interval, as fractions of it,
+            where the deviation is measured
+
+    Returns:
+        u: (M,) path parameters of the waypoints
+        points: (M, 3) Cartesian waypoints
+        angles: (M, 4) joint angles in radians, theta unwrapped
+    """
+    arm = ArmModel.load() if arm is None else arm
+    fractions = np.asarray(test_fractions, dtype=float)[:, None, None]
+
+    def solve(u):
+        points = path(u)
+        angles, reachable = arm.inverse_kinematics(points, mu=mu)
+        if not reachable.all():
+            raise ValueError(f"path out of reach at u = {u[~reachable][0]:.4f}")
+        return points, angles
+
+    u = np.linspace(0.0, 1.0, n_initial + 1)
+    points, angles = solve(u)
+    pending = np.ones(n_initial, dtype=bool)   # intervals (k, k+1) still to check
+
+    for _ in range(max_depth + 1):
+        k = np.flatnonzero(pending)
+        if k.size == 0:
+            break
+        u_test = u[k] + fractions[..., 0, 0, None] * (u[k + 1] - u[k])          # (F, n)
+        q_test = interpolate_joints(angles[k], angles[k + 1], fractions)     # (F, n, 4)
+        chord = arm.direct_kinematics(q_test.reshape(-1, 4)).reshape(q_test.shape[:2] + (3,))
+        error = np.linalg.norm(chord - path(u_test), axis=-1).max(axis=0)
+        failing = error > tolerance
+        split = k[failing]
+        if split.size == 0:
+            break
+
+        # The deviation shrinks with the square of the interval length:
+        # cut each failing interval in ceil(sqrt(error / tolerance)) equal parts
+        parts = np.maximum(np.ceil(np.sqrt(error[failing] / tolerance)), 2).astype(int)
+        owner = np.repeat(np.arange(split.size), parts - 1)
+        step = _group_ranges(parts - 1) + 1
+        u_new = u[split[owner]] + step / parts[owner] * (u[split[owner] + 1] - u[split[owner]])
+        new_points, new_angles = solve(u_new)
+        at = split[owner] + 1
+        u = np.insert(u, at, u_new)
+        points = np.insert(points, at, new_points, axis=0)
+        angles = np.insert(angles, at, new_angles, axis=0)
+
+        # Only the new pieces need checking on the next level
+        first = split + np.concatenate(([0], np.cumsum(parts - 1)[:-1]))  # split intervals after insertion
+        pending = np.zeros(len(u) - 1, dtype=bool)
+        pending[np.repeat(first, parts) + _group_ranges(parts)] = True
+
+    angles[:, 0] = np.unwrap(angles[:, 0])
+    return u, points, angles
+
+def path_deviation(path, u, angles, arm, samples_per_interval=20):
+    """Largest distance, at matched parameters, between the joint-interpolated path and the true path (mm)."""
+    tau = np.linspace(0.0, 1.0, samples_per_interval + 1)[1:-1, None, None]
+    q = interpolate_joints(angles[:-1], angles[1:], tau)
+    u_test = u[:-1] + tau[..., 0, 0, None] * np.diff(u)
+    chord = arm.direct_kinematics(q.reshape(-1, 4)).reshape(q.shape[:2] + (3,))
+    return float(np.linalg.norm(chord - path(u_test), axis=-1).max())
+
+
+if __name__ == "__main__":
+    import time
+    from planner import plan_path
+
+    arm = ArmModel.load()
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+    tolerance = 0.1                                    # mm
+
+    paths = {
+        # Passes close to the base axis, where theta turns fast
+        "line": line_path([40.0, -200.0, 150.0], [40.0, 200.0, 150.0]),
+        "arc": arc_path([300.0, 0.0, 150.0], 60.0, 0.0, 2.0 * np.pi),
+        "spline": spline_path([[300.0, 0.0, 0.0], [250.0, 100.0, 100.0], [150.0, 200.0, 50.0], [0.0, 300.0, 150.0]]),
+    }
+
+    for name, path in paths.items():
+        t0 = time.perf_counter()
+        u, points, angles = discretize_path(path, tolerance, arm)
+        t_adaptive = time.perf_counter() - t0
+
+        # Smallest uniform sampling (within 10 %) that meets the same tolerance
+        n_uniform = 9
+        u_uniform = np.linspace(0.0, 1.0, n_uniform)
+        angles_uniform, _ = arm.inverse_kinematics(path(u_uniform))
+        angles_uniform[:, 0] = np.unwrap(angles_uniform[:, 0])
+        while path_deviation(path, u_uniform, angles_uniform, arm) > tolerance:
+            n_uniform = int(np.ceil(n_uniform * 1.1))
+            u_uniform = np.linspace(0.0, 1.0, n_uniform)
+            angles_uniform, _ = arm.inverse_kinematics(path(u_uniform))
+            angles_uniform[:, 0] = np.unwrap(angles_uniform[:, 0])
+
+        plan = plan_path(np.degrees(angles[:, :3]), joints_max_speeds, joints_max_accel)
+        print(f"{name}: {len(u)} adaptive waypoints in {t_adaptive * 1e3:.1f} ms "
+              f"(deviation {path_deviation(path, u, angles, arm):.3f} mm, move {plan['total_time']:.2f} s), "
+              f"uniform needs about {n_uniform}")
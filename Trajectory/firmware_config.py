@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class FirmwareConfig:
+    """
+    Constants of Arduino/RoboticArm/src/config.cpp, plus the step pulse width
+    of stepper.cpp and the baud rate of main.cpp; keep in sync.
+    """
+    resolution: tuple = (1600, 1600, 1600)       # steps/rev
+    max_speed: tuple = (50.0, 15.0, 15.0)        # deg/s
+    acceleration: tuple = (20.0, 10.0, 10.0)     # deg/s²
+    inv_dir: tuple = (True, False, False)
+    l1: float = 250.0
+    l2: float = 200.0
+    trajectory_check_interval: int = 250         # µs
+    serial_check_interval: int = 1000            # µs
+    feedback_interval: int = 50000               # µs
+    feedback_enabled: bool = True
+    time_feedback_enabled: bool = True
+    step_pulse: int = 4                          # µs, delayMicroseconds in movestep
+    baud_rate: int = 115200                      # Serial.begin in setup
+
+
+FIRMWARE = FirmwareConfig()
+THETA_PERIODS = np.array([360.0, 0.0, 0.0])   # theta takes the shortest way round (readSerial)
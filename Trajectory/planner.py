@@ -1,182 +1,223 @@
 import numpy as np
-import matplotlib.pyplot as plt
-
-# ---------- User params ----------
-n_joints = 3
-joints_names = ['theta', 'alpha', 'beta']
-joints_max_speeds = np.array([1.0, 0.5, 0.5])   # deg/s
-joints_max_accel  = np.array([0.2, 0.3, 0.5])   # deg/s^2
-
-trajectory, T_initial = (lambda t: [
-    t if t<10 else 20 - t,                       # theta
-    5*np.sin(2*np.pi/20.0 * t),   # alpha
-    -t**2/10.0 + 2.0*t            # beta
-], 20.0)
-
-dt_waypoints = 0.1
-t_waypoints = np.arange(0.0, T_initial + 1e-9, dt_waypoints)
-waypoints = np.array([trajectory(t) for t in t_waypoints])   # shape (N_nodes, 3)
-
-n_waypoints = len(waypoints)
-n_segs = n_waypoints - 1
-
-# ---------- Build path deltas and directions ----------
-dQ = waypoints[1:] - waypoints[:-1]          # (n_segs, n_joints)
-ds = np.linalg.norm(dQ, axis=1)              # scalar lengths
-u = np.zeros_like(dQ)
-nz = ds > 0
-u[nz] = dQ[nz] / ds[nz][:, None]
-
-# ---------- Detect direction change nodes ----------
-direction_change_nodes = []
-for k in range(1, n_waypoints-1):
-    # global direction inversion (full vector) - optional
-    if ds[k-1] > 0 and ds[k] > 0:
-        if np.dot(u[k-1], u[k]) < 0:
-            direction_change_nodes.append(k)
-
-# ---------- Per-joint sign flips detection (NEW) ----------
-# If any component j flips sign between u[k-1,j] and u[k,j], add node k to zero_nodes
-per_joint_flip_nodes = set()
-for k in range(1, n_waypoints-1):
+from segments import PiecewisePolynomial
+from firmware_config import FIRMWARE
+
+FIRMWARE_CHECK_INTERVAL = FIRMWARE.trajectory_check_interval * 1e-6  # trajectory_check_interval in the firmware (s)
+
+def path_geometry(waypoints):
+    """
+    Segment deltas, lengths and unit directions of a joint-space polyline.
+
+    Returns:
+        dQ: (n_segs, n_joints) deltas
+        ds: (n_segs,) segment lengths
+        u: (n_segs, n_joints) unit directions (zero for empty segments)
+    """
+    waypoints = np.asarray(waypoints, dtype=float)
+    dQ = waypoints[1:] - waypoints[:-1]          # (n_segs, n_joints)
+    ds = np.linalg.norm(dQ, axis=1)              # scalar lengths
+    u = np.zeros_like(dQ)
+    nz = ds > 0
+    u[nz] = dQ[nz] / ds[nz][:, None]
+    return dQ, ds, u
+
+def zero_velocity_nodes(ds, u, tol=1e-12):
+    """
+    Nodes where the path must stop: both endpoints, global direction
+    reversals and per-joint sign flips between adjacent segments.
+
+    Returns:
+        zero_nodes: (n_nodes,) boolean mask
+        reversal_nodes: (n_nodes,) boolean mask of global reversals only
+    """
+    n_nodes = len(ds) + 1
+    both = (ds[:-1] > 0) & (ds[1:] > 0)
+    reversal = both & (np.einsum('ij,ij->i', u[:-1], u[1:]) < 0)
+    a, b = u[:-1], u[1:]
+    flip = both & np.any((np.abs(a) > tol) & (np.abs(b) > tol) & (a * b < 0), axis=1)
+
+    zero_nodes = np.zeros(n_nodes, dtype=bool)
+    zero_nodes[[0, -1]] = True
+    zero_nodes[1:-1] = reversal | flip
+    reversal_nodes = np.zeros(n_nodes, dtype=bool)
+    reversal_nodes[1:-1] = reversal
+    return zero_nodes, reversal_nodes
+
+def segment_limits(u, max_speeds, max_accels, tol=1e-12):
+    """
+    Convert joint limits to path-speed and path-acceleration limits per segment:
+    the tightest max_j / |u_j| over the joints that move.
+
+    Returns:
+        s_dot_max_seg, s_ddot_max_seg: (n_segs,) arrays, inf for empty segments
+    """
+    au = np.abs(u)
+    moving = au > tol
+    with np.errstate(divide='ignore'):
+        s_dot_max_seg = np.where(moving, np.asarray(max_speeds) / au, np.inf).min(axis=1)
+        s_ddot_max_seg = np.where(moving, np.asarray(max_accels) / au, np.inf).min(axis=1)
+    return s_dot_max_seg, s_ddot_max_seg
+
+def node_speed_caps(s_dot_max_seg, zero_nodes):
+    """Per-node speed cap: the lower limit of the adjacent segments, 0 on zero nodes."""
+    caps = np.minimum(np.append(s_dot_max_seg, np.inf), np.insert(s_dot_max_seg, 0, np.inf))
+    return np.where(zero_nodes, 0.0, caps)
+
+def propagate_speed_limits(ds, caps, s_ddot_max_seg):
+    """
+    Largest node speeds under the caps that every segment can connect with
+    its acceleration limit, in one forward and one backward pass.
+
+    With w = v², a pass is the recurrence w[k+1] = min(cap[k+1], w[k] + c[k]),
+    c[k] = 2·a[k]·ds[k], which unrolls to
+    w[k] = S[k] + min_{j<=k}(cap[j] - S[j]) with S the cumulative sum of c,
+    so each pass is a cumsum and a running minimum.
+    """
+    c = 2.0 * np.where(ds > 0, s_ddot_max_seg, 0.0) * ds
+    w = np.asarray(caps, dtype=float) ** 2
+
+    S = np.concatenate(([0.0], np.cumsum(c)))
+    w = S + np.minimum.accumulate(w - S)                      # forward
+    S = np.concatenate(([0.0], np.cumsum(c[::-1])))
+    w = (S + np.minimum.accumulate(w[::-1] - S))[::-1]        # backward
+    return np.sqrt(np.maximum(w, 0.0))
+
+def segment_times(ds, v_nodes, s_ddot_max_seg, s_dot_max_seg):
+    """
+    Duration of each segment. With constant path acceleration a segment lasts
+    2·ds / (v0 + v1). Segments that start and end at rest use a cubic
+    rest-to-rest profile instead, which respects both limits.
+    """
+    denom = v_nodes[:-1] + v_nodes[1:]
+    rest = (denom <= 1e-12) & (ds > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        times = np.where(denom > 1e-12, 2.0 * ds / denom, 0.0)
+        rest_times = np.maximum(np.sqrt(6.0 * ds / s_ddot_max_seg), 1.5 * ds / s_dot_max_seg)
+    return np.where(rest, rest_times, times), rest
+
+def plan_path(waypoints, max_speeds, max_accels):
+    """
+    Time-parameterize a joint-space polyline under per-joint speed and
+    acceleration limits, stopping at reversals and joint sign flips.
+
+    Args:
+        waypoints: (n_nodes, n_joints) joint positions
+        max_speeds, max_accels: (n_joints,) joint limits
+
+    Returns:
+        dict with the trajectory as a PiecewisePolynomial ("profile") and the
+        intermediate arrays: ds, u, v_nodes, zero_nodes, reversal_nodes,
+        seg_times, node_times, total_time
+    """
+    waypoints = np.asarray(waypoints, dtype=float)
+    dQ, ds, u = path_geometry(waypoints)
+    zero_nodes, reversal_nodes = zero_velocity_nodes(ds, u)
+    s_dot_max_seg, s_ddot_max_seg = segment_limits(u, max_speeds, max_accels)
+    caps = node_speed_caps(s_dot_max_seg, zero_nodes)
+    v_nodes = propagate_speed_limits(ds, caps, s_ddot_max_seg)
+    seg_times, rest = segment_times(ds, v_nodes, s_ddot_max_seg, s_dot_max_seg)
+    node_times = np.concatenate(([0.0], np.cumsum(seg_times)))
+
+    # s(t) per segment: v0·t + a/2·t², or ds·(3τ² - 2τ³) for rest-to-rest segments
+    v0, v1 = v_nodes[:-1], v_nodes[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a_s = np.where(seg_times > 1e-12, (v1 - v0) / seg_times, 0.0)
+        T = np.where(rest, seg_times, 1.0)
+        s_coeffs = np.stack([
+            np.zeros_like(ds),
+            np.where(rest, 0.0, v0),
+            np.where(rest, 3.0 * ds / T**2, 0.5 * a_s),
+            np.where(rest, -2.0 * ds / T**3, 0.0),
+        ], axis=-1)                                               # (n_segs, 4)
+    coefficients = u.T[:, :, None] * s_coeffs[None]               # (n_joints, n_segs, 4)
+    coefficients[:, :, 0] = waypoints[:-1].T
+
+    n_joints = waypoints.shape[1]
+    profile = PiecewisePolynomial(np.broadcast_to(node_times, (n_joints, len(node_times))), coefficients)
+    return {
+        "profile": profile,
+        "ds": ds,
+        "u": u,
+        "v_nodes": v_nodes,
+        "zero_nodes": zero_nodes,
+        "reversal_nodes": reversal_nodes,
+        "seg_times": seg_times,
+        "node_times": node_times,
+        "total_time": float(node_times[-1]),
+    }
+
+def sample_trajectory(plan, dt=1e-3, chunk_size=None):
+    """
+    Dense q(t) and q_dot(t) of a planned path at a fixed sample rate.
+
+    All sample times are resolved to their segment with a single searchsorted
+    and evaluated with array operations.
+
+    Args:
+        plan: output of plan_path
+        dt: sample period (s), e.g. FIRMWARE_CHECK_INTERVAL
+        chunk_size: None to return full arrays, otherwise a generator of
+            (t, q, q_dot) chunks of at most chunk_size samples
+
+    Returns:
+        t_dense: (n,) times, q_dense and qdot_dense: (n, n_joints) arrays
+    """
+    profile = plan["profile"]
+    if chunk_size is None:
+        return profile.sample(dt)
+    return profile.sample_chunks(dt, chunk_size)
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # ---------- User params ----------
+    n_joints = 3
+    joints_names = ['theta', 'alpha', 'beta']
+    joints_max_speeds = np.array([1.0, 0.5, 0.5])   # deg/s
+    joints_max_accel  = np.array([0.2, 0.3, 0.5])   # deg/s^2
+
+    trajectory, T_initial = (lambda t: [
+        t if t<10 else 20 - t,                       # theta
+        5*np.sin(2*np.pi/20.0 * t),   # alpha
+        -t**2/10.0 + 2.0*t            # beta
+    ], 20.0)
+
+    dt_waypoints = 0.1
+    t_waypoints = np.arange(0.0, T_initial + 1e-9, dt_waypoints)
+    waypoints = np.array([trajectory(t) for t in t_waypoints])   # shape (N_nodes, 3)
+
+    plan = plan_path(waypoints, joints_max_speeds, joints_max_accel)
+    node_times = plan["node_times"]
+    total_time = plan["total_time"]
+
+    # ---------- reconstruct q(t) ----------
+    dt_sample = 1e-3
+    t_dense, q_dense, qdot_dense = sample_trajectory(plan, dt_sample)
+
+    # ---------- diagnostics & plots ----------
+    zero_nodes = plan["zero_nodes"]
+    reversal_nodes = plan["reversal_nodes"]
+    print("per-joint sign-flip nodes:", list(np.flatnonzero(zero_nodes & ~reversal_nodes)[1:-1]))
+    print("global reversal nodes:", list(np.flatnonzero(reversal_nodes)))
+    print("zero_nodes enforced:", list(np.flatnonzero(zero_nodes)))
+    print("total_time:", total_time)
+
+    fig, axes = plt.subplots(n_joints, 3, figsize=(15,10))
     for j in range(n_joints):
-        # only check when adjacent segments have length and component not near zero
-        if ds[k-1] > 0 and ds[k] > 0:
-            a = u[k-1, j]
-            b = u[k, j]
-            if abs(a) > 1e-12 and abs(b) > 1e-12 and (a * b < 0):
-                per_joint_flip_nodes.add(k)
-# Merge
-direction_change_nodes = sorted(set(direction_change_nodes).union(per_joint_flip_nodes))
-
-# zero nodes: endpoints + any per-joint sign-flip or global reversal nodes
-zero_nodes = set([0, n_waypoints-1] + direction_change_nodes)
-
-# ---------- Convert joint limits to path limits ----------
-INF_LARGE = 1e12
-s_dot_max_seg = np.full(n_segs, INF_LARGE)
-s_ddot_max_seg = np.full(n_segs, INF_LARGE)
-for i in range(n_segs):
-    per_v = []
-    per_a = []
-    for j in range(n_joints):
-        uj = abs(u[i, j])
-        if uj > 1e-12:
-            per_v.append(joints_max_speeds[j] / uj)
-            per_a.append(joints_max_accel[j] / uj)
-    if per_v:
-        s_dot_max_seg[i] = min(per_v)
-    if per_a:
-        s_ddot_max_seg[i] = min(per_a)
-s_dot_max_seg = np.minimum(s_dot_max_seg, INF_LARGE)
-s_ddot_max_seg = np.minimum(s_ddot_max_seg, INF_LARGE)
-
-# ---------- initialize node speeds ----------
-v_nodes = np.full(n_waypoints, np.inf)
-v_nodes[0] = 0.0
-v_nodes[-1] = 0.0
-for i in range(1, n_waypoints-1):
-    caps = []
-    if i-1 >= 0: caps.append(s_dot_max_seg[i-1])
-    if i < n_segs: caps.append(s_dot_max_seg[i])
-    v_nodes[i] = min(caps) if caps else 0.0
-for z in zero_nodes: v_nodes[z] = 0.0
-
-# ---------- forward/backward with node zeros enforced ----------
-def enforce_s_limits(ds, v_nodes, s_ddot_max_seg, s_dot_max_seg, zero_nodes, iters=200, tol=1e-9):
-    v = v_nodes.copy().astype(float)
-    for _ in range(iters):
-        prev = v.copy()
-        # cap by local segment s_dot
-        for i in range(1, len(v)-1):
-            caps = []
-            if i-1 >= 0: caps.append(s_dot_max_seg[i-1])
-            if i < len(s_dot_max_seg): caps.append(s_dot_max_seg[i])
-            if caps:
-                v[i] = min(v[i], min(caps))
-        for z in zero_nodes: v[z] = 0.0
-        # forward
-        for i in range(0, len(ds)):
-            if ds[i] <= 0: continue
-            amax = s_ddot_max_seg[i]
-            lim = np.sqrt(max(0.0, v[i]**2 + 2.0 * amax * ds[i]))
-            lim = min(lim, s_dot_max_seg[i])
-            if (i+1) not in zero_nodes:
-                v[i+1] = min(v[i+1], lim)
-        # backward
-        for i in range(len(ds)-1, -1, -1):
-            if ds[i] <= 0: continue
-            amax = s_ddot_max_seg[i]
-            lim = np.sqrt(max(0.0, v[i+1]**2 + 2.0 * amax * ds[i]))
-            lim = min(lim, s_dot_max_seg[i])
-            if i not in zero_nodes:
-                v[i] = min(v[i], lim)
-        for z in zero_nodes: v[z] = 0.0
-        if np.max(np.abs(v - prev)) < tol:
-            break
-    return v
-
-v_nodes = enforce_s_limits(ds, v_nodes, s_ddot_max_seg, s_dot_max_seg, zero_nodes, iters=500)
-
-# ---------- compute seg times ----------
-seg_times = np.zeros(n_segs)
-for i in range(n_segs):
-    if ds[i] <= 0:
-        seg_times[i] = 0.0
-        continue
-    denom = v_nodes[i] + v_nodes[i+1]
-    if denom > 1e-12:
-        seg_times[i] = 2.0 * ds[i] / denom
-    else:
-        a = s_ddot_max_seg[i]
-        seg_times[i] = 0.0 if a < 1e-12 else 2.0 * np.sqrt(ds[i] / a)
-
-total_time = np.sum(seg_times)
-node_times = np.concatenate(([0.0], np.cumsum(seg_times)))
-
-# ---------- reconstruct q(t) ----------
-dt_sample = 1e-3
-t_dense = np.arange(0.0, total_time + dt_sample/2.0, dt_sample) if total_time>0 else np.array([0.0])
-q_dense = np.zeros((len(t_dense), n_joints))
-qdot_dense = np.zeros_like(q_dense)
-
-for k,t in enumerate(t_dense):
-    seg = np.searchsorted(node_times, t, side='right') - 1
-    seg = max(0, min(seg, n_segs-1))
-    t_local = t - node_times[seg]
-    Ti = seg_times[seg]
-    v0 = v_nodes[seg]; v1 = v_nodes[seg+1]
-    a_s = 0.0 if Ti<=1e-12 else (v1-v0)/Ti
-    s_local = v0 * t_local + 0.5 * a_s * t_local**2
-    sdot_local = v0 + a_s * t_local
-    q_dense[k] = waypoints[seg] + u[seg] * s_local
-    qdot_dense[k] = u[seg] * sdot_local
-
-if t_dense.size>0:
-    q_dense[-1] = waypoints[-1]
-    qdot_dense[-1] = np.zeros(n_joints)
-
-# ---------- diagnostics & plots ----------
-print("per-joint sign-flip nodes:", sorted(list(per_joint_flip_nodes)))
-print("global reversal nodes:", direction_change_nodes)
-print("zero_nodes enforced:", sorted(list(zero_nodes)))
-print("total_time:", total_time)
-
-fig, axes = plt.subplots(n_joints, 3, figsize=(15,10))
-for j in range(n_joints):
-    # theoretical
-    axes[j,0].plot(np.linspace(0,T_initial,501), [trajectory(tt)[j] for tt in np.linspace(0,T_initial,501)])
-    axes[j,0].scatter(np.arange(0, T_initial+1e-9, dt_waypoints), [trajectory(tt)[j] for tt in np.arange(0, T_initial+1e-9, dt_waypoints)], color='r')
-    axes[j,0].set_title(f"{joints_names[j]} theoretical")
-    # generated position
-    axes[j,1].plot(t_dense, q_dense[:,j])
-    axes[j,1].scatter(node_times, waypoints[:,j], color='red', s=30)
-    axes[j,1].set_title(f"{joints_names[j]} generated pos")
-    # generated signed speed
-    axes[j,2].plot(t_dense, qdot_dense[:,j])
-    axes[j,2].axhline(joints_max_speeds[j], color='r', linestyle='--')
-    axes[j,2].axhline(-joints_max_speeds[j], color='r', linestyle='--')
-    axes[j,2].set_title(f"{joints_names[j]} signed speed")
-for ax in axes.flatten(): ax.grid(True)
-plt.tight_layout()
-plt.show()
+        # theoretical
+        axes[j,0].plot(np.linspace(0,T_initial,501), [trajectory(tt)[j] for tt in np.linspace(0,T_initial,501)])
+        axes[j,0].scatter(np.arange(0, T_initial+1e-9, dt_waypoints), [trajectory(tt)[j] for tt in np.arange(0, T_initial+1e-9, dt_waypoints)], color='r')
+        axes[j,0].set_title(f"{joints_names[j]} theoretical")
+        # generated position
+        axes[j,1].plot(t_dense, q_dense[:,j])
+        axes[j,1].scatter(node_times, waypoints[:,j], color='red', s=30)
+        axes[j,1].set_title(f"{joints_names[j]} generated pos")
+        # generated signed speed
+        axes[j,2].plot(t_dense, qdot_dense[:,j])
+        axes[j,2].axhline(joints_max_speeds[j], color='r', linestyle='--')
+        axes[j,2].axhline(-joints_max_speeds[j], color='r', linestyle='--')
+        axes[j,2].set_title(f"{joints_names[j]} signed speed")
+    for ax in axes.flatten(): ax.grid(True)
+    plt.tight_layout()
+    plt.show()
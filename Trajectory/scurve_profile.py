@@ -0,0 +1,217 @@
+import numpy as np
+from segments import PiecewisePolynomial
+
+# Jerk sign of the 7 phases: jerk up, constant acceleration, jerk down, cruise,
+# jerk down, constant deceleration, jerk up
+PHASE_JERKS = np.array([1.0, 0.0, -1.0, 0.0, -1.0, 0.0, 1.0])
+
+def minimum_scurve_times(distances, max_speeds, max_accels, max_jerks):
+    """
+    Closed-form minimal time jerk-limited rest-to-rest move, per joint.
+
+    The profile is symmetric: an acceleration part of length Ta made of two
+    jerk phases of length Tj around a constant acceleration phase, a cruise
+    of length Tv, then the mirrored deceleration part.
+
+    Args:
+        distances: (n_joints,) absolute joint distances
+        max_speeds, max_accels, max_jerks: (n_joints,) joint limits
+        Leading dimensions broadcast.
+
+    Returns:
+        T: (n_joints,) minimal durations (2·Ta + Tv)
+        Tj, Ta, Tv: (n_joints,) phase durations
+    """
+    d = np.abs(np.asarray(distances, dtype=float))
+    v = np.asarray(max_speeds, dtype=float)
+    a = np.asarray(max_accels, dtype=float)
+    j = np.asarray(max_jerks, dtype=float)
+    d, v, a, j = np.broadcast_arrays(d, v, a, j)
+
+    # Reaching vmax: acceleration saturates only if a²/j < v
+    a_reached = a**2 / j < v
+    Tj = np.where(a_reached, a / j, np.sqrt(v / j))
+    Ta = np.where(a_reached, Tj + v / a, 2.0 * Tj)
+    Tv = d / v - Ta
+
+    # Too short to cruise: amax reached if d ≥ 2·a³/j², otherwise pure jerk phases
+    short = Tv < 0
+    Tj_a = a / j
+    Ta_a = (Tj_a + np.sqrt(Tj_a**2 + 4.0 * d / a)) / 2.0
+    Tj_j = np.cbrt(d / (2.0 * j))
+    use_a = d >= 2.0 * a**3 / j**2
+    Tj = np.where(short, np.where(use_a, Tj_a, Tj_j), Tj)
+    Ta = np.where(short, np.where(use_a, Ta_a, 2.0 * Tj_j), Ta)
+    Tv = np.maximum(Tv, 0.0)
+    return 2.0 * Ta + Tv, Tj, Ta, Tv
+
+def synchronized_scurve_times(distances, max_speeds, max_accels, max_jerks):
+    """
+    Synchronized jerk-limited timing.
+
+    Every joint gets the duration T of the slowest one. The faster joints
+    keep the shape of their own minimal profile stretched in time by T/T_i,
+    which divides speed, acceleration and jerk by 1, 2 and 3 powers of the
+    stretch, so the limits always hold.
+
+    Args:
+        distances: (n_joints,) joint distances
+        max_speeds, max_accels, max_jerks: (n_joints,) joint limits
+        Leading dimensions broadcast, like synchronized_times.
+
+    Returns:
+        T: synchronized duration (s)
+        Tj, Ta, Tv: (n_joints,) phase durations after stretching
+        jerk: (n_joints,) jerk magnitude used by each joint
+    """
+    d = np.abs(np.asarray(distances, dtype=float))
+    T_min, Tj, Ta, Tv = minimum_scurve_times(d, max_speeds, max_accels, max_jerks)
+    T = np.max(T_min, axis=-1, keepdims=True)
+
+    moving = T_min > 0
+    stretch = np.where(moving, T / np.where(moving, T_min, 1.0), 1.0)
+    Tj, Ta = Tj * stretch, Ta * stretch
+    Tv = np.where(moving, Tv * stretch, T)  # joints at rest cruise at zero speed
+    # d = v_peak·(Ta + Tv) with v_peak = jerk·Tj·(Ta - Tj)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        jerk = np.where(moving, d / (Tj * (Ta - Tj) * (Ta + Tv)), 0.0)
+    return T[..., 0], Tj, Ta, Tv, jerk
+
+def scurve_profile(initial_point, final_point, max_speeds, max_accels, max_jerks):
+    """
+    Synchronized 7-phase jerk-limited point-to-point move as exact piecewise polynomials.
+
+    Args:
+        initial_point, final_point: (n_joints,) joint positions
+        max_speeds, max_accels, max_jerks: (n_joints,) joint limits
+
+    Returns:
+        PiecewisePolynomial with 7 cubic segments per joint
+    """
+    q0 = np.asarray(initial_point, dtype=float)
+    q1 = np.asarray(final_point, dtype=float)
+    T, Tj, Ta, Tv, jerk = synchronized_scurve_times(q1 - q0, max_speeds, max_accels, max_jerks)
+    direction = np.where(q1 >= q0, 1.0, -1.0)
+
+    durations = np.stack([Tj, Ta - 2.0 * Tj, Tj, Tv, Tj, Ta - 2.0 * Tj, Tj], axis=-1)
+    durations = np.maximum(durations, 0.0)
+    jerks = direction[:, None] * jerk[:, None] * PHASE_JERKS
+
+    # Integrate the state (q, v, a) phase by phase
+    n_joints = q0.shape[0]
+    coefficients = np.zeros((n_joints, 7, 4))
+    q, v, a = q0.copy(), np.zeros(n_joints), np.zeros(n_joints)
+    for k in range(7):
+        h, jk = durations[:, k], jerks[:, k]
+        coefficients[:, k] = np.stack([q, v, a / 2.0, jk / 6.0], axis=-1)
+        q = q + v * h + a * h**2 / 2.0 + jk * h**3 / 6.0
+        v = v + a * h + jk * h**2 / 2.0
+        a = a + jk * h
+
+    breaks = np.concatenate([np.zeros((n_joints, 1)), np.cumsum(durations, axis=-1)], axis=-1)
+    breaks[:, -1] = T  # absorb rounding so every joint ends together
+    return PiecewisePolynomial(breaks, coefficients)
+
+def residual_vibration(profile, frequency, damping=0.02, dt=1e-4):
+    """
+    Residual oscillation left by a move on a lightly damped mode of the arm.
+
+    The payload is modelled per joint as x'' + 2ζω x' + ω² x = -q''(t): the
+    deflection x is the Duhamel integral of the joint acceleration, evaluated
+    at the end of the move, and then decays freely.
+
+    Args:
+        profile: PiecewisePolynomial of the move
+        frequency: natural frequency of the mode (Hz), scalar or (n_joints,)
+        damping: damping ratio ζ
+        dt: integration step (s)
+
+    Returns:
+        (n_joints,) amplitude of the residual oscillation, in joint units
+    """
+    omega = 2.0 * np.pi * np.asarray(frequency, dtype=float)
+    omega_d = omega * np.sqrt(1.0 - damping**2)
+    T = profile.duration
+    t = np.linspace(0.0, T, max(int(np.ceil(T / dt)), 1) + 1)
+    accel = profile.acceleration(t)  # (n, n_joints)
+
+    tau = (T - t)[:, None]
+    decay = np.exp(-damping * omega * tau)
+    # Impulse response of x and of x' to a unit acceleration input
+    h = -decay * np.sin(omega_d * tau) / omega_d
+    h_dot = -decay * (np.cos(omega_d * tau) - damping * omega / omega_d * np.sin(omega_d * tau))
+    # Trapezoidal rule on the uniform grid
+    weights = np.full((t.size, 1), t[1] - t[0])
+    weights[[0, -1]] /= 2.0
+    x = np.sum(h * accel * weights, axis=0)
+    x_dot = np.sum(h_dot * accel * weights, axis=0)
+    return np.sqrt(x**2 + ((x_dot + damping * omega * x) / omega_d) ** 2)
+
+def settle_time(amplitude, frequency, damping=0.02, tolerance=0.05):
+    """
+    Time after the end of the move for a residual amplitude to decay below tolerance.
+
+    Args:
+        amplitude: residual amplitude from residual_vibration
+        frequency, damping: mode parameters, same as residual_vibration
+        tolerance: acceptable deflection, in joint units
+
+    Returns:
+        settle time (s), 0 where the amplitude is already within tolerance
+    """
+    omega = 2.0 * np.pi * np.asarray(frequency, dtype=float)
+    amplitude = np.asarray(amplitude, dtype=float)
+    with np.errstate(divide='ignore'):
+        return np.maximum(np.log(amplitude / tolerance) / (damping * omega), 0.0)
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    from trap_profile import trapezoid_profile
+
+    # Initialisation (firmware limits, config.cpp)
+
+    n_joints = 3
+    joints_names = ['theta', 'alpha', 'beta']
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+    joints_max_jerk   = np.array([80.0, 40.0, 40.0])   # deg/s^3
+
+    frequency, damping, tolerance = 3.0, 0.02, 0.05    # payload mode (Hz), ζ, deg
+
+    # Cycle time + settle time comparison
+    moves = [
+        (np.array([0.0, 0.0, 0.0]), np.array([-10.0, 15.0, 5.0])),
+        (np.array([0.0, 0.0, 0.0]), np.array([90.0, 30.0, -20.0])),
+        (np.array([0.0, 10.0, 0.0]), np.array([2.0, 12.0, 1.0])),
+    ]
+    print(f"{'move':>24} | {'trapezoid T + settle':>22} | {'s-curve T + settle':>22}")
+    for initial_point, final_point in moves:
+        cells = []
+        for profile in (trapezoid_profile(initial_point, final_point, joints_max_speeds, joints_max_accel),
+                        scurve_profile(initial_point, final_point, joints_max_speeds, joints_max_accel, joints_max_jerk)):
+            settle = settle_time(residual_vibration(profile, frequency, damping), frequency, damping, tolerance).max()
+            cells.append(f"{profile.duration:6.3f} + {settle:5.3f} = {profile.duration + settle:6.3f}")
+        print(f"{str(final_point - initial_point):>24} | {cells[0]:>22} | {cells[1]:>22}")
+
+    # Plot
+    initial_point, final_point = moves[1]
+    trapezoid = trapezoid_profile(initial_point, final_point, joints_max_speeds, joints_max_accel)
+    profile = scurve_profile(initial_point, final_point, joints_max_speeds, joints_max_accel, joints_max_jerk)
+    t_end = max(trapezoid.duration, profile.duration)
+    times = np.linspace(0.0, t_end, 2000)
+
+    fig, axes = plt.subplots(n_joints, 3, figsize=(15, 4 * n_joints))
+    for name, p in (("trapezoid", trapezoid), ("s-curve", profile)):
+        pos, vel, acc = p.evaluate_many(times, (0, 1, 2))
+        for j in range(n_joints):
+            axes[j, 0].plot(times, pos[:, j], label=name)
+            axes[j, 1].plot(times, vel[:, j], label=name)
+            axes[j, 2].plot(times, acc[:, j], label=name)
+    for j in range(n_joints):
+        for k, quantity in enumerate(("Position", "Velocity", "Acceleration")):
+            axes[j, k].set_title(f"{joints_names[j]} - {quantity}")
+            axes[j, k].grid(True)
+            axes[j, k].legend()
+    plt.tight_layout(h_pad=2.0)
+    plt.show()
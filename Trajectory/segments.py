@@ -0,0 +1,125 @@
+import numpy as np
+
+class PiecewisePolynomial:
+    """
+    Per-joint piecewise polynomial trajectory q_j(t).
+
+    Each joint has its own breakpoints, all joints have the same number of
+    segments and polynomial degree. Polynomials are expressed in local time
+    (t - breaks[j, k]) with the lowest order coefficient first. Before the
+    first breakpoint the trajectory holds its initial position, after the last
+    one its final position, with zero derivatives.
+
+    Attributes:
+        breaks: (n_joints, n_segments + 1) segment boundaries (s)
+        coefficients: (n_joints, n_segments, degree + 1)
+    """
+
+    def __init__(self, breaks, coefficients):
+        self.breaks = np.asarray(breaks, dtype=float)
+        self.coefficients = np.asarray(coefficients, dtype=float)
+        self.n_joints, self.n_segments, order = self.coefficients.shape
+        self.degree = order - 1
+        # Planner outputs share breakpoints across joints: one searchsorted serves all
+        self.shared_breaks = bool(np.all(self.breaks == self.breaks[:1]))
+
+    @property
+    def duration(self):
+        return float(np.max(self.breaks[:, -1])) if self.breaks.size else 0.0
+
+    def _locate(self, t):
+        """Segment index and local time of every sample for every joint, (n_joints, N)."""
+        t = np.asarray(t, dtype=float)
+        if self.shared_breaks:
+            index = np.broadcast_to(np.searchsorted(self.breaks[0, 1:-1], t, side='right'),
+                                    (self.n_joints,) + t.shape)
+        else:
+            index = np.empty((self.n_joints,) + t.shape, dtype=np.intp)
+            for j in range(self.n_joints):
+                index[j] = np.searchsorted(self.breaks[j, 1:-1], t, side='right')
+        start = np.take_along_axis(self.breaks, index.reshape(self.n_joints, -1), axis=1).reshape(index.shape)
+        return index, t - start
+
+    def evaluate(self, t, derivative=0):
+        """
+        Evaluate the trajectory or one of its derivatives.
+
+        Args:
+            t: scalar or array of times (s)
+            derivative: 0 position, 1 velocity, 2 acceleration, ...
+
+        Returns:
+            array of shape t.shape + (n_joints,)
+        """
+        return self.evaluate_many(t, (derivative,))[0]
+
+    def evaluate_many(self, t, derivatives=(0, 1)):
+        """Evaluate several derivatives at the same times, locating the segments once."""
+        t = np.asarray(t, dtype=float)
+        t_clipped = np.clip(t, self.breaks[:, :1].min(), self.breaks[:, -1:].max())
+        index, local = self._locate(t_clipped)
+        # Joints that finished earlier than others hold their last value
+        start = np.take_along_axis(self.breaks, index.reshape(self.n_joints, -1), axis=1).reshape(index.shape)
+        end = self.breaks[:, -1].reshape((-1,) + (1,) * t.ndim)
+        local = np.clip(local, 0.0, end - start)
+        outside = (t < self.breaks[:, 0].reshape(end.shape)) | (t > end)
+
+        joint = np.arange(self.n_joints).reshape((-1,) + (1,) * t.ndim)
+        results = []
+        for derivative in derivatives:
+            coefficients = self.coefficients
+            for _ in range(derivative):
+                powers = np.arange(1, coefficients.shape[-1])
+                coefficients = coefficients[..., 1:] * powers
+            if coefficients.shape[-1] == 0:
+                results.append(np.zeros(t.shape + (self.n_joints,)))
+                continue
+
+            c = coefficients[joint, index]  # (n_joints, ..., order)
+            value = c[..., -1]
+            for k in range(c.shape[-1] - 2, -1, -1):  # Horner
+                value = value * local + c[..., k]
+            if derivative > 0:
+                value = np.where(outside, 0.0, value)
+            results.append(np.moveaxis(value, 0, -1))
+        return results
+
+    def sample_times(self, dt, t_start=0.0, t_end=None):
+        """Number of samples and the sample time function t_k = t_start + k·dt, end included."""
+        t_end = self.duration if t_end is None else t_end
+        n = int(np.floor((t_end - t_start) / dt + 0.5)) + 1 if t_end >= t_start else 0
+        return n, lambda k: t_start + dt * k
+
+    def sample(self, dt, t_start=0.0, t_end=None, derivatives=(0, 1)):
+        """
+        Dense samples at a fixed rate (e.g. 1e-3 or the firmware's 250e-6).
+
+        Returns:
+            t: (n,) sample times
+            one (n, n_joints) array per requested derivative
+        """
+        n, time_of = self.sample_times(dt, t_start, t_end)
+        t = time_of(np.arange(n))
+        return (t, *self.evaluate_many(t, derivatives))
+
+    def sample_chunks(self, dt, chunk_size=65536, t_start=0.0, t_end=None, derivatives=(0, 1)):
+        """
+        Lazily evaluate the dense samples chunk by chunk, so memory stays bounded
+        by chunk_size samples whatever the trajectory length.
+
+        Yields:
+            (t, *values) tuples as returned by sample, chunk_size samples each (last one shorter)
+        """
+        n, time_of = self.sample_times(dt, t_start, t_end)
+        for k0 in range(0, n, chunk_size):
+            t = time_of(np.arange(k0, min(k0 + chunk_size, n)))
+            yield (t, *self.evaluate_many(t, derivatives))
+
+    def position(self, t):
+        return self.evaluate(t, 0)
+
+    def velocity(self, t):
+        return self.evaluate(t, 1)
+
+    def acceleration(self, t):
+        return self.evaluate(t, 2)
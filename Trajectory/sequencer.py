@@ -0,0 +1,205 @@
+import os
+import sys
+import numpy as np
+
+from trap_profile import plan_moves
+from firmware_config import THETA_PERIODS
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+
+def cartesian_to_joints(points, arm=None, mu=0.0):
+    """(N, 3) Cartesian targets to (N, 3) joint angles (theta, alpha, beta) in degrees."""
+    arm = ArmModel.load() if arm is None else arm
+    angles, reachable = arm.inverse_kinematics(np.asarray(points, dtype=float), mu=mu)
+    if not reachable.all():
+        raise ValueError(f"targets out of reach: {np.flatnonzero(~reachable).tolist()}")
+    return np.degrees(angles[:, :3])
+
+def move_time_matrix(exits, entries, max_speeds, max_accels, periods=THETA_PERIODS):
+    """
+    Synchronized trapezoid durations of every move exit[i] -> entry[j], in one
+    batched plan_moves call.
+
+    Args:
+        exits: (A, n_joints) poses moves start from
+        entries: (B, n_joints) poses moves go to
+        max_speeds, max_accels: (n_joints,) joint limits
+
+    Returns:
+        (A, B) move times (s)
+    """
+    exits = np.asarray(exits, dtype=float)
+    entries = np.asarray(entries, dtype=float)
+    starts = np.repeat(exits, len(entries), axis=0)
+    goals = np.tile(entries, (len(exits), 1))
+    return plan_moves(starts, goals, max_speeds, max_accels, periods)["duration"].reshape(len(exits), len(entries))
+
+def order_cost(cost, order):
+    """Total cost of visiting the nodes in order."""
+    order = np.asarray(order)
+    return float(cost[order[:-1], order[1:]].sum())
+
+def nearest_neighbour(cost):
+    """
+    Greedy order from node 0, always moving to the cheapest unvisited node.
+    The last node is the end marker and stays last.
+    """
+    n = len(cost)
+    visited = np.zeros(n, dtype=bool)
+    visited[[0, -1]] = True
+    order = [0]
+    for _ in range(n - 2):
+        row = np.where(visited, np.inf, cost[order[-1]])
+        order.append(int(np.argmin(row)))
+        visited[order[-1]] = True
+    order.append(n - 1)
+    return np.array(order)
+
+def _best_two_opt(cost, order):
+    """Best reversal order[i..k] (1 <= i < k <= n-2), as (gain, i, k)."""
+    n = len(order)
+    forward = np.concatenate(([0.0], np.cumsum(cost[order[:-1], order[1:]])))
+    backward = np.concatenate(([0.0], np.cumsum(cost[order[1:], order[:-1]])))
+    i = np.arange(1, n - 1)[:, None]
+    k = np.arange(1, n - 1)[None, :]
+    valid = k > i
+    k1 = np.minimum(k + 1, n - 1)
+    old = cost[order[i - 1], order[i]] + (forward[k] - forward[i]) + cost[order[k], order[k1]]
+    new = cost[order[i - 1], order[k]] + (backward[k] - backward[i]) + cost[order[i], order[k1]]
+    gain = np.where(valid, old - new, -np.inf)
+    best = np.unravel_index(np.argmax(gain), gain.shape)
+    return gain[best], int(i[best[0], 0]), int(k[0, best[1]])
+
+def _best_or_opt(cost, order, max_length=3):
+    """Best move of a run of 1..max_length nodes to another edge, as (gain, i, length, p)."""
+    n = len(order)
+    edge = cost[order[:-1], order[1:]]
+    best = (-np.inf, 0, 0, 0)
+    for length in range(1, max_length + 1):
+        i = np.arange(1, n - length)[:, None]     # run order[i .. i+length-1], end marker excluded
+        if i.size == 0:
+            break
+        j = i + length - 1
+        p = np.arange(0, n - 1)[None, :]          # insert between order[p] and order[p+1]
+        valid = (p < i - 1) | (p > j)
+        removed = cost[order[i - 1], order[i]] + cost[order[j], order[j + 1]] - cost[order[i - 1], order[j + 1]]
+        inserted = cost[order[p], order[i]] + cost[order[j], order[p + 1]] - edge[p]
+        gain = np.where(valid, removed - inserted, -np.inf)
+        index = np.unravel_index(np.argmax(gain), gain.shape)
+        if gain[index] > best[0]:
+            best = (gain[index], int(i[index[0], 0]), length, int(p[0, index[1]]))
+    return best
+
+def improve_order(cost, order, tol=1e-9, max_iterations=10000):
+    """
+    Local search with 2-opt and Or-opt moves, applying the best improving move
+    of either kind until none is left. Node 0 stays first and the last node
+    stays last; each candidate set is evaluated with array operations.
+    """
+    order = np.array(order)
+    for _ in range(max_iterations):
+        two_opt = _best_two_opt(cost, order)
+        or_opt = _best_or_opt(cost, order)
+        if max(two_opt[0], or_opt[0]) <= tol:
+            break
+        if two_opt[0] >= or_opt[0]:
+            _, i, k = two_opt
+            order[i:k + 1] = order[i:k + 1][::-1]
+        else:
+            _, i, length, p = or_opt
+            run = order[i:i + length]
+            rest = np.concatenate([order[:i], order[i + length:]])
+            at = p + 1 if p < i else p + 1 - length
+            order = np.concatenate([rest[:at], run, rest[at:]])
+    return order
+
+def sequence_targets(picks, home, max_speeds, max_accels, places=None, return_home=False):
+    """
+    Visiting order of independent jobs that minimizes the total move time.
+
+    A job is a single target, or a pick followed by its place when places is
+    given (e.g. chess captures); the move inside a job does not depend on the
+    order and is not counted. Costs are synchronized trapezoid durations, not
+    distances.
+
+    Args:
+        picks: (M, n_joints) joint targets in degrees (see cartesian_to_joints)
+        home: (n_joints,) pose the program starts from
+        max_speeds, max_accels: (n_joints,) joint limits
+        places: optional (M, n_joints) poses where each job ends
+        return_home: also count the move back to home after the last job
+
+    Returns:
+        dict with order (M,) job indices, time (s) of the optimized order,
+        nearest_neighbour_time and given_order_time for comparison
+    """
+    picks = np.asarray(picks, dtype=float)
+    places = picks if places is None else np.asarray(places, dtype=float)
+    home = np.asarray(home, dtype=float)[None]
+    m = len(picks)
+
+    # Nodes: 0 home, 1..m jobs, m+1 end marker
+    cost = np.zeros((m + 2, m + 2))
+    cost[:m + 1, 1:m + 1] = move_time_matrix(np.concatenate([home, places]), picks, max_speeds, max_accels)
+    if return_home:
+        cost[1:m + 1, m + 1] = move_time_matrix(places, home, max_speeds, max_accels)[:, 0]
+    cost[np.arange(1, m + 1), np.arange(1, m + 1)] = np.inf   # never stay on a job
+
+    given = np.arange(m + 2)
+    greedy = nearest_neighbour(cost)
+    order = improve_order(cost, greedy)
+    return {
+        "order": order[1:-1] - 1,
+        "time": order_cost(cost, order),
+        "nearest_neighbour_time": order_cost(cost, greedy),
+        "given_order_time": order_cost(cost, given),
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+    arm = ArmModel.load()
+
+    # Sorting job: 60 parts scattered on the table, listed in the order they were recorded
+    rng = np.random.default_rng(1)
+    radius = rng.uniform(200.0, 380.0, 60)
+    angle = rng.uniform(-np.pi / 2, np.pi / 2, 60)
+    points = np.stack([radius * np.cos(angle), radius * np.sin(angle), np.full(60, 50.0)], axis=1)
+    picks = cartesian_to_joints(points, arm)
+    home = cartesian_to_joints([[200.0, 0.0, 250.0]], arm)[0]
+
+    t0 = time.perf_counter()
+    result = sequence_targets(picks, home, joints_max_speeds, joints_max_accel, return_home=True)
+    elapsed = time.perf_counter() - t0
+
+    # Same heuristics on Euclidean distance, evaluated in move time
+    nodes = np.concatenate([[[200.0, 0.0, 250.0]], points, [[200.0, 0.0, 250.0]]])
+    distance = np.linalg.norm(nodes[:, None] - nodes[None], axis=-1)
+    distance[0, -1] = distance[-1, 0] = np.inf
+    euclidean = improve_order(distance, nearest_neighbour(distance))
+    timed = sequence_targets(picks[euclidean[1:-1] - 1], home, joints_max_speeds, joints_max_accel, return_home=True)
+
+    print("sorting job, 60 parts")
+    print(f"  given order:       {result['given_order_time']:.1f} s")
+    print(f"  nearest neighbour: {result['nearest_neighbour_time']:.1f} s")
+    print(f"  euclidean tour:    {timed['given_order_time']:.1f} s")
+    print(f"  optimized:         {result['time']:.1f} s "
+          f"({1 - result['time'] / result['given_order_time']:.0%} less than given, {elapsed * 1e3:.0f} ms)")
+
+    # Chess: 16 captured pieces moved off the board, squares listed rank by rank
+    files, ranks = np.meshgrid(np.arange(8), np.arange(8))
+    squares = np.stack([200.0 + 30.0 * ranks.ravel(), -105.0 + 30.0 * files.ravel(), np.full(64, 20.0)], axis=1)
+    captured = np.sort(rng.choice(64, 16, replace=False))
+    bins = np.array([[150.0, -200.0, 40.0], [150.0, 200.0, 40.0]])
+    picks = cartesian_to_joints(squares[captured], arm)
+    places = cartesian_to_joints(bins[(captured % 8 >= 4).astype(int)], arm)
+
+    result = sequence_targets(picks, home, joints_max_speeds, joints_max_accel, places=places, return_home=True)
+    print("chess captures, 16 pieces")
+    print(f"  given order:       {result['given_order_time']:.1f} s")
+    print(f"  optimized:         {result['time']:.1f} s "
+          f"({1 - result['time'] / result['given_order_time']:.0%} less than given)")
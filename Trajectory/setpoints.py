@@ -0,0 +1,117 @@
+import numpy as np
+
+from planner import FIRMWARE_CHECK_INTERVAL
+
+class SetpointStream:
+    """
+    Fixed-rate joint setpoints pulled on demand from a sequence of planned moves.
+
+    The moves (PiecewisePolynomial profiles, or plan_path / parameterize_path
+    dicts holding one under "profile") are chained end to end on a single clock
+    t_k = k·dt, so the sampling grid carries over from one move to the next.
+    Moves may come from a generator and are only consumed when reached; memory
+    stays bounded by chunk_size samples whatever the program length. When the
+    program end falls between two ticks, one last setpoint holding the final
+    pose is emitted on the next tick.
+
+    Iterating yields one (t, q, q_dot) setpoint at a time; next_chunk returns
+    arrays for consumers that work in blocks. Both resume where the previous
+    call stopped.
+    """
+
+    def __init__(self, moves, dt=FIRMWARE_CHECK_INTERVAL, chunk_size=4096):
+        self.dt = dt
+        self.chunk_size = chunk_size
+        self.index = 0          # global index of the next setpoint
+        self._chunks = self._generate(iter(moves))
+        self._buffer = None
+        self._cursor = 0
+
+    @property
+    def time(self):
+        """Program time of the next setpoint (s)."""
+        return self.index * self.dt
+
+    def _generate(self, moves):
+        """Chunks of at most chunk_size setpoints, move after move."""
+        eps = 1e-9 * self.dt
+        offset, profile = 0.0, None
+        for move in moves:
+            profile = move["profile"] if isinstance(move, dict) else move
+            end = offset + profile.duration
+            k_last = int(np.floor((end + eps) / self.dt))
+            k = self.index
+            while k <= k_last:
+                ks = np.arange(k, min(k + self.chunk_size, k_last + 1))
+                t = ks * self.dt
+                yield (t, *profile.evaluate_many(t - offset, (0, 1)))
+                k = ks[-1] + 1
+            offset = end
+
+        if profile is not None and (self.index - 1) * self.dt < offset - eps:
+            t = np.array([self.index * self.dt])
+            yield (t, *profile.evaluate_many(t - offset + profile.duration, (0, 1)))
+
+    def next_chunk(self, max_samples=None):
+        """
+        Next block of setpoints.
+
+        Args:
+            max_samples: at most this many samples, chunk_size by default
+
+        Returns:
+            t: (n,) program times, q and q_dot: (n, n_joints) arrays;
+            None once the program is over
+        """
+        max_samples = self.chunk_size if max_samples is None else max_samples
+        if self._buffer is None or self._cursor >= len(self._buffer[0]):
+            self._buffer = next(self._chunks, None)
+            self._cursor = 0
+            if self._buffer is None:
+                return None
+        end = min(self._cursor + max_samples, len(self._buffer[0]))
+        chunk = tuple(a[self._cursor:end] for a in self._buffer)
+        self._cursor = end
+        self.index += len(chunk[0])
+        return chunk
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        chunk = self.next_chunk(1)
+        if chunk is None:
+            raise StopIteration
+        return tuple(a[0] for a in chunk)
+
+
+if __name__ == "__main__":
+    import time
+    from planner import plan_path
+    from trap_profile import trapezoid_profile
+
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+
+    def program(n_moves):
+        """Long drawing job generated move by move, never held in memory."""
+        rng = np.random.default_rng(0)
+        current = np.zeros(3)
+        for i in range(n_moves):
+            goal = current + rng.uniform(-20.0, 20.0, 3)
+            if i % 2:
+                yield trapezoid_profile(current, goal, joints_max_speeds, joints_max_accel)
+            else:
+                s = np.linspace(0.0, 1.0, 50)[:, None]
+                yield plan_path(current + s * (goal - current) + np.sin(np.pi * s) * 5.0,
+                                joints_max_speeds, joints_max_accel)
+            current = goal
+
+    stream = SetpointStream(program(200), dt=1e-3)
+    t0 = time.perf_counter()
+    n, peak = 0, 0
+    while (chunk := stream.next_chunk()) is not None:
+        n += len(chunk[0])
+        peak = max(peak, sum(a.nbytes for a in chunk))
+    print(f"{n} setpoints ({stream.time:.1f} s of motion) in {time.perf_counter() - t0:.2f} s, "
+          f"largest chunk {peak / 1024:.0f} kB")
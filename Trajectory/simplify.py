@@ -0,0 +1,143 @@
+import numpy as np
+from segments import PiecewisePolynomial
+from trap_profile import plan_moves
+from firmware_config import FIRMWARE, THETA_PERIODS
+
+RESOLUTION = np.array(FIRMWARE.resolution)  # steps/rev
+STEP_ANGLES = 360.0 / RESOLUTION            # deg per motor step
+BAUD_RATE = FIRMWARE.baud_rate
+
+def _segment_terms(t, q, i0, i1, degree):
+    """
+    Power-basis terms q0 + b·τ + c·τ² (τ = t - t[i0]) of the segments [i0, i1].
+
+    Degree 1 joins the end samples, degree 2 also passes through the middle
+    sample, falling back to a line when the segment has no inner sample.
+    """
+    h = (t[i1] - t[i0])[:, None]
+    slope = (q[i1] - q[i0]) / h
+    c = np.zeros_like(slope)
+    if degree == 2:
+        im = (i0 + i1) // 2
+        inner = (im > i0)[:, None]
+        hm = np.where(inner, (t[im] - t[i0])[:, None], 1.0)
+        slope_m = (q[im] - q[i0]) / hm
+        c = np.where(inner, (slope - slope_m) / np.where(inner, h - hm, 1.0), 0.0)
+        slope = np.where(inner, slope_m - c * hm, slope)
+    return slope, c
+
+def simplify_trajectory(t, q, tolerance=STEP_ANGLES, degree=1, max_levels=64):
+    """
+    Ramer–Douglas–Peucker on a sampled joint trajectory.
+
+    Samples are kept until every dropped sample is within tolerance[j] of the
+    linear (degree 1) or parabolic (degree 2) interpolation of the kept ones,
+    at the same time and for every joint. All segments are refined at once
+    per level: each segment failing the bound is split at its worst sample.
+
+    Args:
+        t: (N,) increasing sample times
+        q: (N, n_joints) joint positions
+        tolerance: (n_joints,) error bound, one motor step by default (deg)
+        degree: 1 for linear segments, 2 for parabolic ones
+        max_levels: cap on the number of refinement levels
+
+    Returns:
+        (M,) indices of the kept samples, first and last included
+    """
+    t = np.asarray(t, dtype=float)
+    q = np.asarray(q, dtype=float)
+    tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), q.shape[1:])
+    n = len(t)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, -1]] = True
+    samples = np.arange(n)
+
+    for _ in range(max_levels):
+        kept = np.flatnonzero(keep)
+        if len(kept) == n:
+            break
+        slope, c = _segment_terms(t, q, kept[:-1], kept[1:], degree)
+        seg = np.minimum(np.searchsorted(kept, samples, side='right') - 1, len(kept) - 2)
+        tau = (t - t[kept[seg]])[:, None]
+        approx = q[kept[seg]] + slope[seg] * tau + c[seg] * tau**2
+        error = np.max(np.abs(q - approx) / tolerance, axis=1)
+
+        worst = np.maximum.reduceat(error, kept[:-1])
+        bad = worst > 1.0
+        if not bad.any():
+            break
+        # First sample reaching its segment's worst error, for the failing segments
+        hit = np.flatnonzero(bad[seg] & (error == worst[seg]))
+        _, first = np.unique(seg[hit], return_index=True)
+        keep[hit[first]] = True
+    return np.flatnonzero(keep)
+
+def simplified_profile(t, q, indices, degree=1):
+    """
+    Trajectory through the kept samples as a PiecewisePolynomial.
+
+    Args:
+        t, q: the dense trajectory given to simplify_trajectory
+        indices: its output
+        degree: the degree used to simplify
+
+    Returns:
+        PiecewisePolynomial with one linear or quadratic segment per kept interval
+    """
+    t = np.asarray(t, dtype=float)
+    q = np.asarray(q, dtype=float)
+    i0, i1 = indices[:-1], indices[1:]
+    slope, c = _segment_terms(t, q, i0, i1, degree)
+    coefficients = np.stack([q[i0], slope, c], axis=-1).transpose(1, 0, 2)
+    breaks = np.broadcast_to(t[indices] - t[0], (q.shape[1], len(indices)))
+    return PiecewisePolynomial(breaks, coefficients)
+
+def command_bytes(q):
+    """
+    Bytes needed to send each row of q as an it<theta>a<alpha>b<beta> serial
+    command. Transmission only: see command_time for how long the firmware
+    takes to run them.
+    """
+    return sum(len(f"it{theta:.2f}a{alpha:.2f}b{beta:.2f}\n") for theta, alpha, beta in q)
+
+def command_time(q, max_speeds=FIRMWARE.max_speed, max_accels=FIRMWARE.acceleration):
+    """
+    Time the firmware takes to run the rows of q as it commands, starting at q[0].
+
+    Each it command is a synchronized trapezoid from rest to rest
+    (calculate_interpolation), so the arm stops on every kept sample instead
+    of following the simplified profile.
+    """
+    q = np.asarray(q, dtype=float)
+    return float(plan_moves(q[:-1], q[1:], max_speeds, max_accels, THETA_PERIODS)["duration"].sum())
+
+
+if __name__ == "__main__":
+    import time
+    from planner import plan_path, sample_trajectory
+
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+
+    # Long drawing job: the planner demo path scaled up, sampled at 1 kHz
+    s = np.linspace(0.0, 20.0, 401)
+    waypoints = np.stack([np.where(s < 10, s, 20 - s) * 9.0, 25 * np.sin(2 * np.pi / 20.0 * s),
+                          -s**2 / 2.0 + 10.0 * s], axis=1)
+    plan = plan_path(waypoints, joints_max_speeds, joints_max_accel)
+    t, q, _ = sample_trajectory(plan, 1e-3)
+
+    for degree in (1, 2):
+        t0 = time.perf_counter()
+        indices = simplify_trajectory(t, q, STEP_ANGLES, degree)
+        elapsed = time.perf_counter() - t0
+        error = np.abs(simplified_profile(t, q, indices, degree).position(t - t[0]) - q) / STEP_ANGLES
+        print(f"degree {degree}: {len(t)} -> {len(indices)} samples in {elapsed * 1e3:.0f} ms, "
+              f"max error {error.max():.2f} steps")
+
+    indices = simplify_trajectory(t, q, STEP_ANGLES)
+    for name, rows in (("dense", q), ("simplified", q[indices])):
+        n_bytes = command_bytes(rows)
+        print(f"{name}: {n_bytes} bytes, {n_bytes * 10 / BAUD_RATE:.1f} s at {BAUD_RATE} baud, "
+              f"{command_time(rows):.1f} s to run as rest-to-rest it commands "
+              f"(planned {plan['total_time']:.1f} s)")
@@ -0,0 +1,152 @@
+import numpy as np
+
+from discretize import _group_ranges
+from firmware_config import FIRMWARE
+
+def _horner(c, tau):
+    """Evaluate rows of lowest-order-first coefficients c at tau."""
+    value = c[..., -1]
+    for k in range(c.shape[-1] - 2, -1, -1):
+        value = value * tau + c[..., k]
+    return value
+
+def _monotonic_pieces(c, h):
+    """
+    Split each segment at the extrema of its polynomial (degree 3 at most).
+
+    Returns:
+        (S, 3, 2) local (start, end) times of 3 monotonic pieces per segment,
+        some of them empty
+    """
+    order = c.shape[-1]
+    if order > 4:
+        raise ValueError("step schedules support polynomials up to degree 3")
+    c = np.pad(c, ((0, 0), (0, 4 - order)))
+    # q' = c1 + 2·c2·τ + 3·c3·τ²
+    a, b, k = 3.0 * c[:, 3], 2.0 * c[:, 2], c[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        disc = b * b - 4.0 * a * k
+        sq = np.sqrt(np.maximum(disc, 0.0))
+        quadratic = np.abs(a) > 1e-300
+        r1 = np.where(quadratic, (-b - sq) / (2.0 * a), -k / b)
+        r2 = np.where(quadratic, (-b + sq) / (2.0 * a), np.nan)
+    roots = np.stack([r1, r2], axis=-1)
+    roots = np.where(np.isfinite(roots) & (roots > 0) & (roots < h[:, None]), roots, h[:, None])
+    cuts = np.concatenate([np.zeros((len(h), 1)), np.sort(roots, axis=-1), h[:, None]], axis=-1)
+    return np.stack([cuts[:, :-1], cuts[:, 1:]], axis=-1)
+
+def joint_step_times(breaks, coefficients, step_angle, iterations=60):
+    """
+    Exact times at which one joint's trajectory crosses the half-step levels
+    (k + 1/2)·step_angle, i.e. where its position rounded to the nearest step
+    changes.
+
+    Args:
+        breaks: (S + 1,) segment boundaries (s)
+        coefficients: (S, order) local polynomial coefficients, lowest order first
+        step_angle: joint angle per motor step
+
+    Returns:
+        times: (n,) crossing times (s), in order
+        directions: (n,) +1 / -1
+    """
+    h = np.diff(breaks)
+    pieces = _monotonic_pieces(coefficients, h).reshape(-1, 2)      # (3·S, 2)
+    segment = np.repeat(np.arange(len(h)), 3)
+    c = coefficients[segment]
+    q = _horner(c[:, None, :], pieces)                                # (3·S, 2)
+
+    k = np.floor(q / step_angle + 0.5)
+    counts = np.abs(k[:, 1] - k[:, 0]).astype(np.int64)
+    direction = np.sign(k[:, 1] - k[:, 0])
+
+    # One bisection per crossing, all at once
+    owner = np.repeat(np.arange(len(counts)), counts)
+    d = direction[owner]
+    level = (k[owner, 0] + d * (0.5 + _group_ranges(counts))) * step_angle
+    lo, hi = pieces[owner, 0].copy(), pieces[owner, 1].copy()
+    c = c[owner]
+    for _ in range(iterations):
+        mid = 0.5 * (lo + hi)
+        below = d * (_horner(c, mid) - level) < 0
+        lo = np.where(below, mid, lo)
+        hi = np.where(below, hi, mid)
+    return breaks[segment[owner]] + 0.5 * (lo + hi), d.astype(np.int8)
+
+def compile_steps(profile, resolution=FIRMWARE.resolution, inv_dir=FIRMWARE.inv_dir):
+    """
+    Step pulse schedule of a joint trajectory.
+
+    Args:
+        profile: PiecewisePolynomial in degrees (planner, trapezoid, S-curve, ...)
+        resolution: (n_joints,) steps per revolution
+        inv_dir: (n_joints,) direction pin inversion flags
+
+    Returns:
+        list of dicts, one per joint, with t_us (n,) step timestamps in µs,
+        direction (n,) logical direction (+1 / -1) and dir_pin (n,) DIR pin level
+    """
+    schedule = []
+    for j in range(profile.n_joints):
+        times, direction = joint_step_times(profile.breaks[j], profile.coefficients[j], 360.0 / resolution[j])
+        schedule.append({
+            "t_us": times * 1e6,
+            "direction": direction,
+            "dir_pin": (direction > 0) ^ bool(inv_dir[j]),
+        })
+    return schedule
+
+def merge_schedule(schedule):
+    """All joints' steps as one time-ordered event list: (t_us, joint, direction) arrays."""
+    t_us = np.concatenate([s["t_us"] for s in schedule])
+    joint = np.concatenate([np.full(len(s["t_us"]), j, dtype=np.int8) for j, s in enumerate(schedule)])
+    direction = np.concatenate([s["direction"] for s in schedule])
+    order = np.argsort(t_us, kind='stable')
+    return t_us[order], joint[order], direction[order]
+
+def schedule_statistics(schedule, tick_us=FIRMWARE.trajectory_check_interval, pulse_us=FIRMWARE.step_pulse):
+    """
+    Per joint step count, minimum interval between steps and peak step frequency.
+
+    follow_trajectory takes at most one step per joint every tick_us, so a
+    joint whose minimum interval is shorter than the tick falls behind.
+
+    Returns:
+        dict of (n_joints,) arrays: steps, min_interval_us, peak_frequency_hz,
+        polled_ok (the loop can follow), pulse_ok (room for the pulse itself)
+    """
+    steps, min_interval = [], []
+    for s in schedule:
+        steps.append(len(s["t_us"]))
+        min_interval.append(np.diff(s["t_us"]).min() if len(s["t_us"]) > 1 else np.inf)
+    min_interval = np.array(min_interval)
+    return {
+        "steps": np.array(steps),
+        "min_interval_us": min_interval,
+        "peak_frequency_hz": 1e6 / min_interval,
+        "polled_ok": min_interval >= tick_us,
+        "pulse_ok": min_interval >= 2.0 * pulse_us,
+    }
+
+
+if __name__ == "__main__":
+    import time
+    from trap_profile import trapezoid_profile
+    from scurve_profile import scurve_profile
+
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+
+    moves = {
+        "trapezoid": trapezoid_profile([0, 0, 0], [90, 30, -20], joints_max_speeds, joints_max_accel),
+        "s-curve": scurve_profile([0, 0, 0], [90, 30, -20], joints_max_speeds, joints_max_accel, 4 * joints_max_accel),
+        "trapezoid x400": trapezoid_profile([0, 0, 0], [180, 60, -40], 400 * joints_max_speeds, 400 * joints_max_accel),
+    }
+    for name, profile in moves.items():
+        t0 = time.perf_counter()
+        schedule = compile_steps(profile)
+        elapsed = time.perf_counter() - t0
+        stats = schedule_statistics(schedule)
+        print(f"{name}: {stats['steps']} steps in {elapsed * 1e3:.1f} ms, "
+              f"min interval {stats['min_interval_us'].round(1)} µs, "
+              f"peak {stats['peak_frequency_hz'].round(0)} Hz, polled loop ok {stats['polled_ok']}")
@@ -0,0 +1,309 @@
+import os
+import sys
+import numpy as np
+from scipy.interpolate import CubicSpline
+from segments import PiecewisePolynomial
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+
+# Fixed speeds the firmware divides path lengths by (serial_commands.cpp)
+FIRMWARE_LINE_SPEED = 50.0     # joint-space deg/s, trajectory_time = length_line_JS / 50
+FIRMWARE_CIRCLE_SPEED = 150.0  # mm/s, trajectory_time = perimeter / 150
+
+def line_points(start, goal, n=200):
+    """(n, 3) points of the straight line from start to goal."""
+    u = np.linspace(0.0, 1.0, n)[:, None]
+    return (1.0 - u) * np.asarray(start, dtype=float) + u * np.asarray(goal, dtype=float)
+
+def circle_points(center_x, center_z, radius, n=400):
+    """(n, 3) points of the circle drawn by circle_cartesian, in the y = 0 plane from (cx + r, 0, cz)."""
+    phi = np.linspace(0.0, 2.0 * np.pi, n)
+    return np.stack([center_x + radius * np.cos(phi), np.zeros_like(phi), center_z + radius * np.sin(phi)], axis=-1)
+
+def path_joint_derivatives(points, arm, mu=0.0):
+    """
+    Map a Cartesian path through batched IK.
+
+    Args:
+        points: (N, 3) Cartesian points along the path
+        arm: ArmModel
+        mu: tool angle (rad), scalar or (N,)
+
+    Returns:
+        s: (N,) Cartesian arc length at each point, or the tool angle turned
+            so far (deg) for a rotation in place
+        q: (N, 3) joint angles (theta, alpha, beta) in degrees, theta unwrapped
+        dq, ddq: (N, 3) first and second derivatives of q with respect to s,
+            from a cubic spline through q
+        reachable: (N,) boolean mask
+    """
+    points = np.asarray(points, dtype=float)
+    s = np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(points, axis=0), axis=1))))
+    if s[-1] == 0.0:
+        mu_deg = np.degrees(np.broadcast_to(np.asarray(mu, dtype=float), s.shape))
+        s = np.concatenate(([0.0], np.cumsum(np.abs(np.diff(mu_deg)))))
+    angles, reachable = arm.inverse_kinematics(points, mu=mu)
+    q = np.degrees(angles[:, :3])
+    q[:, 0] = np.degrees(np.unwrap(angles[:, 0]))
+    # C² spline in s: its slopes and curvatures agree with the Hermite built
+    # between the points, where finite differences smear curvature jumps
+    spline = CubicSpline(s, q, axis=0)
+    return s, q, spline(s, 1), spline(s, 2), reachable
+
+def maximum_velocity_curve(dq, ddq, max_speeds, max_accels, tol=1e-9):
+    """
+    Largest x = ṡ² at each path point that the joint limits allow.
+
+    Speed: |q'_j|·ṡ <= v_j. Acceleration: |q'_j·s̈ + q''_j·ṡ²| <= a_j, i.e.
+    s̈ in [-a_j/|q'_j| + k_j·x, a_j/|q'_j| + k_j·x] with k_j = -q''_j/q'_j.
+    Two joints j, m leave an admissible s̈ only while
+    |k_j - k_m|·x <= a_j/|q'_j| + a_m/|q'_m|, and a joint with q'_j = 0
+    needs |q''_j|·x <= a_j.
+
+    Returns:
+        (N,) x limits (inf where nothing constrains the path)
+    """
+    v = np.asarray(max_speeds, dtype=float)
+    a = np.asarray(max_accels, dtype=float)
+    adq = np.abs(dq)
+    moving = adq > tol
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_speed = np.where(moving, (v / adq) ** 2, np.inf).min(axis=1)
+        x_still = np.where(~moving & (np.abs(ddq) > tol), a / np.abs(ddq), np.inf).min(axis=1)
+
+        reach = np.where(moving, a / adq, np.nan)                     # (N, n)
+        k = np.where(moving, -ddq / dq, np.nan)
+        gap = np.abs(k[:, :, None] - k[:, None, :])                   # (N, n, n)
+        bound = (reach[:, :, None] + reach[:, None, :]) / gap
+        x_pairs = np.where(gap > tol, bound, np.inf).min(axis=(1, 2))  # NaN pairs compare False
+    return np.minimum(np.minimum(x_speed, x_still), x_pairs)
+
+def _capped_sweep(cap, c):
+    """
+    w[i+1] = min(cap[i+1], w[i] + c[i]) from w[0] = cap[0], unrolled as in
+    planner.propagate_speed_limits: w = S + running min of (cap - S), S = cumsum(c).
+    """
+    S = np.concatenate(([0.0], np.cumsum(c)))
+    return S + np.minimum.accumulate(cap - S)
+
+def _segment_increments(x, ds, hi, k):
+    """
+    2·ds·s̈ at the largest s̈ each segment allows from x at its start, with the
+    acceleration bounds met at both ends: s̈ <= hi0 + k0·x0 at the start and
+    s̈ <= hi1 + k1·(x0 + 2·ds·s̈) at the end, i.e.
+    s̈·(1 - 2·ds·k1) <= hi1 + k1·x0.
+    """
+    x0 = x[:-1, None]
+    near = hi[:-1] + k[:-1] * x0
+    g = 1.0 - 2.0 * ds[:, None] * k[1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        far = np.where(g > 0, (hi[1:] + k[1:] * x0) / g, np.inf)
+    return 2.0 * ds * np.minimum(near, far).min(axis=1)
+
+def integrate_speed_limits(x_max, ds, hi, k, tol=1e-9, max_iterations=None):
+    """
+    Forward pass at maximum acceleration then backward pass at maximum
+    deceleration under the maximum velocity curve, in x = ṡ².
+
+    The admissible s̈ depends on x, so each pass is a fixed point: the
+    increments are evaluated on the current estimate and the capped
+    recurrence is solved with array operations until x settles. Entries are
+    final at least one per iteration, in practice a few tens of iterations
+    cover hundreds of points.
+
+    Args:
+        x_max: (N,) maximum velocity curve, 0 where the path must be at rest
+        ds: (N - 1,) path parameter increments
+        hi, k: (N, n_joints) admissible s̈ bounds ±hi + k·x per joint
+
+    Returns:
+        (N,) x profile
+    """
+    scale = tol * max(1.0, float(np.max(x_max, where=np.isfinite(x_max), initial=0.0)))
+    max_iterations = len(x_max) + 1 if max_iterations is None else max_iterations
+
+    def fixed_point(cap, ds, hi, k):
+        x = cap
+        for _ in range(max_iterations):
+            new = np.maximum(_capped_sweep(cap, _segment_increments(x, ds, hi, k)), 0.0)
+            if np.max(np.abs(new - x), where=np.isfinite(new), initial=0.0) <= scale:
+                break
+            x = new
+        return new
+
+    forward = fixed_point(x_max, ds, hi, k)
+    # Backward in reversed order, where deceleration becomes acceleration: k changes sign
+    return fixed_point(forward[::-1], ds[::-1], hi[::-1], -k[::-1])[::-1]
+
+def hermite_profile(q, qdot, seg_times):
+    """
+    Cubic Hermite in q between path points with the given joint velocities.
+
+    Returns:
+        coefficients: (S, n_joints, 4) local coefficients, lowest order first
+        peak_qdot: (S, n_joints) largest |q̇| on each segment
+        qddot: (S, 2, n_joints) joint accelerations at both ends of each segment
+    """
+    h = np.where(seg_times > 0, seg_times, 1.0)[:, None]
+    dQ = np.diff(q, axis=0)
+    c2 = (3.0 * dQ - (2.0 * qdot[:-1] + qdot[1:]) * h) / h**2
+    c3 = (-2.0 * dQ + (qdot[:-1] + qdot[1:]) * h) / h**3
+    coefficients = np.stack([q[:-1], qdot[:-1], c2, c3], axis=-1)
+
+    # q̇ is quadratic, its extremum q̇(-c2 / 3·c3) can lie inside the segment
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = -c2 / (3.0 * c3)
+        inner = (tau > 0) & (tau < h)
+        extremum = np.where(inner, qdot[:-1] - c2**2 / (3.0 * c3), 0.0)
+    peak_qdot = np.maximum(np.maximum(np.abs(qdot[:-1]), np.abs(qdot[1:])), np.abs(extremum))
+    return coefficients, peak_qdot, np.stack([2.0 * c2, 2.0 * c2 + 6.0 * c3 * h], axis=1)
+
+def parameterize_path(points, max_speeds, max_accels, arm=None, mu=0.0, max_refinements=20, refine_tol=1e-3):
+    """
+    Fastest timing of a Cartesian path under per-joint speed and acceleration
+    limits (TOPP by numerical integration in x = ṡ²).
+
+    The path is mapped through batched IK, the maximum velocity curve is
+    computed in closed form, then a forward pass at maximum acceleration and a
+    backward pass at maximum deceleration give the speed profile, starting and
+    ending at rest.
+
+    Both passes bound s̈ at both ends of every segment. The joint trajectory
+    is a cubic Hermite between path points, checked against the limits:
+    segments over them (the velocity curve can be tighter between points than
+    at them, the cubic can bulge over a speed limit) lower the speed cap of
+    their end points and the passes are run again. A last uniform time
+    stretch covers what is left.
+
+    Args:
+        points: (N, 3) Cartesian points along the path, dense enough for
+            finite differences (see line_points, circle_points)
+        max_speeds, max_accels: (3,) joint limits in deg/s and deg/s²
+        arm: ArmModel, loaded from the GUI files by default
+        mu: tool angle (rad)
+        max_refinements: passes rerun with lowered caps before stretching
+        refine_tol: relative excess over the limits left to the final stretch
+
+    Returns:
+        dict with the joint trajectory as a PiecewisePolynomial ("profile",
+        cubic Hermite between path points) and s, q, s_dot, node_times,
+        total_time, reachable
+    """
+    arm = ArmModel.load() if arm is None else arm
+    s, q, dq, ddq, reachable = path_joint_derivatives(points, arm, mu)
+    if not reachable.all():
+        raise ValueError(f"{np.count_nonzero(~reachable)} path points are out of reach")
+    v = np.asarray(max_speeds, dtype=float)
+    a = np.asarray(max_accels, dtype=float)
+    ds = np.diff(s)
+
+    x_max = maximum_velocity_curve(dq, ddq, v, a)
+    x_max[[0, -1]] = 0.0
+
+    # Admissible s̈ at x: [max_j(lo_j + k_j·x), min_j(hi_j + k_j·x)] over the moving joints
+    moving = np.abs(dq) > 1e-9
+    with np.errstate(divide='ignore', invalid='ignore'):
+        hi = np.where(moving, a / np.abs(dq), np.inf)
+        k = np.where(moving, -ddq / dq, 0.0)
+
+    for refinement in range(max_refinements + 1):
+        x = integrate_speed_limits(x_max, ds, hi, k)
+        s_dot = np.sqrt(x)
+
+        # Constant s̈ on each interval: dt = 2·ds / (ṡ0 + ṡ1)
+        denom = s_dot[:-1] + s_dot[1:]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            seg_times = np.where(denom > 0, 2.0 * ds / denom, 0.0)
+
+        # Hermite acceleration is linear on each segment: check both ends.
+        # Speeds scale like √x, accelerations like x: compare squared speed ratios
+        coefficients, peak_qdot, qddot = hermite_profile(q, dq * s_dot[:, None], seg_times)
+        ratio = np.maximum(np.max(np.abs(qddot) / a, axis=(1, 2)), np.max(peak_qdot / v, axis=1) ** 2)
+        if ratio.max() <= 1.0 + refine_tol or refinement == max_refinements:
+            break
+        # Accelerations scale like x (1/time²): lower the caps at both ends of the segments over
+        node_ratio = np.maximum(np.append(ratio, 1.0), np.insert(ratio, 0, 1.0))
+        x_max = np.minimum(x_max, x / np.maximum(node_ratio, 1.0))
+
+    if ratio.max() > 1.0:
+        # Uniform stretch by λ divides speeds by λ and accelerations by λ²
+        stretch = np.sqrt(ratio.max())
+        s_dot /= stretch
+        seg_times *= stretch
+        coefficients, _, _ = hermite_profile(q, dq * s_dot[:, None], seg_times)
+    node_times = np.concatenate(([0.0], np.cumsum(seg_times)))
+
+    n_joints = q.shape[1]
+    profile = PiecewisePolynomial(np.broadcast_to(node_times, (n_joints, len(node_times))),
+                                  coefficients.transpose(1, 0, 2))
+    return {
+        "profile": profile,
+        "s": s,
+        "q": q,
+        "s_dot": s_dot,
+        "node_times": node_times,
+        "total_time": float(node_times[-1]),
+        "reachable": reachable,
+    }
+
+def smoothstep_peaks(points, duration, max_speeds, max_accels, arm=None, mu=0.0):
+    """
+    Peak joint speed and acceleration, as fractions of the limits, of the
+    firmware's smoothstep timing s(t) = L·(3τ² - 2τ³) over duration.
+
+    Returns:
+        speed_ratio, accel_ratio: (3,) arrays, above 1 where a limit is exceeded
+    """
+    arm = ArmModel.load() if arm is None else arm
+    s, q, dq, ddq, reachable = path_joint_derivatives(points, arm, mu)
+    tau = s / s[-1]
+    s_dot = s[-1] * 6.0 * tau * (1.0 - tau) / duration
+    s_ddot = s[-1] * 6.0 * (1.0 - 2.0 * tau) / duration**2
+    qdot = dq * s_dot[:, None]
+    qddot = ddq * s_dot[:, None] ** 2 + dq * s_ddot[:, None]
+    return np.abs(qdot).max(axis=0) / max_speeds, np.abs(qddot).max(axis=0) / max_accels
+
+
+if __name__ == "__main__":
+    from dataclasses import replace
+    import matplotlib.pyplot as plt
+
+    # Initialisation (firmware limits, config.cpp; its IK ignores the gripper)
+
+    joints_names = ['theta', 'alpha', 'beta']
+    joints_max_speeds = np.array([50.0, 15.0, 15.0])   # deg/s
+    joints_max_accel  = np.array([20.0, 10.0, 10.0])   # deg/s^2
+    arm = replace(ArmModel.load(), l3=0.0)
+
+    moves = {
+        "line": line_points([300.0, 0.0, 100.0], [200.0, 150.0, 250.0]),
+        "circle": circle_points(300.0, 150.0, 50.0),
+    }
+
+    results = {}
+    for name, points in moves.items():
+        plan = parameterize_path(points, joints_max_speeds, joints_max_accel, arm)
+        if name == "line":
+            firmware_time = np.linalg.norm(plan["q"][-1] - plan["q"][0]) / FIRMWARE_LINE_SPEED
+        else:
+            firmware_time = plan["s"][-1] / FIRMWARE_CIRCLE_SPEED
+        speed_ratio, accel_ratio = smoothstep_peaks(points, firmware_time, joints_max_speeds, joints_max_accel, arm)
+        results[name] = plan
+        print(f"{name}: firmware {firmware_time:.3f} s (peak speed {speed_ratio.max():.0%}, "
+              f"peak accel {accel_ratio.max():.0%} of the limits), time-optimal {plan['total_time']:.3f} s")
+
+    # Plot
+    fig, axes = plt.subplots(len(results), 2, figsize=(12, 4 * len(results)))
+    for row, (name, plan) in enumerate(results.items()):
+        t, q, qdot = plan["profile"].sample(1e-3)
+        axes[row, 0].plot(plan["s"], plan["s_dot"])
+        axes[row, 0].set_title(f"{name} - path speed (mm/s) vs s (mm)")
+        axes[row, 0].grid(True)
+        for j in range(3):
+            axes[row, 1].plot(t, qdot[:, j] / joints_max_speeds[j], label=joints_names[j])
+        axes[row, 1].set_title(f"{name} - joint speed / limit")
+        axes[row, 1].grid(True)
+        axes[row, 1].legend()
+    plt.tight_layout(h_pad=2.0)
+    plt.show()
@@ -1,100 +1,150 @@
 import numpy as np
-import matplotlib.pyplot as plt
-
-# Initialisation
-
-n_joints = 3
-joints_names = ['theta', 'alpha', 'beta']
-joints_max_speeds = np.array([1.0, 2., 3.])   # deg/s
-joints_max_accel  = np.array([0.5, 1.0, 1.0])   # deg/s^2
-
-initial_point = np.array([0.0, 0.0, 0.0])
-final_point   = np.array([-10.0, 15.0, 5.0])
-
-distances = np.abs(final_point - initial_point)
-
-# Synchronized time calculation
-
-min_times = np.zeros(n_joints)
-for j in range(n_joints):
-    d = distances[j]
-    vmax = joints_max_speeds[j]
-    a = joints_max_accel[j]
-    d_min_trap = vmax**2 / a
-    if d >= d_min_trap:
-        t = d / vmax + vmax / a
-    else:
-        t = 2 * np.sqrt(d / a)
-    min_times[j] = t
-
-T = np.max(min_times)
-
-# Solve for speed
-t_acc = np.zeros(n_joints)
-t_cru = np.zeros(n_joints)
-t_dec = np.zeros(n_joints)
-v_peak = np.zeros(n_joints)
-
-for j in range(n_joints):
-    d = distances[j]
-    a = joints_max_accel[j]
-
-    delta = (a * T) ** 2 - 4 * a * d
-    if -1e-9 < delta < 0: delta = 0.0 # numerical tolerance
-
-    v = (a * T - np.sqrt(delta)) / 2.0
-    t_a = v / a
-    t_c = T - 2.0 * t_a
-
-    # numerical tolerance
-    if t_c < 0 and t_c > -1e-9: t_c = 0.0
-    if v < 0 and v > -1e-9: v = 0.0
-
-    t_acc[j] = t_a
-    t_cru[j] = t_c
-    t_dec[j] = t_a
-    v_peak[j] = v
-
-# Build profiles (simple forward integration)
-dt = 0.01
-times = np.arange(0, T + dt, dt)
-vel = np.zeros((n_joints, len(times)))
-pos = np.zeros((n_joints, len(times)))
-
-for j in range(n_joints):
-    direction = np.sign(final_point[j] - initial_point[j]) if final_point[j] != initial_point[j] else 1.0
-    a = joints_max_accel[j]
-    v = v_peak[j]
-    t_a = t_acc[j]
-    t_c = t_cru[j]
-    t_d_start = t_a + t_c
-    for i, t in enumerate(times):
-        if t < t_a:
-            vel_val = a * t
-        elif t < t_d_start:
-            vel_val = v
-        else:
-            vel_val = a * max(0.0, T - t)
-        vel[j, i] = vel_val * direction
-    pos[j] = initial_point[j] + np.cumsum(vel[j] * dt)
-
-# Diagnostics
-final_positions = pos[:, -1]
-errors = final_positions - final_point
-print("T (synchronized) =", T)
-for j in range(n_joints):
-    print(f"Joint {j} ({joints_names[j]}): d={distances[j]:.6f}, a={joints_max_accel[j]:.6f}")
-    print(f"  v_peak={v_peak[j]:.6f}, t_acc={t_acc[j]:.6f}, t_cru={t_cru[j]:.6f}, final_pos={final_positions[j]:.6f}, error={errors[j]:.6e}")
-
-# Plot
-fig, axes = plt.subplots(n_joints, 2, figsize=(12, 4 * n_joints))
-for j in range(n_joints):
-    axes[j, 0].plot(times, vel[j])
-    axes[j, 0].set_title(f"{joints_names[j]} - Velocity (peak {v_peak[j]:.3f})")
-    axes[j, 0].grid(True)
-    axes[j, 1].plot(times, pos[j])
-    axes[j, 1].axhline(final_point[j], color='k', linestyle='--', linewidth=0.8)
-    axes[j, 1].set_title(f"{joints_names[j]} - Position (final {final_positions[j]:.3f})")
-    axes[j, 1].grid(True)
-plt.tight_layout(h_pad=2.0)  # Increase vertical gap between graphs
-plt.show()
+from segments import PiecewisePolynomial
+
+def synchronized_times(distances, max_speeds, max_accels):
+    """
+    Synchronized trapezoidal timing, same math as calculate_interpolation in
+    the firmware (Arduino/RoboticArm/src/trajectory.cpp).
+
+    Every joint gets the duration T of the slowest one and the lowest peak
+    speed that reaches its distance in T with its acceleration.
+
+    Args:
+        distances: (n_joints,) absolute joint distances
+        max_speeds, max_accels: (n_joints,) joint limits (same units, per s and per s²)
+        Leading dimensions broadcast, see plan_moves for batches of moves.
+
+    Returns:
+        T: synchronized duration (s)
+        v_peak, t_acc, t_cru: (n_joints,) peak speed, acceleration and cruise durations
+    """
+    d = np.abs(np.asarray(distances, dtype=float))
+    vmax = np.asarray(max_speeds, dtype=float)
+    a = np.asarray(max_accels, dtype=float)
+
+    # Minimal time per joint: triangle below vmax²/a, trapezoid above
+    min_times = np.where(d < vmax**2 / a, 2 * np.sqrt(d / a), d / vmax + vmax / a)
+    T = np.max(min_times, axis=-1, keepdims=True)
+
+    delta = np.maximum((a * T) ** 2 - 4 * a * d, 0.0)  # numerical tolerance
+    v_peak = np.maximum((a * T - np.sqrt(delta)) / 2.0, 0.0)
+    t_acc = v_peak / a
+    t_cru = np.maximum(T - 2.0 * t_acc, 0.0)
+    return T[..., 0], v_peak, t_acc, t_cru
+
+def plan_moves(starts, goals, max_speeds, max_accels, periods=None):
+    """
+    Plan many synchronized trapezoidal moves in one vectorized call.
+
+    Args:
+        starts, goals: (M, n_joints) joint positions
+        max_speeds, max_accels: (n_joints,) or (M, n_joints) joint limits
+        periods: optional (n_joints,) period of revolute joints without
+            stops (e.g. [360, 0, 0] for theta in degrees). Those joints take
+            the shortest way round, like the theta handling in readSerial.
+            0 means no wrapping.
+
+    Returns:
+        dict of arrays:
+            duration: (M,) synchronized move times
+            goal: (M, n_joints) goals after wrapping
+            v_peak, t_acc, t_cru: (M, n_joints) phase parameters
+            t_dec: (M, n_joints) start of the deceleration phase (t_acc + t_cru)
+    """
+    starts = np.asarray(starts, dtype=float)
+    goals = np.asarray(goals, dtype=float)
+    delta = goals - starts
+    if periods is not None:
+        periods = np.asarray(periods, dtype=float)
+        wrapped = periods > 0
+        period = np.where(wrapped, periods, 1.0)
+        delta = np.where(wrapped, (delta + period / 2.0) % period - period / 2.0, delta)
+
+    T, v_peak, t_acc, t_cru = synchronized_times(delta, max_speeds, max_accels)
+    return {
+        "duration": T,
+        "goal": starts + delta,
+        "v_peak": v_peak,
+        "t_acc": t_acc,
+        "t_cru": t_cru,
+        "t_dec": t_acc + t_cru,
+    }
+
+def trapezoid_profile(initial_point, final_point, max_speeds, max_accels):
+    """
+    Synchronized trapezoidal point-to-point move as exact piecewise polynomials.
+
+    Args:
+        initial_point, final_point: (n_joints,) joint positions
+        max_speeds, max_accels: (n_joints,) joint limits
+
+    Returns:
+        PiecewisePolynomial with 3 quadratic segments per joint
+        (acceleration, cruise, deceleration)
+    """
+    q0 = np.asarray(initial_point, dtype=float)
+    q1 = np.asarray(final_point, dtype=float)
+    a = np.asarray(max_accels, dtype=float)
+    T, v, t_acc, t_cru = synchronized_times(q1 - q0, max_speeds, a)
+    direction = np.where(q1 >= q0, 1.0, -1.0)
+    a = np.where(v > 0, a, 0.0)  # joints that do not move have empty ramps
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q_acc = q0 + direction * np.where(v > 0, v**2 / (2.0 * a), 0.0)  # last_acceleration_angle
+    q_cru = q_acc + direction * v * t_cru      # last_cruising_angle
+    zero = np.zeros_like(q0)
+
+    breaks = np.stack([zero, t_acc, t_acc + t_cru, np.full_like(q0, T)], axis=-1)
+    coefficients = np.stack([
+        np.stack([q0, zero, direction * a / 2.0], axis=-1),              # acceleration
+        np.stack([q_acc, direction * v, zero], axis=-1),                  # cruise
+        np.stack([q_cru, direction * v, -direction * a / 2.0], axis=-1),  # deceleration
+    ], axis=-2)
+    return PiecewisePolynomial(breaks, coefficients)
+
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # Initialisation
+
+    n_joints = 3
+    joints_names = ['theta', 'alpha', 'beta']
+    joints_max_speeds = np.array([1.0, 2., 3.])   # deg/s
+    joints_max_accel  = np.array([0.5, 1.0, 1.0])   # deg/s^2
+
+    initial_point = np.array([0.0, 0.0, 0.0])
+    final_point   = np.array([-10.0, 15.0, 5.0])
+
+    distances = np.abs(final_point - initial_point)
+
+    # Synchronized profile
+    T, v_peak, t_acc, t_cru = synchronized_times(distances, joints_max_speeds, joints_max_accel)
+    profile = trapezoid_profile(initial_point, final_point, joints_max_speeds, joints_max_accel)
+
+    # Exact evaluation
+    dt = 0.01
+    times = np.arange(0, T + dt, dt)
+    pos = profile.position(times).T
+    vel = profile.velocity(times).T
+
+    # Diagnostics
+    final_positions = profile.position(T)
+    errors = final_positions - final_point
+    print("T (synchronized) =", T)
+    for j in range(n_joints):
+        print(f"Joint {j} ({joints_names[j]}): d={distances[j]:.6f}, a={joints_max_accel[j]:.6f}")
+        print(f"  v_peak={v_peak[j]:.6f}, t_acc={t_acc[j]:.6f}, t_cru={t_cru[j]:.6f}, final_pos={final_positions[j]:.6f}, error={errors[j]:.6e}")
+
+    # Plot
+    fig, axes = plt.subplots(n_joints, 2, figsize=(12, 4 * n_joints))
+    for j in range(n_joints):
+        axes[j, 0].plot(times, vel[j])
+        axes[j, 0].set_title(f"{joints_names[j]} - Velocity (peak {v_peak[j]:.3f})")
+        axes[j, 0].grid(True)
+        axes[j, 1].plot(times, pos[j])
+        axes[j, 1].axhline(final_point[j], color='k', linestyle='--', linewidth=0.8)
+        axes[j, 1].set_title(f"{joints_names[j]} - Position (final {final_positions[j]:.3f})")
+        axes[j, 1].grid(True)
+    plt.tight_layout(h_pad=2.0)  # Increase vertical gap between graphs
+    plt.show()
@@ -0,0 +1,57 @@
+import numpy as np
+
+def bisect_boundaries(mask_fn, angles, mu_values, r_max, tol=0.01, n_coarse=128):
+    """
+    Find the inner and outer workspace boundary along every ray at once.
+
+    Each ray (angle, mu) is first sampled at n_coarse radii to find the first
+    and last reachable sample, then both crossings are refined by bisection
+    on all rays simultaneously. This assumes a single reachable interval per
+    ray, finer than the coarse step (r_max / n_coarse).
+
+    Args:
+        mask_fn: vectorized reachability test mask_fn(x, z, mu)
+        angles: (N,) ray angles in the x-z plane (radians)
+        mu_values: (M,) end effector orientations (radians)
+        r_max: search radius, must lie outside the workspace
+        tol: boundary precision (mm)
+        n_coarse: number of coarse samples per ray
+
+    Returns:
+        r_inner, r_outer: (M, N) boundary radii (r_inner is 0 when the origin is reachable)
+        valid: (M, N) boolean mask of rays that hit the workspace
+    """
+    angles = np.asarray(angles, dtype=float)
+    mu = np.atleast_1d(np.asarray(mu_values, dtype=float))[:, None]
+    cos_a, sin_a = np.cos(angles), np.sin(angles)
+
+    def reachable(r):
+        # r is (M, N) during bisection
+        return mask_fn(r * cos_a, r * sin_a, mu)
+
+    # Coarse sampling, shape (M, N, n_coarse)
+    step = r_max / (n_coarse - 1)
+    radii = np.arange(n_coarse) * step
+    samples = mask_fn(radii * cos_a[:, None], radii * sin_a[:, None], mu[..., None])
+    valid = samples.any(axis=-1)
+    first = np.argmax(samples, axis=-1)
+    last = n_coarse - 1 - np.argmax(samples[..., ::-1], axis=-1)
+
+    # Bisection brackets: [unreachable, reachable] for the inner crossing,
+    # [reachable, unreachable] for the outer one
+    in_lo, in_hi = (first - 1) * step, first * step
+    out_lo, out_hi = last * step, (last + 1) * step
+    iterations = max(0, int(np.ceil(np.log2(step / tol))))
+    for _ in range(iterations):
+        in_mid = 0.5 * (in_lo + in_hi)
+        out_mid = 0.5 * (out_lo + out_hi)
+        hit_in = reachable(in_mid)
+        hit_out = reachable(out_mid)
+        in_hi = np.where(hit_in, in_mid, in_hi)
+        in_lo = np.where(hit_in, in_lo, in_mid)
+        out_lo = np.where(hit_out, out_mid, out_lo)
+        out_hi = np.where(hit_out, out_hi, out_mid)
+
+    r_inner = np.where(first == 0, 0.0, in_hi)
+    r_outer = out_lo
+    return np.where(valid, r_inner, np.nan), np.where(valid, r_outer, np.nan), valid
@@ -0,0 +1,55 @@
+import numpy as np
+
+def grid_axes(x_range, z_range, resolution, dtype=np.float64):
+    """
+    Sample axes of a workspace grid.
+
+    Args:
+        x_range: tuple (x_min, x_max)
+        z_range: tuple (z_min, z_max)
+        resolution: number of points per dimension, or a tuple (nx, nz)
+        dtype: np.float64 or np.float32
+
+    Returns:
+        x_vals, z_vals: 1D arrays
+    """
+    nx, nz = (resolution, resolution) if np.isscalar(resolution) else resolution
+    x_vals = np.linspace(x_range[0], x_range[1], nx, dtype=dtype)
+    z_vals = np.linspace(z_range[0], z_range[1], nz, dtype=dtype)
+    return x_vals, z_vals
+
+def compute_dtype(*arrays, dtype=None):
+    """
+    Float type to evaluate with: dtype if given, float32 when every input is
+    a float32 array (e.g. from grid_axes(..., dtype=np.float32)), float64
+    otherwise, Python scalars included.
+    """
+    if dtype is not None:
+        return np.dtype(dtype).type
+    if all(isinstance(a, np.ndarray) and a.dtype == np.float32 for a in arrays):
+        return np.float32
+    return np.float64
+
+def evaluate_on_grid(func, x_vals, z_vals, out_dtype=bool, chunk_size=2**21):
+    """
+    Evaluate func(X, Z) over the x-z grid in blocks of rows.
+
+    func receives broadcastable (rows, 1) and (1, nx) arrays and must return a
+    (rows, nx) array. Only one block of temporaries is alive at a time, so memory
+    stays bounded by chunk_size elements whatever the grid size.
+
+    Returns:
+        (nz, nx) array of type out_dtype, row i corresponds to z_vals[i]
+    """
+    nx, nz = len(x_vals), len(z_vals)
+    out = np.empty((nz, nx), dtype=out_dtype)
+    rows = max(1, int(chunk_size) // max(nx, 1))
+    X = x_vals[None, :]
+    for start in range(0, nz, rows):
+        stop = min(start + rows, nz)
+        out[start:stop] = func(X, z_vals[start:stop, None])
+    return out
+
+def meshgrid(x_vals, z_vals):
+    """Read-only X, Z meshgrid views for plotting, without copying the axes."""
+    return np.meshgrid(x_vals, z_vals, copy=False)
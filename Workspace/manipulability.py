@@ -0,0 +1,151 @@
+import os, sys
+from pathlib import Path
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+from grid import grid_axes, evaluate_on_grid
+from reachability_map import planar_reachability, CACHE_DIR
+
+
+def position_jacobian(angles, arm):
+    """
+    (N, 3, 3) Jacobian of (x, y, z) with respect to (theta, alpha, beta) at a
+    fixed tool orientation, gamma following alpha (gamma_dot = alpha_dot).
+    """
+    J = arm.jacobian(angles)
+    Jp = J[..., :3, :3].copy()
+    Jp[..., :, 1] += J[..., :3, 3]
+    return Jp
+
+def _planar_jacobian(x, z, mu, arm):
+    """Jp and the reachability mask from a single IK solve."""
+    x, z = np.broadcast_arrays(x, z)
+    ik = arm.inverse_kinematics(x, np.zeros_like(x), z, mu=mu)
+    return position_jacobian(ik[0], arm), planar_reachability(x, z, mu, arm, ik)
+
+def manipulability(x, z, mu=0, arm=None):
+    """Yoshikawa manipulability sqrt(det(Jp Jp^T)) = |det Jp| in the x-z plane, NaN outside the workspace."""
+    arm = arm or ArmModel.load()
+    Jp, reachable = _planar_jacobian(x, z, mu, arm)
+    return np.where(reachable, np.abs(np.linalg.det(Jp)), np.nan)
+
+def condition_number(x, z, mu=0, arm=None):
+    """2-norm condition number of Jp in the x-z plane, NaN outside the workspace."""
+    arm = arm or ArmModel.load()
+    Jp, reachable = _planar_jacobian(x, z, mu, arm)
+    return np.where(reachable, _condition(Jp), np.nan)
+
+def _condition(Jp):
+    singular_values = np.linalg.svd(Jp, compute_uv=False)
+    with np.errstate(divide='ignore'):
+        return singular_values[..., 0] / singular_values[..., -1]
+
+def manipulability_and_condition(x, z, mu=0, arm=None):
+    """
+    Both measures from one IK solve and reachability test.
+
+    Returns:
+        (..., 2) array of (manipulability, condition number), NaN outside the workspace
+    """
+    arm = arm or ArmModel.load()
+    Jp, reachable = _planar_jacobian(x, z, mu, arm)
+    measures = np.stack([np.abs(np.linalg.det(Jp)), _condition(Jp)], axis=-1)
+    return np.where(reachable[..., None], measures, np.nan)
+
+
+class ManipulabilityMaps:
+    """
+    Manipulability and condition-number fields over the x-z plane for a set
+    of mu values, cached as an npz file keyed by the arm fingerprint.
+    """
+
+    def __init__(self, x_vals, z_vals, mu_values, manipulability, condition):
+        self.x_vals = x_vals
+        self.z_vals = z_vals
+        self.mu_values = mu_values
+        self.manipulability = manipulability
+        self.condition = condition
+
+    @classmethod
+    def build(cls, arm=None, x_range=None, z_range=None, resolution=400, n_mu=7, chunk_size=2**18):
+        arm = arm or ArmModel.load()
+        reach = float(arm.reach[1])
+        x_vals, z_vals = grid_axes(x_range or (0, reach), z_range or (-reach, reach), resolution)
+        mu_values = np.linspace(*arm.mu_range, n_mu)
+        # One IK solve per mu and grid block for both fields
+        fields = np.stack([evaluate_on_grid(lambda X, Z: manipulability_and_condition(X, Z, mu, arm),
+                                            x_vals, z_vals, (float, 2), chunk_size)
+                           for mu in mu_values])
+        return cls(x_vals, z_vals, mu_values, fields[..., 0], fields[..., 1])
+
+    @classmethod
+    def load(cls, arm=None, cache_dir=None, resolution=400, n_mu=7):
+        """Load the cached maps for an arm, building and saving them on first use."""
+        arm = arm or ArmModel.load()
+        cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        path = cache_dir / f"manipulability_{arm.fingerprint()}_{resolution}x{n_mu}.npz"
+        if path.exists():
+            data = np.load(path)
+            return cls(data["x_vals"], data["z_vals"], data["mu_values"], data["manipulability"], data["condition"])
+        maps = cls.build(arm, resolution=resolution, n_mu=n_mu)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, x_vals=maps.x_vals, z_vals=maps.z_vals, mu_values=maps.mu_values,
+                            manipulability=maps.manipulability, condition=maps.condition)
+        return maps
+
+    def top_view(self, kind='manipulability', z=0.0, mu_index=0, xy_range=(-350, 350), resolution=300):
+        """
+        Field seen from above at height z, for the x-y overlay of GUI/graph.py.
+        The arm plane field is revolved around the base axis.
+
+        Returns:
+            (resolution, resolution) array, row i at y = linspace(*xy_range)[i]
+        """
+        field = self.manipulability if kind == 'manipulability' else self.condition
+        row = field[mu_index, np.argmin(np.abs(self.z_vals - z))]
+        xy = np.linspace(xy_range[0], xy_range[1], resolution)
+        r = np.hypot(xy[None, :], xy[:, None])
+        values = np.interp(r, self.x_vals, np.nan_to_num(row, nan=np.inf), right=np.inf)
+        return np.where(np.isfinite(values) & (r <= self.x_vals[-1]), values, np.nan)
+
+    def show_on_graph(self, widget, kind='manipulability', z=0.0, mu_index=0):
+        """Render the top view as an overlay of a CoordinateSystemWidget."""
+        xy_range = (min(widget.xmin, widget.ymin), max(widget.xmax, widget.ymax))
+        values = self.top_view(kind, z, mu_index, xy_range)
+        if kind != 'manipulability':
+            values = np.log10(values)
+        widget.set_overlay(values, xy_range[0], xy_range[1], xy_range[0], xy_range[1])
+
+    def plot(self, mu_index=None):
+        """Heatmaps of both fields for each mu (or a single mu_index)."""
+        import matplotlib.pyplot as plt
+
+        indices = range(len(self.mu_values)) if mu_index is None else [mu_index]
+        fig, axes = plt.subplots(len(indices), 2, figsize=(12, 5 * len(indices)), squeeze=False)
+        extent = [self.x_vals[0], self.x_vals[-1], self.z_vals[0], self.z_vals[-1]]
+        for row, k in enumerate(indices):
+            mu_deg = np.degrees(self.mu_values[k])
+            im = axes[row, 0].imshow(self.manipulability[k], origin='lower', extent=extent, cmap='viridis')
+            fig.colorbar(im, ax=axes[row, 0], label='|det J| (mm³/rad³)')
+            axes[row, 0].set_title(f"Manipulabilité, μ={mu_deg:.0f}°")
+            im = axes[row, 1].imshow(np.log10(self.condition[k]), origin='lower', extent=extent, cmap='magma_r')
+            fig.colorbar(im, ax=axes[row, 1], label='log10(cond J)')
+            axes[row, 1].set_title(f"Conditionnement, μ={mu_deg:.0f}°")
+            for ax in axes[row]:
+                ax.set_xlabel('X (mm)')
+                ax.set_ylabel('Z (mm)')
+        plt.tight_layout()
+        plt.show()
+
+
+#test
+if __name__ == "__main__":
+    import time
+    start = time.time()
+    maps = ManipulabilityMaps.load()
+    print(f"Maps loaded in {time.time() - start:.3f} s, shape {maps.manipulability.shape}")
+    k = int(np.argmin(np.abs(maps.mu_values)))
+    best = np.unravel_index(np.nanargmin(maps.condition[k]), maps.condition[k].shape)
+    print(f"Best conditioned point at μ={np.degrees(maps.mu_values[k]):.0f}°: "
+          f"x={maps.x_vals[best[1]]:.0f} z={maps.z_vals[best[0]]:.0f} mm")
+    maps.plot(k)
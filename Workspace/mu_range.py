@@ -0,0 +1,164 @@
+import os, sys
+from pathlib import Path
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+from reachability_map import planar_reachability, CACHE_DIR
+
+
+class MuRangeTable:
+    """
+    Inverse-reachability table: for each cell of an (r, z) grid, the interval
+    [mu_min, mu_max] of end effector orientations that satisfy the workspace
+    constraints and joint limits (NaN where no orientation works).
+
+    Where the feasible set has gaps, the longest interval is kept. Its ends
+    are found by dense sampling refined with bisection. Both bounds are
+    stored as float16 rounded inward. A query takes the tightest bounds of
+    the four surrounding grid points, shrunk by margin, so the returned
+    interval stays inside the feasible one between grid points too.
+    """
+
+    def __init__(self, r_vals, z_vals, mu_lo, mu_hi, margin=np.radians(1.0)):
+        self.r_vals = r_vals
+        self.z_vals = z_vals
+        self.mu_lo = mu_lo
+        self.mu_hi = mu_hi
+        self.margin = margin
+
+    @classmethod
+    def build(cls, arm=None, resolution=300, n_mu=121, tol=1e-4):
+        """
+        Args:
+            arm: ArmModel, defaults to ArmModel.load()
+            resolution: grid points per axis
+            n_mu: coarse mu samples over the params.json mu range
+            tol: bisection precision on mu (radians)
+        """
+        arm = arm or ArmModel.load()
+        reach = float(arm.reach[1])
+        r = np.linspace(0, reach, resolution)[:, None]
+        z = np.linspace(-reach, reach, resolution)[None, :]
+        r, z = np.broadcast_arrays(r, z)
+        mu_min, mu_max = arm.mu_range
+        mu_samples = np.linspace(mu_min, mu_max, n_mu)
+
+        # Longest run of feasible coarse samples per cell: the feasible set can
+        # have gaps, keeping one run keeps the stored interval inside it
+        run = np.zeros(r.shape, dtype=int)
+        best = np.zeros(r.shape, dtype=int)
+        last = np.full(r.shape, -1)
+        for k, mu in enumerate(mu_samples):
+            ok = planar_reachability(r, z, mu, arm)
+            run = np.where(ok, run + 1, 0)
+            longer = run > best
+            best = np.where(longer, run, best)
+            last = np.where(longer, k, last)
+        first = np.where(best > 0, last - best + 1, -1)
+        feasible = best > 0
+
+        # Refine both ends by bisection between a feasible and an infeasible mu
+        step = mu_samples[1] - mu_samples[0]
+        lo_in = mu_samples[np.maximum(first, 0)]
+        lo_out = np.where(first > 0, lo_in - step, lo_in)
+        hi_in = mu_samples[np.maximum(last, 0)]
+        hi_out = np.where((last >= 0) & (last < n_mu - 1), hi_in + step, hi_in)
+        for _ in range(max(0, int(np.ceil(np.log2(step / tol))))):
+            lo_mid = 0.5 * (lo_in + lo_out)
+            hi_mid = 0.5 * (hi_in + hi_out)
+            lo_ok = planar_reachability(r, z, lo_mid, arm)
+            hi_ok = planar_reachability(r, z, hi_mid, arm)
+            lo_in, lo_out = np.where(lo_ok, lo_mid, lo_in), np.where(lo_ok, lo_out, lo_mid)
+            hi_in, hi_out = np.where(hi_ok, hi_mid, hi_in), np.where(hi_ok, hi_out, hi_mid)
+
+        # float16 rounded inward: stored lower bounds up, upper bounds down
+        mu_lo = np.where(feasible, lo_in, np.nan).astype(np.float16)
+        mu_hi = np.where(feasible, hi_in, np.nan).astype(np.float16)
+        mu_lo = np.where(mu_lo < lo_in, np.nextafter(mu_lo, np.float16(np.inf)), mu_lo)
+        mu_hi = np.where(mu_hi > hi_in, np.nextafter(mu_hi, np.float16(-np.inf)), mu_hi)
+        return cls(r[:, 0], z[0], mu_lo, mu_hi)
+
+    @classmethod
+    def load(cls, arm=None, cache_dir=None, resolution=300, n_mu=121):
+        """Load the cached table for an arm, building and saving it on first use."""
+        arm = arm or ArmModel.load()
+        cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        path = cache_dir / f"mu_range_{arm.fingerprint()}_{resolution}x{n_mu}_inward.npz"
+        if path.exists():
+            data = np.load(path)
+            return cls(data["r_vals"], data["z_vals"], data["mu_lo"], data["mu_hi"])
+        table = cls.build(arm, resolution, n_mu)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, r_vals=table.r_vals, z_vals=table.z_vals, mu_lo=table.mu_lo, mu_hi=table.mu_hi)
+        return table
+
+    def mu_range(self, x, y, z):
+        """
+        Batched feasible orientation interval.
+
+        Returns:
+            mu_lo, mu_hi: conservative bounds (radians), NaN where infeasible
+            feasible: boolean mask
+        """
+        x, y, z = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x, y, z)))
+        r = np.hypot(x, y)
+        n_r, n_z = len(self.r_vals), len(self.z_vals)
+        pos_r = (r - self.r_vals[0]) / (self.r_vals[-1] - self.r_vals[0]) * (n_r - 1)
+        pos_z = (z - self.z_vals[0]) / (self.z_vals[-1] - self.z_vals[0]) * (n_z - 1)
+        inside = (pos_r >= 0) & (pos_r <= n_r - 1) & (pos_z >= 0) & (pos_z <= n_z - 1)
+        i_r = np.clip(np.nan_to_num(pos_r).astype(np.intp), 0, n_r - 2)
+        i_z = np.clip(np.nan_to_num(pos_z).astype(np.intp), 0, n_z - 2)
+
+        def corners(table):
+            # (4, ...) bounds at the cell corners, NaN where a corner is infeasible
+            table = table.astype(np.float64)
+            return np.stack([table[i_r, i_z], table[i_r + 1, i_z], table[i_r, i_z + 1], table[i_r + 1, i_z + 1]])
+
+        # NaN propagates through max/min, so any infeasible corner rejects the query
+        mu_lo = np.where(inside, np.max(corners(self.mu_lo), axis=0) + self.margin, np.nan)
+        mu_hi = np.where(inside, np.min(corners(self.mu_hi), axis=0) - self.margin, np.nan)
+        feasible = np.isfinite(mu_lo) & np.isfinite(mu_hi) & (mu_lo <= mu_hi)
+        return mu_lo, mu_hi, feasible
+
+    def clamp(self, x, y, z, mu):
+        """
+        Closest feasible orientation to mu for each target.
+
+        Returns:
+            mu: clamped orientation (radians), unchanged where infeasible
+            feasible: boolean mask of targets with a feasible orientation
+        """
+        mu_lo, mu_hi, feasible = self.mu_range(x, y, z)
+        mu = np.asarray(mu, dtype=float)
+        clamped = np.clip(mu, np.where(feasible, mu_lo, -np.inf), np.where(feasible, mu_hi, np.inf))
+        return clamped, feasible
+
+    def suggest(self, x, y, z):
+        """Middle of the feasible interval, the orientation with the most margin."""
+        mu_lo, mu_hi, feasible = self.mu_range(x, y, z)
+        return 0.5 * (mu_lo + mu_hi), feasible
+
+
+#test
+if __name__ == "__main__":
+    import time
+    start = time.time()
+    table = MuRangeTable.load()
+    print(f"Table loaded in {time.time() - start:.3f} s, shape {table.mu_lo.shape}, "
+          f"{table.mu_lo.nbytes + table.mu_hi.nbytes} bytes")
+    mu_lo, mu_hi, feasible = table.mu_range(300, 0, 100)
+    print(f"Target (300, 0, 100): μ ∈ [{np.degrees(mu_lo):.1f}°, {np.degrees(mu_hi):.1f}°]")
+    mu, feasible = table.clamp(300, 0, 100, np.radians(-90))
+    print(f"μ=-90° clamped to {np.degrees(mu):.1f}°")
+
+    # Returned orientations must be reachable: check against planar_reachability
+    arm = ArmModel.load()
+    rng = np.random.default_rng(0)
+    reach = float(arm.reach[1])
+    r = rng.uniform(0, reach, 200000)
+    z = rng.uniform(-reach, reach, 200000)
+    for name, (mu, feasible) in (("clamp to -90°", table.clamp(r, 0, z, np.radians(-90))),
+                                 ("clamp to +30°", table.clamp(r, 0, z, np.radians(30))),
+                                 ("suggest", table.suggest(r, 0, z))):
+        bad = feasible & ~planar_reachability(r, z, np.where(feasible, mu, 0.0), arm)
+        print(f"{name}: {feasible.sum()} feasible targets, {bad.sum()} unreachable results")
@@ -0,0 +1,209 @@
+import json
+import os, sys
+from pathlib import Path
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+from kinematics import within_limits  # type: ignore
+import real_workspace
+
+CACHE_DIR = Path(__file__).parent / "cache"
+
+
+def planar_reachability(r, z, mu, arm, ik=None):
+    """
+    Reachability in the arm plane: real_workspace constraints plus the
+    alpha/beta limits of the model. gamma is not checked, its params.json
+    range does not follow the IK convention (gamma = mu + alpha).
+
+    ik: (angles, reachable) of arm.inverse_kinematics at (r, 0, z, mu) when
+    the caller already has them, solved here otherwise.
+    """
+    limits = np.array(arm.limits)
+    limits[[0, 3]] = [-np.inf, np.inf]
+    angles, reachable = ik if ik is not None else arm.inverse_kinematics(r, np.zeros_like(r), z, mu=mu)
+    return real_workspace.reachable_mask(r, z, mu, arm) & reachable & within_limits(angles, limits)
+
+
+class ReachabilityMap:
+    """
+    Precomputed, bit-packed reachability volume over (theta, r, z, mu).
+
+    The volume is sampled on a regular grid and queried with a nearest-cell
+    lookup, so a query costs a few array indexing operations whatever the
+    batch size. theta only enters through its joint limit, so the (r, z, mu)
+    bits, packed along the mu axis, are stored once and combined with a
+    per-bin theta mask. Maps are cached on disk keyed by the arm fingerprint
+    and the grid, and loaded memory-mapped.
+    """
+
+    def __init__(self, bits, spec):
+        self.bits = bits
+        self.spec = spec
+        self.n_theta, self.n_r, self.n_z, self.n_mu = spec["shape"]
+        self.theta_ok = np.asarray(spec["theta_ok"], dtype=bool)
+        self.r_range = spec["r_range"]
+        self.z_range = spec["z_range"]
+        self.mu_range = spec["mu_range"]
+        self._dr = (self.r_range[1] - self.r_range[0]) / max(self.n_r - 1, 1)
+        self._dz = (self.z_range[1] - self.z_range[0]) / max(self.n_z - 1, 1)
+        self._dmu = (self.mu_range[1] - self.mu_range[0]) / max(self.n_mu - 1, 1)
+
+    @staticmethod
+    def grid_spec(arm, n_theta=72, n_r=256, n_z=256, n_mu=64):
+        reach = arm.reach[1]
+        # theta only enters through its joint limit, evaluated at the bin centers
+        theta = (np.arange(n_theta) + 0.5) * 2*np.pi / n_theta
+        theta_ok = within_limits(
+            np.stack([theta, np.zeros_like(theta), np.zeros_like(theta), np.zeros_like(theta)], axis=-1),
+            np.array([arm.limits[0]] + [[-np.inf, np.inf]] * 3))
+        return {
+            "fingerprint": arm.fingerprint(),
+            "shape": [n_theta, n_r, n_z, n_mu],
+            "r_range": [0.0, float(reach)],
+            "z_range": [-float(reach), float(reach)],
+            "mu_range": [float(v) for v in arm.mu_range],
+            "theta_ok": theta_ok.tolist(),
+        }
+
+    @staticmethod
+    def bits_shape(spec):
+        """Shape of the stored (r, z, packed mu) bit array."""
+        _, n_r, n_z, n_mu = spec["shape"]
+        return (n_r, n_z, (n_mu + 7) // 8)
+
+    @classmethod
+    def build(cls, arm=None, **resolution):
+        """
+        Compute the map for an arm.
+
+        Args:
+            arm: ArmModel, defaults to ArmModel.load()
+            resolution: n_theta, n_r, n_z, n_mu grid sizes
+        """
+        arm = arm or ArmModel.load()
+        spec = cls.grid_spec(arm, **resolution)
+        _, n_r, n_z, n_mu = spec["shape"]
+        r = np.linspace(*spec["r_range"], n_r)[:, None]
+        z = np.linspace(*spec["z_range"], n_z)[None, :]
+
+        planar = np.empty((n_r, n_z, n_mu), dtype=bool)
+        for k, mu in enumerate(np.linspace(*spec["mu_range"], n_mu)):
+            planar[..., k] = planar_reachability(*np.broadcast_arrays(r, z), mu, arm)
+        return cls(np.packbits(planar, axis=-1, bitorder='little'), spec)
+
+    @classmethod
+    def load(cls, arm=None, cache_dir=None, **resolution):
+        """
+        Load the cached map for an arm, building and saving it on first use.
+        The bit volume is memory-mapped, not read into memory.
+
+        The grid follows from the arm and the resolution, which also name the
+        cache file, so only the .npy is needed; the .json written next to it
+        is a readable record of the spec. A file whose header shape does not
+        match the grid (e.g. from an older layout) is rebuilt.
+        """
+        arm = arm or ArmModel.load()
+        spec = cls.grid_spec(arm, **resolution)
+        path = cls.cache_path(spec, cache_dir)
+        if path.exists():
+            bits = np.load(path, mmap_mode='r')
+            if bits.shape == cls.bits_shape(spec):
+                return cls(bits, spec)
+        reach_map = cls.build(arm, **resolution)
+        reach_map.save(path)
+        return cls(np.load(path, mmap_mode='r'), reach_map.spec)
+
+    @staticmethod
+    def cache_path(spec, cache_dir=None):
+        cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        shape = "x".join(str(n) for n in spec["shape"])
+        return cache_dir / f"reachability_{spec['fingerprint']}_{shape}.npy"
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path, np.ascontiguousarray(self.bits))
+        with open(path.with_suffix(".json"), 'w') as f:
+            json.dump(self.spec, f, indent=4)
+
+    def _bit(self, i_r, i_z, i_mu):
+        byte = self.bits[i_r, i_z, i_mu >> 3]
+        return ((byte >> (i_mu & 7)) & 1).astype(bool)
+
+    def reachable(self, x, y, z, mu=0, conservative=False):
+        """
+        Batched reachability lookup.
+
+        The default nearest-cell lookup is approximate: within about a cell of
+        the boundary it can answer either way. With conservative=True a
+        target is only reachable when every grid node around it in (r, z, mu)
+        is, and the theta bins on both sides too, which is what planners
+        rejecting poses should use.
+
+        Args:
+            x, y, z: target coordinates (mm), broadcastable arrays
+            mu: end effector orientation (radians)
+            conservative: require all neighbouring cells to be reachable
+
+        Returns:
+            boolean array, False outside the sampled range
+        """
+        x, y, z, mu = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x, y, z, mu)))
+        r = np.hypot(x, y)
+        theta = np.arctan2(y, x) % (2*np.pi)
+
+        i_theta = np.minimum((theta * self.n_theta / (2*np.pi)).astype(np.intp), self.n_theta - 1)
+        pos_r = (r - self.r_range[0]) / self._dr
+        pos_z = (z - self.z_range[0]) / self._dz
+        pos_mu = (mu - self.mu_range[0]) / self._dmu
+
+        if not conservative:
+            i_r, i_z, i_mu = (np.rint(p).astype(np.intp) for p in (pos_r, pos_z, pos_mu))
+            inside = (
+                (i_r >= 0) & (i_r < self.n_r)
+                & (i_z >= 0) & (i_z < self.n_z)
+                & (i_mu >= 0) & (i_mu < self.n_mu)
+            )
+            i_r, i_z, i_mu = (np.where(inside, i, 0) for i in (i_r, i_z, i_mu))
+            return inside & self.theta_ok[i_theta] & self._bit(i_r, i_z, i_mu)
+
+        i_r, i_z, i_mu = (np.floor(p).astype(np.intp) for p in (pos_r, pos_z, pos_mu))
+        inside = (
+            (i_r >= 0) & (i_r < self.n_r - 1)
+            & (i_z >= 0) & (i_z < self.n_z - 1)
+            & (i_mu >= 0) & (i_mu < self.n_mu - 1)
+        )
+        i_r, i_z, i_mu = (np.where(inside, i, 0) for i in (i_r, i_z, i_mu))
+        result = inside & self.theta_ok[i_theta]
+        result &= self.theta_ok[(i_theta - 1) % self.n_theta] & self.theta_ok[(i_theta + 1) % self.n_theta]
+        for dr in (0, 1):
+            for dz in (0, 1):
+                for dmu in (0, 1):
+                    result &= self._bit(i_r + dr, i_z + dz, i_mu + dmu)
+        return result
+
+
+#test
+if __name__ == "__main__":
+    import time
+    start = time.time()
+    reach_map = ReachabilityMap.load()
+    print(f"Map loaded in {time.time() - start:.3f} s, shape {reach_map.bits.shape}")
+
+    targets = np.random.uniform(-600, 600, (100000, 3))
+    start = time.time()
+    mask = reach_map.reachable(targets[:, 0], targets[:, 1], targets[:, 2], mu=0)
+    print(f"{len(targets)} queries in {1e3 * (time.time() - start):.1f} ms, {mask.mean():.1%} reachable")
+
+    # Against the exact test, on random orientations too
+    arm = ArmModel.load()
+    mu = np.random.uniform(*arm.mu_range, len(targets))
+    r = np.hypot(targets[:, 0], targets[:, 1])
+    theta = np.arctan2(targets[:, 1], targets[:, 0])
+    exact = planar_reachability(r, targets[:, 2], mu, arm) & within_limits(
+        np.stack([theta, 0 * theta, 0 * theta, 0 * theta], axis=-1), np.array([arm.limits[0]] + [[-np.inf, np.inf]] * 3))
+    for conservative in (False, True):
+        mask = reach_map.reachable(targets[:, 0], targets[:, 1], targets[:, 2], mu=mu, conservative=conservative)
+        print(f"conservative={conservative}: {np.sum(mask & ~exact)} false positives, "
+              f"{np.sum(~mask & exact)} false negatives out of {exact.sum()} reachable")
@@ -1,12 +1,17 @@
 import numpy as np
-import matplotlib.pyplot as plt
+import argparse
+import json
 import os, sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
 from kinematics import inverse_kinematics, direct_kinematics  # type: ignore
+from arm_model import ArmModel  # type: ignore
+from grid import grid_axes, compute_dtype, evaluate_on_grid, meshgrid
+from boundary import bisect_boundaries
 
-l1 = 250
-l2 = 200
-l3 = 150
+ARM = ArmModel.load()
+l1, l2, l3 = ARM.links
 PI = np.pi
 
 def is_reachable(x, z, mu=0):
@@ -46,7 +51,40 @@ def is_reachable(x, z, mu=0):
         return False
     return True
 
-def generate_workspace_envelope(x_range, z_range, resolution=500):
+def reachable_mask(x, z, mu=0, arm=ARM, dtype=None):
+    """
+    Vectorized is_reachable: boolean array of reachable points for array
+    inputs x, z (and mu) of broadcastable shapes, with the same alpha, beta
+    and PI/2 + beta - alpha constraints.
+
+    Computed in float64, or float32 when asked with dtype or when x and z
+    are float32 arrays.
+    """
+    dtype = compute_dtype(x, z, dtype=dtype)
+    x, z = np.asarray(x, dtype=dtype), np.asarray(z, dtype=dtype)
+    c = arm.constants
+    x_adj = x - dtype(arm.l3) * np.cos(mu, dtype=dtype)
+    z_adj = z - dtype(arm.l3) * np.sin(mu, dtype=dtype)
+    r_sq = x_adj**2 + z_adj**2
+    in_range = (r_sq <= dtype(c['r_max']**2)) & (r_sq >= dtype(c['r_min']**2))
+
+    r = np.sqrt(r_sq)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        arg_a = (dtype(c['l1_sq_minus_l2_sq']) + r_sq) / (dtype(c['two_l1']) * r)
+    arg_b = (dtype(c['l1_sq_plus_l2_sq']) - r_sq) / dtype(c['two_l1_l2'])
+    a = np.arccos(np.clip(arg_a, -1, 1))
+    b = np.arccos(np.clip(arg_b, -1, 1))
+    atn = np.arctan2(z_adj, x_adj)
+    alpha = dtype(PI) - a - b - atn
+    beta = dtype(PI/2) - a - atn
+    return (
+        in_range
+        & (alpha > dtype(np.radians(-15)))
+        & (beta < dtype(np.radians(90)))
+        & (dtype(PI/2) + beta - alpha > dtype(np.radians(35)))
+    )
+
+def generate_workspace_envelope(x_range, z_range, resolution=500, mu=0, dtype=np.float64, chunk_size=2**20):
     """
     Generate the workspace envelope by testing points in the x-z plane.
     
@@ -54,58 +92,134 @@ def generate_workspace_envelope(x_range, z_range, resolution=500):
         x_range: tuple (x_min, x_max)
         z_range: tuple (z_min, z_max)
         resolution: number of points to test in each dimension
+        mu: end effector orientation (radians)
+        dtype: np.float64, or np.float32 for large grids
+        chunk_size: number of grid points evaluated per block
     
     Returns:
         workspace_mask: 2D boolean array indicating reachable points
         X, Z: meshgrid arrays for plotting
     """
-    x_vals = np.linspace(x_range[0], x_range[1], resolution)
-    z_vals = np.linspace(z_range[0], z_range[1], resolution)
-    
-    X, Z = np.meshgrid(x_vals, z_vals)
-    workspace_mask = np.zeros_like(X, dtype=bool)
-    
-    for i in range(resolution):
-        for j in range(resolution):
-            workspace_mask[i, j] = is_reachable(X[i, j], Z[i, j])
-    
+    x_vals, z_vals = grid_axes(x_range, z_range, resolution, dtype)
+    workspace_mask = evaluate_on_grid(lambda X, Z: reachable_mask(X, Z, mu), x_vals, z_vals, chunk_size=chunk_size)
+    X, Z = meshgrid(x_vals, z_vals)
     return workspace_mask, X, Z
 
-def find_boundary_points(mu, resolution=1000):
+def find_boundaries(mu_values, resolution=1000, tol=0.01):
     """
-    Find the exact boundary points of the workspace envelope for a given mu.
-    Uses polar coordinates for more accurate boundary detection.
+    Find the inner and outer boundary points of the workspace for several mu values at once.
+    Uses polar coordinates, all rays are bisected simultaneously.
+
+    Args:
+        mu_values: (M,) end effector orientations (radians)
+        resolution: number of rays between -PI/2 and PI/2
+        tol: boundary precision (mm)
+
+    Returns:
+        inner, outer: (M, resolution, 2) boundary points (x, z)
+        valid: (M, resolution) mask of rays that hit the workspace
     """
     # Only consider angles that produce x > 0
     angles = np.linspace(-PI/2, PI/2, resolution)
-    boundary_points = []
-    
-    for angle in angles:
-        # Binary search for the maximum reachable distance at this angle
-        r_min = 0
-        r_max = l1 + l2 + l3 + 50  # Start with maximum possible reach
-        
-        while r_max - r_min > 0.1:  # Precision of 0.1 units
-            r_mid = (r_min + r_max) / 2
-            x = r_mid * np.cos(angle)
-            z = r_mid * np.sin(angle)
-            
-            if is_reachable(x, z, mu):
-                r_min = r_mid
-            else:
-                r_max = r_mid
-        
-        if r_min > 0:  # Valid boundary point found
-            x = r_min * np.cos(angle)
-            z = r_min * np.sin(angle)
-            boundary_points.append([x, z])
-    
-    return np.array(boundary_points)
+    r_max = l1 + l2 + l3 + 50  # Start with maximum possible reach
+    r_inner, r_outer, valid = bisect_boundaries(reachable_mask, angles, mu_values, r_max, tol=tol)
+    direction = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    inner = r_inner[..., None] * direction
+    outer = r_outer[..., None] * direction
+    return inner, outer, valid
+
+def find_boundary_points(mu, resolution=1000, tol=0.01):
+    """
+    Find the exact boundary points of the workspace envelope for a given mu.
+    Uses polar coordinates for more accurate boundary detection.
+    Returns the outer boundary, see find_boundaries for the inner one.
+    """
+    _, outer, valid = find_boundaries([mu], resolution, tol)
+    return outer[0][valid[0]]
+
+def sweep_mu(mu_values, resolution=1000, tol=0.01, workers=None):
+    """
+    find_boundaries over many mu values, split across a process pool.
+
+    Args:
+        mu_values: (M,) end effector orientations (radians)
+        resolution: number of rays
+        tol: boundary precision (mm)
+        workers: number of processes, None for os.cpu_count(), 1 to stay in process
+
+    Returns:
+        inner, outer, valid: as find_boundaries
+    """
+    mu_values = np.asarray(mu_values, dtype=float)
+    workers = min(workers or os.cpu_count() or 1, len(mu_values))
+    if workers <= 1:
+        return find_boundaries(mu_values, resolution, tol)
+    chunks = np.array_split(mu_values, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(find_boundaries, chunks, [resolution] * workers, [tol] * workers))
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+def export_workspace(out_dir, mu_values, inner, outer, valid, png=True, geojson=True):
+    """
+    Write a mu sweep to out_dir without any display.
 
-def visualize_workspace():
+    Files:
+        workspace.npz: mu_values, inner, outer, valid arrays
+        workspace.geojson: one polygon per mu plus their union and intersection
+        workspace.png: envelope plot (matplotlib is only imported here)
+    """
+    from workspace_polygons import mu_polygon, WorkspacePolygons
+    import shapely
+    from shapely.geometry import mapping
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(out_dir / "workspace.npz", mu_values=mu_values, inner=inner, outer=outer, valid=valid)
+
+    polygons = [mu_polygon(inner[k], outer[k], valid[k]) for k in range(len(mu_values))]
+    union = shapely.union_all(polygons)
+    intersection = shapely.intersection_all(polygons)
+
+    if geojson:
+        features = [{
+            "type": "Feature",
+            "geometry": mapping(polygon),
+            "properties": {"mu_deg": float(np.degrees(mu)), "area": polygon.area},
+        } for mu, polygon in zip(mu_values, polygons)]
+        for name, geom in (("union", union), ("intersection", intersection)):
+            features.append({
+                "type": "Feature",
+                "geometry": mapping(geom),
+                "properties": {"envelope": name, **WorkspacePolygons.statistics(geom)},
+            })
+        with open(out_dir / "workspace.geojson", 'w') as f:
+            json.dump({"type": "FeatureCollection", "features": features}, f)
+
+    if png:
+        from matplotlib.figure import Figure
+        from workspace_polygons import polygon_patch
+
+        fig = Figure(figsize=(12, 10))
+        ax = fig.add_subplot()
+        ax.add_patch(polygon_patch(union, color='lightblue', alpha=0.3, label='Union'))
+        ax.add_patch(polygon_patch(intersection, color='green', alpha=0.3, label='Intersection'))
+        for k in range(len(mu_values)):
+            ax.plot(outer[k][valid[k], 0], outer[k][valid[k], 1], '-', linewidth=1, alpha=0.3, color='blue')
+            ax.plot(inner[k][valid[k], 0], inner[k][valid[k], 1], '-', linewidth=1, alpha=0.3, color='orange')
+        ax.set_xlabel('X (mm)', fontsize=12)
+        ax.set_ylabel('Z (mm)', fontsize=12)
+        ax.set_title(f"Espace de travail: μ ∈ [{np.degrees(mu_values[0]):.0f}°, {np.degrees(mu_values[-1]):.0f}°]")
+        ax.grid(True, alpha=0.3)
+        ax.axis('equal')
+        ax.legend(loc='upper left', fontsize=10)
+        fig.tight_layout()
+        fig.savefig(out_dir / "workspace.png", dpi=120)
+
+def visualize_workspace(workers=None):
     """
     Visualize the robot workspace envelope in the x-z plane for all mu values from -90 to 90 degrees.
     """
+    import matplotlib.pyplot as plt
     print("Generating workspace envelope for mu from -90° to 90°...")
     
     # Generate mu values from -90 to 90 degrees
@@ -116,9 +230,13 @@ def visualize_workspace():
     # Collect all boundary points for all mu values
     all_points = []
     
+    print("Finding boundary points for all μ values...")
+    from workspace_polygons import WorkspacePolygons, polygon_patch
+    inner, outer, valid = sweep_mu(mu_values, resolution=300, workers=workers)
+    workspace = WorkspacePolygons.from_boundaries(mu_values, inner, outer, valid)
+    
     for i, mu in enumerate(mu_values):
-        print(f"Finding boundary points for μ = {np.degrees(mu):.1f}°...")
-        boundary_points = find_boundary_points(mu, resolution=300)
+        boundary_points = outer[i][valid[i]]
         
         if len(boundary_points) > 0:
             all_points.extend(boundary_points)
@@ -127,11 +245,11 @@ def visualize_workspace():
             ax.plot(boundary_points[:, 0], boundary_points[:, 1], 
                     '-', linewidth=1, alpha=alpha_val, color='blue')
     
-    # Fill the overall workspace region
+    # Fill the overall workspace region (union of the mu envelopes)
     if len(all_points) > 0:
         all_points = np.array(all_points)
-        ax.fill(all_points[:, 0], all_points[:, 1], 
-                color='lightblue', alpha=0.3, label='Espace atteint (μ: -90° à 90°)')
+        ax.add_patch(polygon_patch(workspace.union(), 
+                     color='lightblue', alpha=0.3, label='Espace atteint (μ: -90° à 90°)'))
     
     # Add circles showing theoretical limits
     circle_outer = plt.Circle((0, 0), l1 + l2 + l3, 
@@ -215,7 +333,32 @@ def visualize_workspace():
         print(f"  Minimum reach: {np.min(distances):.2f} mm")
         print(f"  Total boundary points sampled: {len(all_points)}")
     
+    for name, geom in (("Union", workspace.union()), ("Intersection", workspace.intersection())):
+        stats = workspace.statistics(geom)
+        print(f"\n{name} of the μ envelopes:")
+        print(f"  Area: {stats['area'] / 100:.1f} cm²")
+        print(f"  Reach: {stats['min_reach']:.2f} to {stats['max_reach']:.2f} mm")
+    
     print("="*50)
 
 if __name__ == "__main__":
-    visualize_workspace()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Workspace envelope of the arm for a sweep of mu values")
+    parser.add_argument("--headless", metavar="OUT_DIR", help="compute and export results to OUT_DIR instead of plotting")
+    parser.add_argument("--mu-min", type=float, default=-90, help="first mu value (degrees)")
+    parser.add_argument("--mu-max", type=float, default=90, help="last mu value (degrees)")
+    parser.add_argument("--n-mu", type=int, default=20, help="number of mu values")
+    parser.add_argument("--resolution", type=int, default=1000, help="number of boundary rays")
+    parser.add_argument("--tol", type=float, default=0.01, help="boundary precision (mm)")
+    parser.add_argument("--workers", type=int, default=None, help="processes for the mu sweep")
+    parser.add_argument("--no-png", action="store_true", help="skip the PNG export")
+    parser.add_argument("--no-geojson", action="store_true", help="skip the GeoJSON export")
+    args = parser.parse_args()
+
+    if args.headless:
+        mu_values = np.radians(np.linspace(args.mu_min, args.mu_max, args.n_mu))
+        inner, outer, valid = sweep_mu(mu_values, args.resolution, args.tol, args.workers)
+        export_workspace(args.headless, mu_values, inner, outer, valid,
+                         png=not args.no_png, geojson=not args.no_geojson)
+        print(f"Workspace for {args.n_mu} mu values written to {args.headless}")
+    else:
+        visualize_workspace(args.workers)
\ No newline at end of file
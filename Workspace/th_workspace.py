@@ -3,10 +3,12 @@ import matplotlib.pyplot as plt
 import os, sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
 from kinematics import inverse_kinematics, direct_kinematics  # type: ignore
+from arm_model import ArmModel  # type: ignore
+from grid import grid_axes, compute_dtype, evaluate_on_grid, meshgrid
+from boundary import bisect_boundaries
 
-l1 = 250
-l2 = 200
-l3 = 150
+ARM = ArmModel.load()
+l1, l2, l3 = ARM.links
 PI = np.pi
 
 def is_reachable(x, z, mu=-PI/4):
@@ -32,7 +34,24 @@ def is_reachable(x, z, mu=-PI/4):
     
     return True
 
-def generate_workspace_envelope(x_range, z_range, resolution=500):
+def reachable_mask(x, z, mu=-PI/4, arm=ARM, dtype=None):
+    """
+    Vectorized is_reachable: boolean array of reachable points for array
+    inputs x, z (and mu) of broadcastable shapes.
+
+    Computed in float64, or float32 when asked with dtype or when x and z
+    are float32 arrays.
+    """
+    dtype = compute_dtype(x, z, dtype=dtype)
+    x, z = np.asarray(x, dtype=dtype), np.asarray(z, dtype=dtype)
+    c = arm.constants
+    x_adj = x - dtype(arm.l3) * np.cos(mu, dtype=dtype)
+    z_adj = z - dtype(arm.l3) * np.sin(mu, dtype=dtype)
+    r_sq = x_adj**2 + z_adj**2
+    # Same bounds as is_reachable, |arg_a| <= 1 and |arg_b| <= 1 follow from them
+    return (r_sq <= dtype(c['r_max']**2)) & (r_sq >= dtype(c['r_min']**2))
+
+def generate_workspace_envelope(x_range, z_range, resolution=500, mu=-PI/4, dtype=np.float64, chunk_size=2**21):
     """
     Generate the workspace envelope by testing points in the x-z plane.
     
@@ -40,53 +59,50 @@ def generate_workspace_envelope(x_range, z_range, resolution=500):
         x_range: tuple (x_min, x_max)
         z_range: tuple (z_min, z_max)
         resolution: number of points to test in each dimension
+        mu: end effector orientation (radians)
+        dtype: np.float64, or np.float32 for large grids
+        chunk_size: number of grid points evaluated per block
     
     Returns:
         workspace_mask: 2D boolean array indicating reachable points
         X, Z: meshgrid arrays for plotting
     """
-    x_vals = np.linspace(x_range[0], x_range[1], resolution)
-    z_vals = np.linspace(z_range[0], z_range[1], resolution)
-    
-    X, Z = np.meshgrid(x_vals, z_vals)
-    workspace_mask = np.zeros_like(X, dtype=bool)
-    
-    for i in range(resolution):
-        for j in range(resolution):
-            workspace_mask[i, j] = is_reachable(X[i, j], Z[i, j])
-    
+    x_vals, z_vals = grid_axes(x_range, z_range, resolution, dtype)
+    workspace_mask = evaluate_on_grid(lambda X, Z: reachable_mask(X, Z, mu), x_vals, z_vals, chunk_size=chunk_size)
+    X, Z = meshgrid(x_vals, z_vals)
     return workspace_mask, X, Z
 
-def find_boundary_points(resolution=1000):
+def find_boundaries(mu_values, resolution=1000, tol=0.01):
     """
-    Find the exact boundary points of the workspace envelope.
-    Uses polar coordinates for more accurate boundary detection.
+    Find the inner and outer boundary points of the workspace for several mu values at once.
+    Uses polar coordinates, all rays are bisected simultaneously.
+
+    Args:
+        mu_values: (M,) end effector orientations (radians)
+        resolution: number of rays between -PI/2 and PI/2
+        tol: boundary precision (mm)
+
+    Returns:
+        inner, outer: (M, resolution, 2) boundary points (x, z)
+        valid: (M, resolution) mask of rays that hit the workspace
     """
     # Only consider angles that produce x > 0
     angles = np.linspace(-PI/2, PI/2, resolution)
-    boundary_points = []
-    
-    for angle in angles:
-        # Binary search for the maximum reachable distance at this angle
-        r_min = 0
-        r_max = l1 + l2 + l3 + 50  # Start with maximum possible reach
-        
-        while r_max - r_min > 0.1:  # Precision of 0.1 units
-            r_mid = (r_min + r_max) / 2
-            x = r_mid * np.cos(angle)
-            z = r_mid * np.sin(angle)
-            
-            if is_reachable(x, z):
-                r_min = r_mid
-            else:
-                r_max = r_mid
-        
-        if r_min > 0:  # Valid boundary point found
-            x = r_min * np.cos(angle)
-            z = r_min * np.sin(angle)
-            boundary_points.append([x, z])
-    
-    return np.array(boundary_points)
+    r_max = l1 + l2 + l3 + 50  # Start with maximum possible reach
+    r_inner, r_outer, valid = bisect_boundaries(reachable_mask, angles, mu_values, r_max, tol=tol)
+    direction = np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    inner = r_inner[..., None] * direction
+    outer = r_outer[..., None] * direction
+    return inner, outer, valid
+
+def find_boundary_points(resolution=1000, mu=-PI/4, tol=0.01):
+    """
+    Find the exact boundary points of the workspace envelope.
+    Uses polar coordinates for more accurate boundary detection.
+    Returns the outer boundary, see find_boundaries for the inner one.
+    """
+    _, outer, valid = find_boundaries([mu], resolution, tol)
+    return outer[0][valid[0]]
 
 def visualize_workspace(mu=-PI/4):
     """
@@ -94,7 +110,7 @@ def visualize_workspace(mu=-PI/4):
     """
     print("Generating workspace envelope...")
     print("Finding boundary points...")
-    boundary_points = find_boundary_points(resolution=500)
+    boundary_points = find_boundary_points(resolution=500, mu=mu)
     fig, ax = plt.subplots(figsize=(10, 8))
     if len(boundary_points) > 0:
         ax.fill(boundary_points[:, 0], boundary_points[:, 1], 
@@ -0,0 +1,144 @@
+import numpy as np
+import shapely
+from shapely.geometry import Point, Polygon
+from shapely.strtree import STRtree
+
+import real_workspace
+
+
+def mu_polygon(inner, outer, valid):
+    """
+    Polygon of the workspace for one mu from the boundaries of find_boundaries:
+    the outer boundary in ray order closed by the inner boundary in reverse.
+    """
+    if valid.sum() < 2:
+        return Polygon()
+    ring = np.concatenate([outer[valid], inner[valid][::-1]])
+    polygon = Polygon(ring)
+    return polygon if polygon.is_valid else shapely.make_valid(polygon).buffer(0)
+
+
+class WorkspacePolygons:
+    """
+    Exact per-mu workspace polygons in the x-z plane (theta=0, x>0) with
+    union/intersection envelopes and fast point queries.
+
+    contains() runs on a prepared union polygon, feasible_mu() uses an STRtree
+    of the per-mu polygons, both vectorized over thousands of targets.
+    """
+
+    def __init__(self, mu_values, resolution=500, tol=0.01):
+        inner, outer, valid = real_workspace.find_boundaries(np.asarray(mu_values, dtype=float), resolution, tol)
+        self._build(mu_values, inner, outer, valid)
+
+    @classmethod
+    def from_boundaries(cls, mu_values, inner, outer, valid):
+        """Polygons from boundaries already computed by find_boundaries or sweep_mu."""
+        workspace = cls.__new__(cls)
+        workspace._build(mu_values, inner, outer, valid)
+        return workspace
+
+    def _build(self, mu_values, inner, outer, valid):
+        self.mu_values = np.asarray(mu_values, dtype=float)
+        self.polygons = [mu_polygon(inner[k], outer[k], valid[k]) for k in range(len(self.mu_values))]
+        self.tree = STRtree(self.polygons)
+        self._envelopes = {}
+
+    def _select(self, mu_range):
+        if mu_range is None:
+            return self.polygons
+        lo, hi = mu_range
+        return [p for mu, p in zip(self.mu_values, self.polygons) if lo <= mu <= hi]
+
+    def union(self, mu_range=None):
+        """Points reachable with at least one mu in mu_range (radians), prepared for queries."""
+        mu_range = None if mu_range is None else tuple(mu_range)
+        key = ('union', mu_range)
+        if key not in self._envelopes:
+            geom = shapely.union_all(self._select(mu_range))
+            shapely.prepare(geom)
+            self._envelopes[key] = geom
+        return self._envelopes[key]
+
+    def intersection(self, mu_range=None):
+        """Points reachable with every mu in mu_range (radians), prepared for queries."""
+        mu_range = None if mu_range is None else tuple(mu_range)
+        key = ('intersection', mu_range)
+        if key not in self._envelopes:
+            polygons = self._select(mu_range)
+            geom = shapely.intersection_all(polygons) if polygons else Polygon()
+            shapely.prepare(geom)
+            self._envelopes[key] = geom
+        return self._envelopes[key]
+
+    def contains(self, x, z, mu_range=None, mode='union'):
+        """Vectorized point-in-workspace test against the union or intersection envelope."""
+        if mode == 'union':
+            geom = self.union(mu_range)
+        elif mode == 'intersection':
+            geom = self.intersection(mu_range)
+        else:
+            raise ValueError(f"mode must be 'union' or 'intersection', got {mode!r}")
+        return shapely.contains_xy(geom, np.asarray(x, dtype=float), np.asarray(z, dtype=float))
+
+    def feasible_mu(self, x, z):
+        """
+        Which sampled mu values reach each point.
+
+        Returns:
+            (N, M) boolean array, column k corresponds to mu_values[k]
+        """
+        points = shapely.points(np.asarray(x, dtype=float), np.asarray(z, dtype=float))
+        point_idx, poly_idx = self.tree.query(np.atleast_1d(points), predicate='within')
+        out = np.zeros((np.size(points), len(self.polygons)), dtype=bool)
+        out[point_idx, poly_idx] = True
+        return out
+
+    @staticmethod
+    def statistics(geom):
+        """Area (mm²) and minimum/maximum reach (mm) from the shoulder of a geometry."""
+        if geom.is_empty:
+            return {"area": 0.0, "min_reach": np.nan, "max_reach": np.nan}
+        origin = Point(0, 0)
+        coords = shapely.get_coordinates(geom)
+        return {
+            "area": geom.area,
+            "min_reach": 0.0 if geom.covers(origin) else geom.distance(origin),
+            "max_reach": float(np.max(np.hypot(coords[:, 0], coords[:, 1]))),
+        }
+
+
+def polygon_patch(geom, **kwargs):
+    """matplotlib patch of a (multi)polygon, holes included."""
+    from matplotlib.path import Path
+    from matplotlib.patches import PathPatch
+
+    vertices, codes = [], []
+    for polygon in getattr(geom, 'geoms', [geom]):
+        if polygon.is_empty or polygon.geom_type != 'Polygon':
+            continue
+        for ring in [polygon.exterior, *polygon.interiors]:
+            ring_coords = np.asarray(ring.coords)
+            vertices.append(ring_coords)
+            codes.append([Path.MOVETO] + [Path.LINETO] * (len(ring_coords) - 2) + [Path.CLOSEPOLY])
+    if not vertices:
+        return PathPatch(Path(np.zeros((1, 2))), **kwargs)
+    return PathPatch(Path(np.concatenate(vertices), np.concatenate(codes)), **kwargs)
+
+
+#test
+if __name__ == "__main__":
+    import time
+    mu_values = np.linspace(np.radians(-90), np.radians(90), 20)
+    start = time.time()
+    workspace = WorkspacePolygons(mu_values)
+    print(f"Polygons built in {time.time() - start:.3f} s")
+
+    for name, geom in (("union", workspace.union()), ("intersection", workspace.intersection())):
+        stats = WorkspacePolygons.statistics(geom)
+        print(f"{name}: area={stats['area']:.0f} mm², reach=[{stats['min_reach']:.1f}, {stats['max_reach']:.1f}] mm")
+
+    targets = np.random.uniform([0, -400], [600, 600], (10000, 2))
+    start = time.time()
+    inside = workspace.contains(targets[:, 0], targets[:, 1])
+    print(f"{len(targets)} point tests in {1e3 * (time.time() - start):.1f} ms, {inside.mean():.1%} inside")
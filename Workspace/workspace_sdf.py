@@ -0,0 +1,148 @@
+import json
+import os, sys
+from pathlib import Path
+import numpy as np
+from scipy.ndimage import distance_transform_edt
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'GUI'))
+from arm_model import ArmModel  # type: ignore
+from reachability_map import planar_reachability, CACHE_DIR
+
+
+class WorkspaceSDF:
+    """
+    Signed distance (mm) to the workspace boundary over the x-z plane, one
+    slice per mu bin. Positive inside the workspace (clearance to the reach
+    limit or the Rmin hole), negative outside.
+
+    Slices come from Euclidean distance transforms of the reachability mask
+    and are cached on disk like the ReachabilityMap. Queries interpolate
+    linearly in x, z and mu.
+    """
+
+    def __init__(self, field, spec):
+        self.field = field
+        self.spec = spec
+        self.n_mu, self.n_z, self.n_x = spec["shape"]
+        self.x_range = spec["x_range"]
+        self.z_range = spec["z_range"]
+        self.mu_range = spec["mu_range"]
+
+    @staticmethod
+    def grid_spec(arm, cell=2.5, n_mu=32):
+        reach = float(arm.reach[1])
+        n = int(np.ceil(reach / cell)) + 1
+        return {
+            "fingerprint": arm.fingerprint(),
+            "shape": [n_mu, 2*n - 1, n],
+            "x_range": [0.0, (n - 1) * cell],
+            "z_range": [-(n - 1) * cell, (n - 1) * cell],
+            "mu_range": [float(v) for v in arm.mu_range],
+        }
+
+    @classmethod
+    def build(cls, arm=None, **resolution):
+        """
+        Compute the distance field for an arm.
+
+        Args:
+            arm: ArmModel, defaults to ArmModel.load()
+            resolution: cell (mm) and n_mu
+        """
+        arm = arm or ArmModel.load()
+        spec = cls.grid_spec(arm, **resolution)
+        n_mu, n_z, n_x = spec["shape"]
+        x = np.linspace(*spec["x_range"], n_x)[None, :]
+        z = np.linspace(*spec["z_range"], n_z)[:, None]
+        cell = (x[0, -1] - x[0, 0]) / (n_x - 1)
+
+        field = np.empty((n_mu, n_z, n_x), dtype=np.float32)
+        for k, mu in enumerate(np.linspace(*spec["mu_range"], n_mu)):
+            mask = planar_reachability(*np.broadcast_arrays(x, z), mu, arm)
+            field[k] = (distance_transform_edt(mask, sampling=cell)
+                        - distance_transform_edt(~mask, sampling=cell))
+        return cls(field, spec)
+
+    @classmethod
+    def load(cls, arm=None, cache_dir=None, **resolution):
+        """
+        Load the cached field for an arm, building and saving it on first use.
+
+        The grid follows from the arm and the resolution, which also name the
+        cache file, so only the .npy is needed; the .json written next to it
+        is a readable record of the spec. A file whose header shape does not
+        match the grid is rebuilt.
+        """
+        arm = arm or ArmModel.load()
+        spec = cls.grid_spec(arm, **resolution)
+        path = cls.cache_path(spec, cache_dir)
+        if path.exists():
+            field = np.load(path, mmap_mode='r')
+            if field.shape == tuple(spec["shape"]):
+                return cls(field, spec)
+        sdf = cls.build(arm, **resolution)
+        sdf.save(path)
+        return cls(np.load(path, mmap_mode='r'), sdf.spec)
+
+    @staticmethod
+    def cache_path(spec, cache_dir=None):
+        cache_dir = Path(cache_dir) if cache_dir else CACHE_DIR
+        shape = "x".join(str(n) for n in spec["shape"])
+        return cache_dir / f"sdf_{spec['fingerprint']}_{shape}.npy"
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.save(path, np.ascontiguousarray(self.field))
+        with open(path.with_suffix(".json"), 'w') as f:
+            json.dump(self.spec, f, indent=4)
+
+    @staticmethod
+    def _axis(values, bounds, n):
+        """Lower cell index and interpolation weight along one axis, clamped to the grid."""
+        pos = (values - bounds[0]) / (bounds[1] - bounds[0]) * (n - 1)
+        pos = np.clip(pos, 0, n - 1)
+        i = np.minimum(pos.astype(np.intp), max(n - 2, 0))
+        return i, pos - i
+
+    def distance(self, x, y, z, mu=0):
+        """
+        Batched signed distance to the workspace boundary (mm).
+
+        Args:
+            x, y, z: target coordinates (mm), broadcastable arrays
+            mu: end effector orientation (radians), clamped to the mu range
+
+        Returns:
+            float array, positive inside the workspace. Targets outside the
+            sampled plane get the value of the nearest grid edge.
+        """
+        x, y, z, mu = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (x, y, z, mu)))
+        i_x, w_x = self._axis(np.hypot(x, y), self.x_range, self.n_x)
+        i_z, w_z = self._axis(z, self.z_range, self.n_z)
+        i_m, w_m = self._axis(mu, self.mu_range, self.n_mu) if self.n_mu > 1 else (np.zeros_like(i_x), np.zeros_like(w_x))
+
+        result = np.zeros(x.shape)
+        for dm, wm in ((0, 1 - w_m), (1, w_m)):
+            i_mu = np.minimum(i_m + dm, self.n_mu - 1)
+            for dz, wz in ((0, 1 - w_z), (1, w_z)):
+                for dx, wx in ((0, 1 - w_x), (1, w_x)):
+                    result += wm * wz * wx * self.field[i_mu, i_z + dz, i_x + dx]
+        return result
+
+    def clearance_ok(self, x, y, z, mu=0, margin=10.0):
+        """Mask of targets at least margin mm inside the workspace."""
+        return self.distance(x, y, z, mu) >= margin
+
+
+#test
+if __name__ == "__main__":
+    import time
+    start = time.time()
+    sdf = WorkspaceSDF.load()
+    print(f"SDF loaded in {time.time() - start:.3f} s, shape {sdf.field.shape}")
+
+    targets = np.random.uniform(-600, 600, (100000, 3))
+    start = time.time()
+    distance = sdf.distance(targets[:, 0], targets[:, 1], targets[:, 2], mu=0)
+    print(f"{len(targets)} queries in {1e3 * (time.time() - start):.1f} ms")
+    print(f"Target (300, 0, 100): {sdf.distance(300, 0, 100):.1f} mm from the boundary")